@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+MP4 faststart 校验与基准
+----------------------------------------------------------------
+把 public/videos 下的视频改写成 moov 在 mdat 之后的样本，再用 faststart 移回，
+校验：
+- 重排后 moov 位于 mdat 之前，时长 / 分辨率不变
+- 每个 chunk 偏移指向的字节与原文件一致
+并统计分析（只读 box 头与 moov）与重排的耗时。
+
+用法：python bench/bench_faststart.py [--videos public/videos]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from mp4_faststart import (  # noqa: E402
+    _chunk_offset_boxes,
+    _read_offsets,
+    _relocate,
+    _write_offsets,
+    analyze_mp4,
+    faststart,
+    read_moov,
+    read_top_level_boxes,
+)
+
+
+def move_moov_to_end(src: Path, dst: Path) -> None:
+    """faststart 的逆操作：构造 moov 在后的样本。"""
+    with src.open("rb") as fh:
+        boxes = read_top_level_boxes(fh, src.stat().st_size)
+        moov = read_moov(fh, boxes)
+        others = [box for box in boxes if box.type != b"moov"]
+        new_starts, position = {}, 0
+        for box in others:
+            new_starts[box.offset] = position
+            position += box.size
+        for box in _chunk_offset_boxes(moov):
+            _write_offsets(box, [_relocate(v, boxes, new_starts) for v in _read_offsets(box)])
+        parts = []
+        for box in others:
+            fh.seek(box.offset)
+            parts.append(fh.read(box.size))
+    dst.write_bytes(b"".join(parts) + moov.serialize())
+
+
+def chunk_samples(path: Path, size: int = 32) -> list[bytes]:
+    with path.open("rb") as fh:
+        boxes = read_top_level_boxes(fh, path.stat().st_size)
+        moov = read_moov(fh, boxes)
+        samples = []
+        for box in _chunk_offset_boxes(moov):
+            for offset in _read_offsets(box):
+                fh.seek(offset)
+                samples.append(fh.read(size))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", default=str(Path(__file__).resolve().parent.parent / "public" / "videos"))
+    args = parser.parse_args()
+
+    videos = sorted(p for p in Path(args.videos).iterdir() if p.suffix.lower() == ".mp4")
+    if not videos:
+        print(f"❌ {args.videos} 下没有 mp4 文件")
+        sys.exit(1)
+
+    failed = False
+    with tempfile.TemporaryDirectory(prefix="deepspace-faststart-") as tmp:
+        for video in videos:
+            slow = Path(tmp) / f"slow_{video.name}"
+            fixed = Path(tmp) / f"fast_{video.name}"
+            move_moov_to_end(video, slow)
+
+            start = time.perf_counter()
+            before = analyze_mp4(str(slow))
+            analyze_time = time.perf_counter() - start
+            start = time.perf_counter()
+            rewritten = faststart(str(slow), str(fixed))
+            rewrite_time = time.perf_counter() - start
+            after = analyze_mp4(str(fixed))
+            original = analyze_mp4(str(video))
+
+            checks = {
+                "样本 moov 在后": not before["faststart"],
+                "发生重排": rewritten,
+                "重排后 faststart": after["faststart"],
+                "元数据一致": all(after[k] == original[k] for k in ("duration", "width", "height")),
+                "chunk 内容一致": chunk_samples(fixed) == chunk_samples(video),
+                "文件大小一致": fixed.stat().st_size == video.stat().st_size,
+            }
+            ok = all(checks.values())
+            failed |= not ok
+            mb = video.stat().st_size / 1024 / 1024
+            print(
+                f"{'✅' if ok else '❌'} {video.name}: {mb:.2f} MB，{original['duration']}s，"
+                f"{original['width']}x{original['height']}，分析 {analyze_time * 1000:.2f} ms，"
+                f"重排 {rewrite_time * 1000:.1f} ms"
+            )
+            for name, passed in checks.items():
+                if not passed:
+                    print(f"   ❌ {name}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+抽卡模拟基准
+----------------------------------------------------------------
+对同一配置比较：
+- 逐抽模拟：按 TestProbability.jsx 的循环逐抽推进（纯 Python，相当于页面里的做法）
+- 向量化模拟：gacha_sim.simulate 同时推进大量序列
+- 精确计算：gacha_exact 的马尔可夫链结果
+输出每秒抽数，并校验两种模拟的平均五星间隔与歪的比例都与精确值一致（误差在抽样噪声范围内）。
+
+用法：python bench/bench_gacha_sim.py [--role 沈星回] [--draws 1000000] [--sequences 200000]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from gacha_rules import Scenario, five_star_odds  # noqa: E402
+from gacha_exact import build_table  # noqa: E402
+from gacha_sim import simulate  # noqa: E402
+
+
+def scalar_simulate(odds, include_three_star: bool, draws: int, seed: int = 1) -> dict:
+    rng = random.Random(seed)
+    pity = four = 0
+    failed = False
+    five = target = 0
+    for _ in range(draws):
+        # 与 getRandomCard 相同的判定（三星重抽）
+        rate5 = 1 if pity < 60 else 1 + (pity - 59) * 10
+        while True:
+            roll = rng.random() * 100
+            if four >= 9:
+                rarity = 5 if roll < rate5 else 4
+            else:
+                rarity = 5 if roll < rate5 else 4 if roll < rate5 + 7 else 3
+            if include_three_star or rarity != 3:
+                break
+        if rarity == 5:
+            hit = rng.random() < (odds.forced_on_target if failed else odds.on_target)
+            five += 1
+            target += hit
+            if odds.soft_guarantee:
+                failed = not hit
+            pity = four = 0
+        else:
+            pity += 1
+            four = 0 if rarity == 4 else four + 1
+    return {
+        "averageDrawsPerFiveStar": draws / five,
+        "offTargetRate": (five - target) / five,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--role", default="沈星回")
+    parser.add_argument("--draws", type=int, default=1_000_000, help="逐抽模拟的抽数")
+    parser.add_argument("--sequences", type=int, default=200_000, help="向量化模拟的序列数")
+    args = parser.parse_args()
+
+    with open(ROOT / "src" / "assets" / "cards.json", "r", encoding="utf-8") as f:
+        cards = json.load(f)
+    scenario = Scenario(roles=(args.role,))
+    odds = five_star_odds(cards, scenario)
+
+    start = time.perf_counter()
+    scalar = scalar_simulate(odds, scenario.include_three_star, args.draws)
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vector = simulate(odds, scenario.include_three_star, sequences=args.sequences)
+    vector_time = time.perf_counter() - start
+    vector_draws = vector["totalDraws"]
+
+    start = time.perf_counter()
+    exact = build_table(odds, scenario.include_three_star, max_targets=1)
+    exact_time = time.perf_counter() - start
+
+    print(f"配置：{scenario.key()}，五星命中目标概率 {odds.on_target:.4f}")
+    print(f"{'方式':<10}{'抽数':>14}{'耗时(s)':>10}{'抽/秒':>14}{'五星间隔':>10}{'歪的比例':>10}")
+    print(f"{'逐抽':<10}{args.draws:>14,}{scalar_time:>10.2f}{args.draws / scalar_time:>14,.0f}"
+          f"{scalar['averageDrawsPerFiveStar']:>10.2f}{scalar['offTargetRate']:>10.4f}")
+    print(f"{'向量化':<10}{vector_draws:>14,.0f}{vector_time:>10.2f}{vector_draws / vector_time:>14,.0f}"
+          f"{vector['averageDrawsPerFiveStar']:>10.2f}{vector['offTargetRate']:>10.4f}")
+    print(f"{'精确':<10}{'-':>14}{exact_time:>10.2f}{'-':>14}"
+          f"{exact['averageDrawsPerFiveStar']:>10.2f}{exact['offTargetRate']:>10.4f}")
+
+    ok = all(
+        abs(result["averageDrawsPerFiveStar"] - exact["averageDrawsPerFiveStar"]) < 0.5
+        and abs(result["offTargetRate"] - exact["offTargetRate"]) < 0.01
+        for result in (scalar, vector)
+    )
+    print(f"\n结果一致：{'✅' if ok else '❌'}")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
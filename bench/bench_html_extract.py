@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+HTML 提取基准
+----------------------------------------------------------------
+用 cards.json 合成与 WIKI 结构一致的入口页（全部 div.divsort）和详情页，
+对比 BeautifulSoup 全树解析与 wiki_html 流式解析的 CPU 时间与内存峰值，
+并校验两者提取结果一致。
+
+用法：python bench/bench_html_extract.py [--repeat 5]
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "bench"))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import update_cards  # noqa: E402
+from wiki_html import extract_detail_page  # noqa: E402
+
+from synthetic_upstream import render_detail_page, render_entry_page  # noqa: E402
+
+
+def load_cards() -> list[dict]:
+    with (ROOT / "src/assets/cards.json").open("r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def soup_entry(raw: bytes) -> list[dict]:
+    return update_cards._entry_boxes_via_soup(raw)
+
+
+def soup_detail(raw: bytes) -> tuple:
+    soup = BeautifulSoup(raw, "html.parser")
+    img = soup.select_one(".center img") or soup.select_one("img")
+    bvid, pname = update_cards.extract_bili_script_info(raw)
+    return img.get("src"), img.get("srcset"), bvid, pname
+
+
+def stream_detail(raw: bytes) -> tuple:
+    found = extract_detail_page(raw, update_cards.BILI_BVID_RE, update_cards.BILI_PNAME_RE)
+    return found["img"].get("src"), found["img"].get("srcset"), found["bvid"], found["pname"]
+
+
+def measure(func, raw: bytes, repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        func(raw)
+        best = min(best, time.process_time() - start)
+    tracemalloc.start()
+    func(raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def report(label: str, raw: bytes, baseline, candidate, repeat: int) -> None:
+    base_time, base_peak = measure(baseline, raw, repeat)
+    cand_time, cand_peak = measure(candidate, raw, repeat)
+    print(f"{label}（{len(raw) / 1024:.0f} KB）")
+    print(f"  BeautifulSoup：{base_time * 1000:8.2f} ms CPU，峰值 {base_peak / 1024:8.0f} KB")
+    print(f"  流式解析：     {cand_time * 1000:8.2f} ms CPU，峰值 {cand_peak / 1024:8.0f} KB")
+    print(f"  CPU {base_time / cand_time:.1f}x，内存 {base_peak / max(cand_peak, 1):.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cards = load_cards()
+    entry_raw = render_entry_page(cards).encode("utf-8")
+    detail_raw = render_detail_page(cards[0]).encode("utf-8")
+
+    expected = [
+        (b["name"], b["href"], (b["img"] or {}).get("src")) for b in soup_entry(entry_raw)
+    ]
+    boxes = update_cards.extract_entry_boxes(entry_raw)
+    actual = [(b["name"], b["href"], (b["img"] or {}).get("src")) for b in boxes]
+    if expected != actual:
+        print("❌ 入口页提取结果与 BeautifulSoup 不一致")
+        sys.exit(1)
+    if soup_detail(detail_raw) != stream_detail(detail_raw):
+        print("❌ 详情页提取结果与 BeautifulSoup 不一致")
+        sys.exit(1)
+
+    report("入口页", entry_raw, soup_entry, update_cards.extract_entry_boxes, args.repeat)
+    report("详情页", detail_raw, soup_detail, stream_detail, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
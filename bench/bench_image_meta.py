@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+图片元数据提取基准
+----------------------------------------------------------------
+对 public/images、public/signs 下的图片（以及一张合成的 2048x2048 PNG）对比：
+- 只读 PNG IHDR / JPEG SOF 的头信息解析
+- 生成占位图（PNG 纯 Python 解码 + 采样，JPEG 走 Pillow draft 模式）
+- 完整解码（Pillow Image.load，未安装 Pillow 时跳过）
+并校验头信息得到的宽高与完整解码一致。
+
+用法：python bench/bench_image_meta.py [--repeat 5]
+"""
+
+import argparse
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from image_meta import PNG_SIGNATURE, Image, make_placeholder, read_image_header  # noqa: E402
+
+
+def synthetic_png(path: Path, size: int = 2048) -> None:
+    """RGBA 渐变图，每行使用 Sub 过滤，模拟真实编码器的输出。"""
+    rows = []
+    for y in range(size):
+        line = bytearray()
+        prev = (0, 0, 0, 0)
+        for x in range(size):
+            px = (x * 255 // size, y * 255 // size, (x + y) % 256, 255)
+            line.extend((px[i] - prev[i]) & 0xFF for i in range(4))
+            prev = px
+        rows.append(b"\x01" + bytes(line))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    path.write_bytes(
+        PNG_SIGNATURE
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 6, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(b"".join(rows), 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def timed(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def full_decode(path: Path):
+    with Image.open(path) as img:
+        img.load()
+        return img.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="deepspace-image-") as tmp:
+        big = Path(tmp) / "synthetic_2048.png"
+        synthetic_png(big)
+        images = sorted((ROOT / "public" / "images").glob("*.png")) + sorted((ROOT / "public" / "images").glob("*.jpg"))
+        images += sorted((ROOT / "public" / "signs").glob("*.png")) + [big]
+
+        if Image is None:
+            print("⚠️ 未安装 Pillow：跳过完整解码对比，JPEG 没有占位图")
+        print(f"{'文件':<24}{'尺寸':>12}{'头信息(µs)':>12}{'占位图(ms)':>12}{'完整解码(ms)':>14}")
+        totals = [0.0, 0.0, 0.0]
+        failed = False
+        for path in images:
+            header = read_image_header(str(path))
+            head_t = timed(lambda: read_image_header(str(path)), args.repeat)
+            place_t = timed(lambda: make_placeholder(str(path), header), max(1, args.repeat // 2))
+            full_t = None
+            if Image is not None:
+                full_t = timed(lambda: full_decode(path), args.repeat)
+                if full_decode(path) != (header["width"], header["height"]):
+                    print(f"❌ {path.name}: 头信息宽高与完整解码不一致")
+                    failed = True
+                totals[2] += full_t
+            totals[0] += head_t
+            totals[1] += place_t
+            size = f"{header['width']}x{header['height']}"
+            full_s = f"{full_t * 1000:14.2f}" if full_t is not None else f"{'-':>14}"
+            print(f"{path.name:<24}{size:>12}{head_t * 1e6:12.1f}{place_t * 1000:12.2f}{full_s}")
+
+        print(f"\n合计：头信息 {totals[0] * 1000:.2f} ms，占位图 {totals[1] * 1000:.1f} ms", end="")
+        if Image is not None:
+            print(f"，完整解码 {totals[2] * 1000:.1f} ms（头信息快 {totals[2] / totals[0]:.0f}x）")
+        else:
+            print()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
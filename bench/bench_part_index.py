@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+分 P 名称匹配微基准
+----------------------------------------------------------------
+对比旧版逐页扫描（每次查询最多 4 轮、每轮对每个分 P 重新做正则规范化）
+与 PartNameIndex（每个视频构建一次索引）在 500 P 合集视频上的耗时，
+并校验两者返回结果完全一致。
+
+用法：python bench/bench_part_index.py [--parts 500] [--queries 400]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from update_cards import PartNameIndex, normalize_part_name  # noqa: E402
+
+CHARACTERS = ["沈星回", "黎深", "祁煜", "秦彻", "夏以昼"]
+WORDS = ["沉冥", "幽眷", "相遥", "猩红", "席卷", "深海", "星光", "誓约", "心跳", "余温", "夜色", "晨曦"]
+
+
+def linear_lookup(pages: list[dict], pname: str) -> int | None:
+    """旧版 fetch_bilibili_page 的匹配逻辑，作为基线与正确性参照。"""
+    if not pages:
+        return None
+    if not pname:
+        return int(pages[0].get("page") or 1)
+    target = pname.strip()
+    hit = next((p for p in pages if p.get("part") == target), None)
+    if not hit:
+        norm_target = normalize_part_name(target)
+        hit = next((p for p in pages if normalize_part_name(p.get("part")) == norm_target), None)
+    if not hit:
+        norm_target = normalize_part_name(target)
+        hit = next((p for p in pages if norm_target in normalize_part_name(p.get("part"))), None)
+    if not hit:
+        norm_target = normalize_part_name(target)
+        hit = next((p for p in pages if normalize_part_name(p.get("part")) in norm_target), None)
+    return int(hit.get("page") or 1) if hit else None
+
+
+def synthetic_pages(count: int, rng: random.Random) -> list[dict]:
+    pages = []
+    for i in range(1, count + 1):
+        title = "".join(rng.sample(WORDS, 2))
+        part = f"【{rng.choice(CHARACTERS)}】{title}·第{i}话 ({i:03d})"
+        pages.append({"page": i, "part": part})
+    return pages
+
+
+def synthetic_queries(pages: list[dict], count: int, rng: random.Random) -> list[str]:
+    """混合四种命中方式以及未命中的查询。"""
+    queries = []
+    for _ in range(count):
+        part = rng.choice(pages)["part"]
+        kind = rng.randrange(5)
+        if kind == 0:
+            queries.append(part)                                # 精确
+        elif kind == 1:
+            queries.append(f" {part.replace('·', ' - ')} ")      # 规范化相等
+        elif kind == 2:
+            queries.append(part[4:9])                           # 分 P 包含目标
+        elif kind == 3:
+            queries.append(f"思念「{part}」特写")                 # 目标包含分 P
+        else:
+            queries.append("".join(rng.sample(WORDS, 3)) + "番外")  # 多数未命中
+    return queries
+
+
+def timed(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--parts", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=3528)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pages = synthetic_pages(args.parts, rng)
+    queries = synthetic_queries(pages, args.queries, rng)
+
+    expected = [linear_lookup(pages, q) for q in queries]
+    index = PartNameIndex(pages)
+    actual = [index.lookup(q) for q in queries]
+    mismatches = [(q, e, a) for q, e, a in zip(queries, expected, actual) if e != a]
+    if mismatches:
+        for q, e, a in mismatches[:10]:
+            print(f"❌ 结果不一致：{q!r} 期望 {e} 实际 {a}")
+        sys.exit(1)
+
+    linear_time = timed(lambda: [linear_lookup(pages, q) for q in queries], args.repeat)
+    build_time = timed(lambda: PartNameIndex(pages), args.repeat)
+    lookup_time = timed(lambda: [index.lookup(q) for q in queries], args.repeat)
+    indexed_time = build_time + lookup_time
+
+    hits = sum(1 for e in expected if e is not None)
+    print(f"分 P 数：{args.parts}，查询数：{args.queries}（命中 {hits}）")
+    print(f"逐页扫描：   {linear_time * 1000:9.2f} ms  ({linear_time / args.queries * 1e6:8.1f} µs/次)")
+    print(f"索引构建：   {build_time * 1000:9.2f} ms")
+    print(f"索引查询：   {lookup_time * 1000:9.2f} ms  ({lookup_time / args.queries * 1e6:8.1f} µs/次)")
+    print(f"加速比：     {linear_time / indexed_time:9.1f}x（含构建）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+素材目录扫描基准
+----------------------------------------------------------------
+在临时目录生成约 10 万个文件的合成 public 树（多层子目录、混有非素材文件），
+对比旧版 Path.rglob 串行扫描与 os.scandir 并行扫描的耗时，
+并校验两者生成的 assets_config.json / assets_config.js 逐字节一致。
+
+哈希缓存预热后计时，两边都不读取文件内容，只比较目录遍历本身。
+
+用法：python bench/bench_scan_assets.py [--files 100000] [--workers 8]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import scan_assets  # noqa: E402
+from scan_assets import (  # noqa: E402
+    AUDIO_EXTENSIONS,
+    IMAGE_EXTENSIONS,
+    VIDEO_EXTENSIONS,
+    HashCache,
+    format_file_size,
+)
+
+TOP_DIRS = {
+    "videos": [".mp4", ".MP4", ".webm"],
+    "audios": [".mp3", ".ogg"],
+    "images": [".png", ".jpg", ".webp"],
+    "signs": [".png"],
+    "data": [".json", ".txt"],
+}
+
+
+def legacy_scan(public_dir: str, hash_cache: HashCache) -> dict:
+    """旧版 scan_assets 的遍历逻辑：rglob + is_file + relative_to + stat，作为基线与正确性参照。"""
+    assets = {"video": [], "audio": [], "image": [], "sign": []}
+    public_path = Path(public_dir).resolve()
+    for item in public_path.iterdir():
+        if item.is_dir():
+            dir_name = item.name
+            for file_path in item.rglob("*"):
+                if file_path.is_file():
+                    file_ext = file_path.suffix.lower()
+                    if file_ext not in VIDEO_EXTENSIONS | AUDIO_EXTENSIONS | IMAGE_EXTENSIONS:
+                        continue
+                    relative_path = file_path.relative_to(public_path).as_posix()
+                    stat = file_path.stat()
+                    file_size = stat.st_size
+                    file_info = {
+                        "path": relative_path,
+                        "size": file_size,
+                        "sizeFormatted": format_file_size(file_size),
+                        "hash": hash_cache.get_hash(relative_path, file_path, stat),
+                    }
+                    if file_ext in VIDEO_EXTENSIONS:
+                        assets["video"].append(file_info)
+                    elif file_ext in AUDIO_EXTENSIONS:
+                        assets["audio"].append(file_info)
+                    elif dir_name == "signs":
+                        assets["sign"].append(file_info)
+                    else:
+                        assets["image"].append(file_info)
+    return assets
+
+
+def build_tree(root: Path, total: int, rng: random.Random) -> None:
+    """按目录 / 子目录 / 孙目录三层生成文件，每个目录最多 200 个文件。"""
+    names = list(TOP_DIRS)
+    for i in range(total):
+        top = names[i % len(names)]
+        n = i // len(names)
+        sub = root / top / f"g{n // 4000:02d}" / f"s{(n // 200) % 20:02d}"
+        if n % 200 == 0:
+            sub.mkdir(parents=True, exist_ok=True)
+        ext = rng.choice(TOP_DIRS[top])
+        (sub / f"素材_{i:06d}{ext}").write_bytes(b"x" * rng.randint(0, 64))
+
+
+def render_outputs(assets: dict, workdir: Path, total_size: int | None = None) -> tuple[bytes, bytes]:
+    """用固定时间戳生成两个配置文件，返回其字节内容。"""
+    fixed = mock.patch.object(scan_assets, "datetime", wraps=scan_assets.datetime)
+    with fixed as dt, contextlib.redirect_stdout(io.StringIO()):
+        dt.now.return_value = scan_assets.datetime(2025, 1, 1)
+        scan_assets.generate_assets_config(assets, str(workdir / "assets_config.json"), total_size)
+        scan_assets.generate_js_config(assets, str(workdir / "assets_config.js"), total_size)
+    return (workdir / "assets_config.json").read_bytes(), (workdir / "assets_config.js").read_bytes()
+
+
+def timed(func, repeat: int) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=scan_assets.SCAN_WORKERS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=3528)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="deepspace-scan-"))
+    try:
+        public = workdir / "public"
+        start = time.perf_counter()
+        build_tree(public, args.files, random.Random(args.seed))
+        print(f"生成 {args.files} 个文件：{time.perf_counter() - start:.1f}s（{workdir}）")
+
+        # 预热哈希缓存，计时只覆盖目录遍历与元数据
+        cache = HashCache(path=None)
+        with contextlib.redirect_stdout(io.StringIO()):
+            scan_assets.scan_assets(str(public), hash_cache=cache, workers=args.workers)
+
+        legacy_time, legacy = timed(lambda: legacy_scan(str(public), cache), args.repeat)
+        with contextlib.redirect_stdout(io.StringIO()):
+            scandir_time, (current, current_total) = timed(
+                lambda: scan_assets.scan_assets(str(public), hash_cache=cache, workers=args.workers),
+                args.repeat,
+            )
+            serial_time, _ = timed(
+                lambda: scan_assets.scan_assets(str(public), hash_cache=cache, workers=1),
+                args.repeat,
+            )
+
+        out_legacy, out_current = workdir / "legacy", workdir / "current"
+        out_legacy.mkdir()
+        out_current.mkdir()
+        if render_outputs(legacy, out_legacy) != render_outputs(current, out_current, current_total):
+            print("❌ 两种扫描生成的配置文件不一致")
+            sys.exit(1)
+
+        found = sum(len(v) for v in current.values())
+        print(f"素材文件：{found}（其余为非素材文件），CPU：{os.cpu_count()}")
+        print(f"rglob 串行：       {legacy_time * 1000:9.1f} ms")
+        print(f"scandir 单线程：   {serial_time * 1000:9.1f} ms  ({legacy_time / serial_time:5.2f}x)")
+        print(f"scandir {args.workers} 线程：   {scandir_time * 1000:9.1f} ms  ({legacy_time / scandir_time:5.2f}x)")
+        print("✅ assets_config.json / assets_config.js 逐字节一致")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
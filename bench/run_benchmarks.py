@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+端到端基准
+----------------------------------------------------------------
+在本地替身服务器上完整运行 update_cards.py、update_songs.py 与 scan_assets.py，
+统计耗时与吞吐（卡片/秒），不访问 wiki.biligame.com / api.bilibili.com / music.163.com。
+
+- 响应来源：--fixtures 指定的录制目录（DEEPSPACE_RECORD_DIR 录制），
+  缺失的 URL 由 synthetic_upstream 用仓库现有数据合成
+- 每个脚本在独立子进程、独立临时工作目录中运行，不会改动仓库里的数据文件
+- 礼貌等待通过 DEEPSPACE_THROTTLE_SCALE 缩放（默认 0，只测量爬虫本身的开销）
+
+用法：python bench/run_benchmarks.py [--latency 0.02] [--error-rate 0.02] [--workers 4] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+sys.path.insert(0, str(ROOT / "bench"))
+
+from replay import REPLAY_URL_ENV, FixtureStore, ReplayServer  # noqa: E402
+
+from synthetic_upstream import SyntheticUpstream  # noqa: E402
+
+DATA_FILES = ["cards.json", "poolCategories.json", "songs.json", "songs_list.json"]
+
+
+def load_json(path: Path):
+    with path.open("r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def prepare_workdir() -> Path:
+    """临时工作目录：复制 src/assets 数据与 public 素材（scan_assets 会改写 public 下的文件）。"""
+    workdir = Path(tempfile.mkdtemp(prefix="deepspace-bench-"))
+    assets = workdir / "src" / "assets"
+    assets.mkdir(parents=True)
+    for name in DATA_FILES:
+        shutil.copy2(SRC / "assets" / name, assets / name)
+    shutil.copytree(ROOT / "public", workdir / "public")
+    return workdir
+
+
+def run_script(label: str, argv: list[str], workdir: Path, env: dict) -> dict:
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, *argv],
+        cwd=workdir,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        print(proc.stdout[-4000:])
+        print(f"❌ {label} 退出码 {proc.returncode}")
+    return {"label": label, "seconds": round(elapsed, 3), "returncode": proc.returncode}
+
+
+def compare_json(produced: Path, expected: Path) -> bool:
+    return load_json(produced) == load_json(expected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=None, help="录制的 fixture 目录（可选）")
+    parser.add_argument("--latency", type=float, default=0.02, help="替身服务器每个请求的延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="随机返回 403/429/567 的概率")
+    parser.add_argument(
+        "--error-hosts",
+        default="wiki.biligame.com,api.bilibili.com",
+        help="只对这些 host 注入错误（逗号分隔；update_songs 没有重试逻辑）",
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--throttle-scale", type=float, default=0.0, help="礼貌等待缩放系数（1 为线上配置）")
+    parser.add_argument("--seed", type=int, default=3528)
+    parser.add_argument("--json", default=None, help="把结果写入 JSON 文件")
+    parser.add_argument("--keep", action="store_true", help="保留临时工作目录")
+    args = parser.parse_args()
+
+    cards = load_json(SRC / "assets" / "cards.json")
+    songs = load_json(SRC / "assets" / "songs.json")
+    upstream = SyntheticUpstream(cards, songs)
+    store = FixtureStore(args.fixtures) if args.fixtures else None
+    error_hosts = tuple(h for h in args.error_hosts.split(",") if h)
+
+    workdir = prepare_workdir()
+    results = []
+    with ReplayServer(
+        store=store,
+        responder=upstream,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_hosts=error_hosts,
+        seed=args.seed,
+    ) as server:
+        env = dict(os.environ)
+        env.update({
+            REPLAY_URL_ENV: server.url,
+            "DEEPSPACE_THROTTLE_SCALE": str(args.throttle_scale),
+            "DEEPSPACE_HTTP_CACHE_DIR": str(workdir / ".cache" / "http"),
+            "PYTHONIOENCODING": "utf-8",
+        })
+        print(f"🎬 替身服务器：{server.url}（延迟 {args.latency}s，错误率 {args.error_rate}）")
+        print(f"📁 工作目录：{workdir}")
+
+        cards_script = str(SRC / "update_cards.py")
+        runs = [
+            ("update_cards（全量，冷缓存）", [cards_script, "--workers", str(args.workers)]),
+            ("update_cards（增量，无变化）", [cards_script, "--incremental", "--workers", str(args.workers)]),
+            ("update_cards（全量，不读缓存）", [cards_script, "--no-cache", "--workers", str(args.workers)]),
+            ("update_songs（全量）", [str(SRC / "update_songs.py"), "--no-cache"]),
+            ("update_songs（增量）", [str(SRC / "update_songs.py"), "--incremental", "--no-cache"]),
+            ("scan_assets", [str(SRC / "scan_assets.py")]),
+        ]
+        for label, argv in runs:
+            before = dict(server.stats)
+            result = run_script(label, argv, workdir, env)
+            result["requests"] = server.stats["requests"] - before["requests"]
+            result["injected_errors"] = server.stats["injected_errors"] - before["injected_errors"]
+            if argv[0] == cards_script:
+                result["cards_per_sec"] = round(len(cards) / result["seconds"], 2) if result["seconds"] else None
+                metrics_path = workdir / ".cache" / "crawl_metrics.json"
+                if metrics_path.exists():
+                    result["metrics_totals"] = load_json(metrics_path).get("totals")
+            results.append(result)
+
+    cards_ok = compare_json(workdir / "src/assets/cards.json", SRC / "assets/cards.json")
+    songs_ok = compare_json(workdir / "src/assets/songs_list.json", SRC / "assets/songs_list.json")
+
+    print()
+    print(f"{'阶段':<28}{'耗时(s)':>10}{'请求数':>8}{'注入错误':>8}{'卡片/秒':>10}")
+    for r in results:
+        rate = r.get("cards_per_sec")
+        print(
+            f"{r['label']:<28}{r['seconds']:>10.2f}{r['requests']:>8}{r['injected_errors']:>8}"
+            f"{(f'{rate:.1f}' if rate else '-'):>10}"
+        )
+    print()
+    print(f"cards.json 与输入一致：{'✅' if cards_ok else '❌'}")
+    print(f"songs_list.json 与输入一致：{'✅' if songs_ok else '❌'}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({
+                "config": vars(args),
+                "cards": len(cards),
+                "results": results,
+                "outputs_match": {"cards": cards_ok, "songs_list": songs_ok},
+            }, fh, ensure_ascii=False, indent=2)
+    if not args.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if any(r["returncode"] for r in results) or not (cards_ok and songs_ok):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+合成上游数据源
+----------------------------------------------------------------
+在没有录制 fixture 时，用仓库里现有的 cards.json / songs.json 反推出
+WIKI、B 站与网易云接口的响应，供 replay.ReplayServer 作为 responder 使用。
+爬虫对这些响应跑完整流程后，产出应与输入数据一致。
+"""
+
+import hashlib
+import html
+import json
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+PADDING = "<p>" + "恋与深空思念图鉴 " * 40 + "</p>\n"
+
+WIKI_FIELDS = [
+    ("思念角色", "character"),
+    ("思念名称", "name"),
+    ("思念位置", "card_type_tag"),
+    ("思念星谱", "card_color_tag"),
+    ("思念星级", "star"),
+    ("思念天赋", "talent"),
+    ("思念获取途径", "get"),
+    ("常驻", "permanent"),
+    ("思念上线时间", "time"),
+]
+
+
+def render_entry_page(cards: list[dict]) -> str:
+    """入口页 思念:筛选 的近似结构：每张卡一个 div.divsort。"""
+    boxes = []
+    for card in cards:
+        name = html.escape(card["name"])
+        small = html.escape(card.get("image_small") or "")
+        boxes.append(
+            f'<div class="divsort" data-param1="{html.escape(card.get("character", ""))}" '
+            f'data-param2="{html.escape(card.get("star", ""))}">'
+            f'<div class="card-img"><a href="/lysk/{quote(card["name"])}" title="{name}">'
+            f'<a href="/lysk/文件:{quote(card["name"])}.png" class="image">'
+            f'<img alt="{name}" src="{small}" srcset="{small} 1.5x, {small} 2x" width="150" height="267"></a></a></div>'
+            f'<div class="card-name"><span>{name}</span></div>'
+            f'<div class="card-star">{html.escape(card.get("star", ""))}</div></div>\n'
+        )
+    return (
+        "<!DOCTYPE html><html><head><title>思念:筛选</title>"
+        "<script>var RLCONF={\"wgPageName\":\"思念:筛选\"};</script></head><body>"
+        + PADDING * 20
+        + '<div id="CardSelectTr">' + "".join(boxes) + "</div>"
+        + PADDING * 20
+        + "</body></html>"
+    )
+
+
+def render_detail_page(card: dict, pname: str | None = None) -> str:
+    name = html.escape(card["name"])
+    small = html.escape(card.get("image_small") or "")
+    big = html.escape(card.get("image") or "")
+    script = ""
+    if card.get("video_bvid"):
+        script = f"<script>const Bvid = '{card['video_bvid']}'; const Pname = '{html.escape(pname or card['name'])}';</script>"
+    return (
+        f"<!DOCTYPE html><html><head><title>{name}</title></head><body>"
+        '<div class="top-nav"><img src="https://patchwiki.biligame.com/images/lysk/logo.png"></div>'
+        + PADDING * 30
+        + f'<div class="center"><div class="floatnone"><a href="/lysk/文件:{name}.png" class="image">'
+        f'<img alt="{name}" src="{small}" srcset="{big} 1.5x, {big} 2x" width="450"></a></div></div>'
+        + PADDING * 30
+        + script
+        + PADDING * 10
+        + "</body></html>"
+    )
+
+
+def render_wikitext(card: dict) -> str:
+    lines = ["{{思念", *(f"|{label}={card.get(key) or ''}" for label, key in WIKI_FIELDS), "}}"]
+    return "\n".join(lines)
+
+
+def revision_id(card: dict) -> int:
+    digest = hashlib.sha1(json.dumps(card, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+    return int(digest[:8], 16)
+
+
+def _duration_ms(text: str | None) -> int | None:
+    if not text:
+        return None
+    minutes, seconds = text.split(":")
+    return (int(minutes) * 60 + int(seconds)) * 1000
+
+
+class SyntheticUpstream:
+    def __init__(self, cards: list[dict], songs: dict | None = None, artist_id: str = "59642824"):
+        self.cards = cards
+        self.by_name = {card["name"]: card for card in cards}
+        self.songs = songs or {}
+        self.artist_id = artist_id
+        # 同一视频、同一分 P 的卡名拼成分 P 标题
+        self.videos: dict[str, dict[int, list[str]]] = {}
+        for card in cards:
+            if card.get("video_bvid"):
+                page = card.get("video_page") or 1
+                self.videos.setdefault(card["video_bvid"], {}).setdefault(page, []).append(card["name"])
+        self.tracks = {
+            str(song["id"]): song for album in self.songs.values() for song in album["songs"]
+        }
+
+    # ---------- 入口 ----------
+    def __call__(self, url: str):
+        parts = urlsplit(url)
+        query = parse_qs(parts.query)
+        host, path = parts.hostname, unquote(parts.path)
+        if host == "wiki.biligame.com":
+            if path == "/lysk/api.php":
+                return self._json(self._wiki_api(query))
+            if path == "/lysk/思念:筛选":
+                return self._html(render_entry_page(self.cards))
+            card = self.by_name.get(path[len("/lysk/"):])
+            if card:
+                return self._html(render_detail_page(card))
+        elif host == "api.bilibili.com" and path == "/x/web-interface/view":
+            return self._json(self._bilibili_view(query.get("bvid", [""])[0]))
+        elif host == "music.163.com":
+            return self._netease(path, query)
+        return None
+
+    @staticmethod
+    def _json(data: dict):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        return 200, {"Content-Type": "application/json; charset=utf-8", "ETag": etag}, body
+
+    @staticmethod
+    def _html(text: str):
+        body = text.encode("utf-8")
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        return 200, {"Content-Type": "text/html; charset=UTF-8", "ETag": etag}, body
+
+    # ---------- WIKI api.php ----------
+    def _wiki_api(self, query: dict) -> dict:
+        titles = (query.get("titles") or [""])[0].split("|")
+        pages = {}
+        for offset, title in enumerate(titles):
+            card = self.by_name.get(title)
+            if card is None:
+                pages[str(-1 - offset)] = {"ns": 0, "title": title, "missing": ""}
+                continue
+            revid = revision_id(card)
+            page = {"pageid": revid % 100000, "ns": 0, "title": title, "lastrevid": revid}
+            if "revisions" in (query.get("prop") or [""])[0]:
+                page["revisions"] = [{
+                    "revid": revid,
+                    "timestamp": card.get("time", ""),
+                    "slots": {"main": {"contentmodel": "wikitext", "*": render_wikitext(card)}},
+                }]
+            pages[str(page["pageid"])] = page
+        return {"batchcomplete": "", "query": {"pages": pages}}
+
+    # ---------- B 站 ----------
+    def _bilibili_view(self, bvid: str) -> dict:
+        parts = self.videos.get(bvid)
+        if not parts:
+            return {"code": -404, "message": "啥都木有", "data": None}
+        pages = [
+            {"cid": page, "page": page, "part": "/".join(parts.get(page, [f"花絮{page}"]))}
+            for page in range(1, max(parts) + 1)
+        ]
+        return {"code": 0, "data": {"bvid": bvid, "pages": pages}}
+
+    # ---------- 网易云 ----------
+    def _netease(self, path: str, query: dict):
+        if path.startswith("/api/artist/albums/"):
+            albums = [
+                {"id": int(album_id), "name": album["name"], "size": len(album["songs"])}
+                for album_id, album in self.songs.items()
+            ]
+            offset = int((query.get("offset") or ["0"])[0])
+            limit = int((query.get("limit") or ["50"])[0])
+            return self._json({"code": 200, "total": len(albums), "hotAlbums": albums[offset:offset + limit]})
+        if path.startswith("/api/album/"):
+            album = self.songs.get(path.rstrip("/").rsplit("/", 1)[-1])
+            if album is None:
+                return self._json({"code": 404})
+            return self._json({"code": 200, "songs": [self._song(s) for s in album["songs"]]})
+        if path.startswith("/api/song/detail"):
+            ids = json.loads((query.get("ids") or ["[]"])[0])
+            songs = [self._song(self.tracks[str(i)]) for i in ids if str(i) in self.tracks]
+            return self._json({"code": 200, "songs": songs})
+        return None
+
+    @staticmethod
+    def _song(song: dict) -> dict:
+        return {
+            "id": int(song["id"]),
+            "name": song["title"],
+            "duration": _duration_ms(song.get("duration")),
+            "artists": [{"name": name} for name in (song.get("singers") or "").split("/") if name],
+        }
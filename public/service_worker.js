@@ -1,20 +1,39 @@
-const CACHE_NAME = 'deepspace-cache-v6';
-const FILES_TO_CACHE = [
-  '/deepspace/videos/gold_card.MP4',
-  '/deepspace/videos/no_gold_card.mp4',
-  '/deepspace/videos/夏以昼金卡.mp4',
-  '/deepspace/videos/开屏动画.mp4',
-  '/deepspace/videos/沈星回金卡.mp4',
-  '/deepspace/videos/祁煜金卡.mp4',
-  '/deepspace/videos/秦彻金卡.mp4',
-  '/deepspace/videos/黎深金卡.mp4',
-  '/deepspace/audios/不出金.mp3',
-  '/deepspace/audios/出金.mp3',
-  '/deepspace/audios/切换音效.mp3',
-  '/deepspace/audios/展示结算.mp3',
-  '/deepspace/audios/时空引力.mp3',
-  '/deepspace/images/结算背景.jpg'
-];
+// <precache-manifest> 由 src/scan_assets.py 根据 asset_manifest.json 生成，请勿手动修改
+const PRECACHE_VERSION = 'c5cfe4d8fe4781b1';
+const PRECACHE_MANIFEST = {
+  "audios/不出金.mp3": "973902d1dcf450f3",
+  "audios/出金.mp3": "dfb6d477c6a24fc3",
+  "audios/切换音效.mp3": "6f0660305fb67127",
+  "audios/展示结算.mp3": "b5d52d914037063b",
+  "audios/金卡展示.mp3": "20218e9bffe0184f",
+  "images/结算背景.jpg": "7b439efb8e5ec174",
+  "videos/沈星回金卡.mp4": "c62f9bb774a2a4fd",
+  "videos/祁煜金卡.mp4": "b15708ff90d2ca74",
+  "videos/秦彻金卡.mp4": "c5f10ceb1d9b8166"
+};
+// </precache-manifest>
+
+// 缓存名不再随版本变化：预缓存条目以 `路径?v=内容哈希` 为键，
+// 只有哈希变化的文件才会重新下载，旧版本条目在 activate 阶段清理
+const CACHE_NAME = 'deepspace-cache';
+
+// 相对 Service Worker 作用域的路径（已解码），如 videos/秦彻金卡.mp4
+const scopePath = () => new URL(self.registration.scope).pathname;
+const relativePath = (url) => {
+  let pathname;
+  try {
+    pathname = decodeURIComponent(url.pathname);
+  } catch {
+    return null;
+  }
+  const base = scopePath();
+  return pathname.startsWith(base) ? pathname.slice(base.length) : null;
+};
+const versionedUrl = (path, hash) => {
+  const url = new URL(path, self.registration.scope);
+  url.searchParams.set('v', hash);
+  return url.toString();
+};
 
 // 安装阶段：缓存资源，跳过等待
 // self.addEventListener('install', (event) => {
@@ -34,12 +53,17 @@ self.addEventListener('install', (event) => {
   event.waitUntil(
     (async () => {
       const cache = await caches.open(CACHE_NAME);
-      for (const file of FILES_TO_CACHE) {
+      console.log('[SW] Precache version:', PRECACHE_VERSION);
+      for (const [path, hash] of Object.entries(PRECACHE_MANIFEST)) {
+        const url = versionedUrl(path, hash);
+        if (await cache.match(url)) {
+          continue; // 内容未变化，沿用已缓存的文件
+        }
         try {
-          await cache.add(file);
-          console.log(`[SW] Cached: ${file}`);
+          await cache.add(url);
+          console.log(`[SW] Cached: ${path} (${hash})`);
         } catch (err) {
-          console.warn(`[SW] Failed to cache ${file}:`, err);
+          console.warn(`[SW] Failed to cache ${path}:`, err);
         }
       }
     })()
@@ -52,7 +76,7 @@ self.addEventListener('message', (event) => {
   }
 });
 
-// 激活阶段：清除旧缓存，立即接管控制权
+// 激活阶段：清除旧缓存与哈希已过期的预缓存条目，立即接管控制权
 self.addEventListener('activate', (event) => {
   event.waitUntil(
     (async () => {
@@ -65,6 +89,15 @@ self.addEventListener('activate', (event) => {
           }
         })
       );
+      const cache = await caches.open(CACHE_NAME);
+      for (const request of await cache.keys()) {
+        const url = new URL(request.url);
+        const path = relativePath(url);
+        if (path in PRECACHE_MANIFEST && url.searchParams.get('v') !== PRECACHE_MANIFEST[path]) {
+          console.log('[SW] Deleting outdated entry:', path);
+          await cache.delete(request);
+        }
+      }
       await self.clients.claim();
     })()
   );
@@ -84,6 +117,26 @@ self.addEventListener('fetch', (event) => {
     return fetch(event.request); // 外部请求直接返回
   }
 
+  // 预缓存素材：按当前内容哈希查找，未命中时下载对应版本并写入缓存
+  const path = relativePath(url);
+  if (path !== null && path in PRECACHE_MANIFEST) {
+    const target = versionedUrl(path, PRECACHE_MANIFEST[path]);
+    event.respondWith(
+      caches.open(CACHE_NAME).then(async (cache) => {
+        const cachedResponse = await cache.match(target);
+        if (cachedResponse) {
+          return cachedResponse;
+        }
+        const response = await fetch(target);
+        if (response.status === 200) {
+          cache.put(target, response.clone());
+        }
+        return response;
+      })
+    );
+    return;
+  }
+
   // 处理缓存和其他逻辑
   event.respondWith(
     caches.match(event.request).then((cachedResponse) => {
@@ -3,7 +3,7 @@
  * 这样数据文件会直接部署到网站，不依赖 GitHub API
  */
 
-import { copyFileSync, mkdirSync, existsSync } from 'fs';
+import { copyFileSync, cpSync, mkdirSync, existsSync, rmSync } from 'fs';
 import { join, dirname } from 'path';
 import { fileURLToPath } from 'url';
 
@@ -17,6 +17,23 @@ const dataFiles = [
   'songs_list.json',
 ];
 
+// 由爬虫生成的紧凑编码、索引、抽卡统计、版本清单与 gzip 预压缩版本，缺失时不影响构建
+const optionalFiles = [
+  'cards.compact.json',
+  'cards.compact.json.gz',
+  'cards.json.gz',
+  'poolCategories.json.gz',
+  'songs_list.json.gz',
+  'cards_index.json',
+  'cards_index.json.gz',
+  'gacha_stats.json',
+  'gacha_exact.json',
+  'data_manifest.json',
+];
+
+// 数据版本增量目录（由 data_manifest.json 引用），整体替换以去掉已淘汰的增量
+const deltaDir = 'deltas';
+
 const srcDir = join(rootDir, 'src', 'assets');
 const destDir = join(rootDir, 'public', 'data');
 
@@ -43,6 +60,31 @@ for (const file of dataFiles) {
   }
 }
 
+let optionalCount = 0;
+for (const file of optionalFiles) {
+  const srcPath = join(srcDir, file);
+  if (existsSync(srcPath)) {
+    try {
+      copyFileSync(srcPath, join(destDir, file));
+      optionalCount++;
+    } catch (error) {
+      console.warn(`⚠️ 复制失败 ${file}:`, error.message);
+    }
+  }
+}
+if (existsSync(join(srcDir, deltaDir))) {
+  try {
+    rmSync(join(destDir, deltaDir), { recursive: true, force: true });
+    cpSync(join(srcDir, deltaDir), join(destDir, deltaDir), { recursive: true });
+    console.log(`✅ 已复制增量目录: ${deltaDir}/`);
+  } catch (error) {
+    console.warn(`⚠️ 复制失败 ${deltaDir}/:`, error.message);
+  }
+}
+if (optionalCount) {
+  console.log(`✅ 已复制 ${optionalCount} 个紧凑 / 预压缩数据文件`);
+}
+
 if (copiedCount === dataFiles.length) {
   console.log(`\n✅ 成功复制 ${copiedCount} 个数据文件到 public/data/`);
   console.log('📝 数据文件将随网站一起部署，用户可以直接从网站获取最新数据，无需依赖 GitHub API');
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+原子写文件
+----------------------------------------------------------------
+先写同目录下的临时文件，fsync 后再 os.replace 覆盖目标，
+进程中途退出时目标文件要么是旧内容、要么是完整的新内容。
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+
+def _read_umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# os.umask 只能“设置并返回旧值”，会短暂改动进程级状态；
+# 只在导入时（尚未有写文件的线程）读取一次，之后并发写入不再触碰它
+_UMASK = _read_umask()
+
+
+def _target_mode(target: Path) -> int:
+    """沿用目标文件原有权限；新文件按 umask 取默认权限（mkstemp 固定为 0600）。"""
+    try:
+        return target.stat().st_mode & 0o777
+    except OSError:
+        return 0o666 & ~_UMASK
+
+
+def write_bytes_atomic(path: str | Path, data: bytes) -> None:
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            if hasattr(os, "fchmod"):
+                os.fchmod(fh.fileno(), _target_mode(target))
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        if not hasattr(os, "fchmod"):
+            os.chmod(tmp_name, _target_mode(target))
+        os.replace(tmp_name, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def write_text_atomic(path: str | Path, text: str, encoding: str = "utf-8") -> None:
+    write_bytes_atomic(path, text.encode(encoding))
+
+
+def write_json_atomic(path: str | Path, data, **dump_kwargs) -> None:
+    """参数与 json.dump 相同（默认 ensure_ascii=False）。"""
+    dump_kwargs.setdefault("ensure_ascii", False)
+    write_text_atomic(path, json.dumps(data, **dump_kwargs))
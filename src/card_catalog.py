@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+卡片目录（SQLite）
+----------------------------------------------------------------
+爬虫把每次运行的结果 upsert 到本地 SQLite，cards.json / card_revisions.json / poolCategories.json
+都从这里导出：
+- cards：以卡名为主键，保存完整记录（data，保持字段顺序）与常用查询列；
+  character / star / pool / release_date / video_bvid 建有索引
+- card_history：逐字段的变更记录（新增、修改、移除），附带 wiki revid 与运行编号
+- runs：每次写入的运行记录
+- bilibili_pages：BVID 的分 P 列表（卡片的 video_bvid / video_page 即指向这里）
+目录放在 .cache（随 CI 缓存保存）；缓存丢失或 cards.json 被手动修改时，
+sync_from_json 会按 cards.json 重新导入，差异同样记入历史。
+
+用法：
+  python src/card_catalog.py stats
+  python src/card_catalog.py query --character 沈星回 --star 5 [--pool 卡池名] [--since 2024-01-01]
+  python src/card_catalog.py history 卡名
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Callable
+
+from cards_index import parse_release_time, star_key
+from data_manifest import content_hash
+
+CATALOG_PATH = ".cache/cards.sqlite"
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    mode          TEXT NOT NULL,
+    started_at    TEXT NOT NULL,
+    cards_total   INTEGER NOT NULL DEFAULT 0,
+    cards_added   INTEGER NOT NULL DEFAULT 0,
+    cards_changed INTEGER NOT NULL DEFAULT 0,
+    cards_removed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS cards (
+    name          TEXT PRIMARY KEY,
+    position      INTEGER,
+    character     TEXT,
+    star          TEXT,
+    color         TEXT,
+    talent        TEXT,
+    pool          TEXT,
+    pool_category    TEXT,
+    pool_subcategory TEXT,
+    release_date  TEXT,
+    video_bvid    TEXT,
+    video_page    INTEGER,
+    revid         INTEGER,
+    hash          TEXT NOT NULL,
+    data          TEXT NOT NULL,
+    first_seen    INTEGER REFERENCES runs(id),
+    updated_in    INTEGER REFERENCES runs(id),
+    removed_in    INTEGER REFERENCES runs(id)
+);
+CREATE INDEX IF NOT EXISTS idx_cards_character ON cards(character, star);
+CREATE INDEX IF NOT EXISTS idx_cards_star ON cards(star);
+CREATE INDEX IF NOT EXISTS idx_cards_pool ON cards(pool, character);
+CREATE INDEX IF NOT EXISTS idx_cards_release ON cards(release_date);
+CREATE INDEX IF NOT EXISTS idx_cards_video ON cards(video_bvid);
+CREATE TABLE IF NOT EXISTS card_history (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id    INTEGER NOT NULL REFERENCES runs(id),
+    name      TEXT NOT NULL,
+    action    TEXT NOT NULL,
+    field     TEXT,
+    old_value TEXT,
+    new_value TEXT,
+    revid     INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_history_name ON card_history(name, run_id);
+CREATE TABLE IF NOT EXISTS bilibili_pages (
+    bvid TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    part TEXT NOT NULL,
+    PRIMARY KEY (bvid, page)
+);
+"""
+
+
+def record_hash(card: dict) -> str:
+    raw = json.dumps(card, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def release_date(value) -> str | None:
+    parsed = parse_release_time(value)
+    return "%04d-%02d-%02d" % parsed if parsed else None
+
+
+def _encode(value) -> str | None:
+    return None if value is None else json.dumps(value, ensure_ascii=False)
+
+
+class CardCatalog:
+    """SQLite 卡片目录；写操作都在单个事务内完成，中途失败不会留下半次运行的数据。"""
+
+    def __init__(self, path: str = CATALOG_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            self.conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),)
+            )
+            self._migrate()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> CardCatalog:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _migrate(self) -> None:
+        """旧版本目录就地升级：v1 → v2 把误名为 pool_type 的子分类列（limited / permanent）改名。"""
+        version = int(self.get_meta("schema_version") or SCHEMA_VERSION)
+        if version < 2:
+            columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(cards)")}
+            if "pool_type" in columns:
+                self.conn.execute("ALTER TABLE cards RENAME COLUMN pool_type TO pool_subcategory")
+        if version < SCHEMA_VERSION:
+            self._set_meta("schema_version", str(SCHEMA_VERSION))
+
+    # ---------- meta ----------
+    def get_meta(self, key: str) -> str | None:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # ---------- 写入 ----------
+    def upsert_cards(
+        self,
+        cards: list[dict],
+        pools: list[tuple[str, tuple[str, str | None]]] | None = None,
+        revisions: dict[str, int] | None = None,
+        mode: str = "crawl",
+    ) -> dict:
+        """
+        以 cards 为本次的完整卡片列表写入目录：新增 / 修改的卡片记入历史，
+        不在列表中的卡片标记为已移除。pools 与 cards 等长（assign_card_pool 的结果）。
+        没有卡名或卡名重复的卡片无法入库，逐条打印并计入 skipped。
+        返回 {"run_id", "added", "changed", "removed", "unchanged", "skipped"}。
+        """
+        if pools is not None and len(pools) != len(cards):
+            raise ValueError("卡池映射与卡片数量不一致")
+        revisions = revisions or {}
+        stats = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0, "skipped": 0}
+        with self.conn:
+            run_id = self.conn.execute(
+                "INSERT INTO runs (mode, started_at, cards_total) VALUES (?, ?, ?)",
+                (mode, time.strftime("%Y-%m-%dT%H:%M:%S"), len(cards)),
+            ).lastrowid
+            existing = {
+                row["name"]: row
+                for row in self.conn.execute("SELECT name, hash, data, removed_in FROM cards")
+            }
+            seen = set()
+            for position, card in enumerate(cards):
+                name = card.get("name")
+                if not name or name in seen:
+                    stats["skipped"] += 1
+                    reason = "卡名重复" if name else "缺少卡名"
+                    print(
+                        f"⚠️ 卡片目录跳过第 {position + 1} 张卡片（{reason}）：{card.get('character') or '?'} {name or ''}",
+                        flush=True,
+                    )
+                    continue
+                seen.add(name)
+                pool_name, (category, subcategory) = pools[position] if pools is not None else ("", ("", None))
+                digest = record_hash(card)
+                revid = revisions.get(name)
+                old = existing.get(name)
+                if old is None or old["removed_in"] is not None:
+                    # 首次出现或移除后重新出现
+                    stats["added"] += 1
+                    self._history(run_id, name, "added", None, None, card, revid)
+                elif old["hash"] != digest:
+                    stats["changed"] += 1
+                    self._field_history(run_id, name, json.loads(old["data"]), card, revid)
+                else:
+                    stats["unchanged"] += 1
+                changed = old is None or old["hash"] != digest or old["removed_in"] is not None
+                self.conn.execute(
+                    """
+                    INSERT INTO cards (
+                        name, position, character, star, color, talent, pool, pool_category, pool_subcategory,
+                        release_date, video_bvid, video_page, revid, hash, data, first_seen, updated_in, removed_in
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)
+                    ON CONFLICT(name) DO UPDATE SET
+                        position = excluded.position, character = excluded.character, star = excluded.star,
+                        color = excluded.color, talent = excluded.talent, pool = excluded.pool,
+                        pool_category = excluded.pool_category, pool_subcategory = excluded.pool_subcategory,
+                        release_date = excluded.release_date, video_bvid = excluded.video_bvid,
+                        video_page = excluded.video_page, revid = COALESCE(excluded.revid, cards.revid),
+                        hash = excluded.hash, data = excluded.data,
+                        updated_in = CASE WHEN ? THEN excluded.updated_in ELSE cards.updated_in END,
+                        removed_in = NULL
+                    """,
+                    (
+                        name, position, card.get("character") or None, star_key(card.get("star")) or None,
+                        card.get("card_color_tag") or None, card.get("talent") or None,
+                        pool_name or None, category or None, subcategory,
+                        release_date(card.get("time")), card.get("video_bvid") or None, card.get("video_page"),
+                        revid, digest, json.dumps(card, ensure_ascii=False), run_id, run_id, changed,
+                    ),
+                )
+            for name, row in existing.items():
+                if name in seen or row["removed_in"] is not None:
+                    continue
+                stats["removed"] += 1
+                self._history(run_id, name, "removed", None, json.loads(row["data"]), None, None)
+                self.conn.execute(
+                    "UPDATE cards SET removed_in = ?, position = NULL WHERE name = ?", (run_id, name)
+                )
+            self.conn.execute(
+                "UPDATE runs SET cards_added = ?, cards_changed = ?, cards_removed = ? WHERE id = ?",
+                (stats["added"], stats["changed"], stats["removed"], run_id),
+            )
+        stats["run_id"] = run_id
+        return stats
+
+    def _history(self, run_id: int, name: str, action: str, field: str | None, old, new, revid) -> None:
+        self.conn.execute(
+            "INSERT INTO card_history (run_id, name, action, field, old_value, new_value, revid)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (run_id, name, action, field, _encode(old), _encode(new), revid),
+        )
+
+    def _field_history(self, run_id: int, name: str, old: dict, new: dict, revid) -> None:
+        for field in list(old) + [key for key in new if key not in old]:
+            if old.get(field) != new.get(field):
+                self._history(run_id, name, "changed", field, old.get(field), new.get(field), revid)
+
+    def sync_from_json(
+        self,
+        cards_path: str,
+        revisions_path: str | None = None,
+        map_pools: Callable[[list[dict]], list[tuple[str, tuple[str, str | None]]]] | None = None,
+    ) -> dict | None:
+        """
+        目录为空、或 cards.json 与上次导出时不同（缓存丢失 / 手动修改）时按 cards.json 导入。
+        map_pools 为卡池映射函数（update_cards.map_cards_to_pools）。
+        返回导入统计；无需导入时返回 None。
+        """
+        if not os.path.exists(cards_path):
+            return None
+        with open(cards_path, "rb") as f:
+            raw = f.read()
+        digest = content_hash(raw)
+        if digest == self.get_meta("cards_json_hash"):
+            return None
+        revisions = {}
+        if revisions_path and os.path.exists(revisions_path):
+            with open(revisions_path, "r", encoding="utf-8") as f:
+                revisions = json.load(f)
+        cards = json.loads(raw)
+        stats = self.upsert_cards(cards, map_pools(cards) if map_pools else None, revisions, mode="import")
+        with self.conn:
+            self._set_meta("cards_json_hash", digest)
+        return stats
+
+    def mark_exported(self, cards_raw: bytes) -> None:
+        """记录导出的 cards.json 内容哈希，下次 sync_from_json 据此判断是否需要重新导入。"""
+        with self.conn:
+            self._set_meta("cards_json_hash", content_hash(cards_raw))
+
+    def sync_bilibili_pages(self, pages: dict[str, list[dict] | None]) -> None:
+        with self.conn:
+            for bvid, items in pages.items():
+                if not items:
+                    continue
+                self.conn.execute("DELETE FROM bilibili_pages WHERE bvid = ?", (bvid,))
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO bilibili_pages (bvid, page, part) VALUES (?, ?, ?)",
+                    [(bvid, int(item.get("page") or 1), item.get("part") or "") for item in items],
+                )
+
+    # ---------- 读取 / 导出 ----------
+    def export_cards(self) -> list[dict]:
+        """当前卡片（不含已移除），按最近一次写入时的顺序，字段顺序与写入时一致。"""
+        rows = self.conn.execute("SELECT data FROM cards WHERE removed_in IS NULL ORDER BY position")
+        return [json.loads(row["data"]) for row in rows]
+
+    def cards_by_name(self) -> dict[str, dict]:
+        return {card["name"]: card for card in self.export_cards()}
+
+    def revisions(self) -> dict[str, int]:
+        rows = self.conn.execute(
+            "SELECT name, revid FROM cards WHERE removed_in IS NULL AND revid IS NOT NULL ORDER BY name"
+        )
+        return {row["name"]: row["revid"] for row in rows}
+
+    def query(
+        self,
+        character: str | None = None,
+        star: str | None = None,
+        pool: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+    ) -> list[dict]:
+        """按索引列筛选当前卡片；since / until 为 YYYY-MM-DD（含端点）。"""
+        clauses = ["removed_in IS NULL"]
+        params: list = []
+        for column, value in (("character", character), ("star", star), ("pool", pool)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since:
+            clauses.append("release_date >= ?")
+            params.append(since)
+        if until:
+            clauses.append("release_date <= ?")
+            params.append(until)
+        sql = f"SELECT data FROM cards WHERE {' AND '.join(clauses)} ORDER BY release_date, position"
+        return [json.loads(row["data"]) for row in self.conn.execute(sql, params)]
+
+    def history(self, name: str) -> list[dict]:
+        rows = self.conn.execute(
+            """
+            SELECT h.run_id, r.started_at, r.mode, h.action, h.field, h.old_value, h.new_value, h.revid
+            FROM card_history h JOIN runs r ON r.id = h.run_id
+            WHERE h.name = ? ORDER BY h.id
+            """,
+            (name,),
+        )
+        return [
+            {
+                "run": row["run_id"],
+                "at": row["started_at"],
+                "mode": row["mode"],
+                "action": row["action"],
+                "field": row["field"],
+                "old": json.loads(row["old_value"]) if row["old_value"] is not None else None,
+                "new": json.loads(row["new_value"]) if row["new_value"] is not None else None,
+                "revid": row["revid"],
+            }
+            for row in rows
+        ]
+
+    def stats(self) -> dict:
+        one = lambda sql: self.conn.execute(sql).fetchone()[0]  # noqa: E731
+        return {
+            "cards": one("SELECT COUNT(*) FROM cards WHERE removed_in IS NULL"),
+            "removed": one("SELECT COUNT(*) FROM cards WHERE removed_in IS NOT NULL"),
+            "runs": one("SELECT COUNT(*) FROM runs"),
+            "history": one("SELECT COUNT(*) FROM card_history"),
+            "bilibiliVideos": one("SELECT COUNT(DISTINCT bvid) FROM bilibili_pages"),
+            "byStar": {
+                row[0] or "?": row[1]
+                for row in self.conn.execute(
+                    "SELECT star, COUNT(*) FROM cards WHERE removed_in IS NULL GROUP BY star ORDER BY star DESC"
+                )
+            },
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="卡片目录查询")
+    parser.add_argument("--db", default=CATALOG_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="卡片、运行与历史记录数量")
+    query = sub.add_parser("query", help="按角色 / 星级 / 卡池 / 上线时间筛选")
+    query.add_argument("--character")
+    query.add_argument("--star", help="星级数字，如 5")
+    query.add_argument("--pool")
+    query.add_argument("--since", help="YYYY-MM-DD")
+    query.add_argument("--until", help="YYYY-MM-DD")
+    history = sub.add_parser("history", help="单张卡片的字段变更历史")
+    history.add_argument("name")
+    args = parser.parse_args()
+
+    with CardCatalog(args.db) as catalog:
+        if args.command == "stats":
+            result = catalog.stats()
+        elif args.command == "query":
+            result = [
+                {key: card.get(key) for key in ("name", "character", "star", "time", "get")}
+                for card in catalog.query(args.character, args.star, args.pool, args.since, args.until)
+            ]
+        else:
+            result = catalog.history(args.name)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
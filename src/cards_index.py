@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+卡片检索索引
+----------------------------------------------------------------
+cards_index.json 与 cards.json 一一对应，所有列表中的数字都是卡片在 cards.json 中的下标：
+- pools：卡池名 → 角色 → 星级（"5" / "4" / "3"）→ 下标列表；只收录有 5★ 卡片的卡池，
+  与 poolCategories.json 中的卡池一一对应（只出现在 4★ / 3★ 卡片上的获取途径不单独成池）
+- characters / talents / colors / stars：按角色、天赋、星谱颜色、星级的倒排表
+- releaseOrder：按 time 字段（YYYY/M/D）从早到晚排序的下标，无法解析的排在最后
+- cardsHash：生成索引时 cards.json 的内容哈希，与 data_manifest.json 一致时索引可用
+抽卡与筛选时直接按键取下标列表，不必每次遍历全部卡片。
+"""
+
+import os
+import re
+
+from atomic_io import write_json_atomic
+from data_manifest import content_hash
+
+CARDS_INDEX_FILE = "cards_index.json"
+CARDS_INDEX_VERSION = 1
+TIME_RE = re.compile(r"(\d{4})\D+(\d{1,2})\D+(\d{1,2})")
+
+
+def parse_release_time(value) -> tuple[int, int, int] | None:
+    match = TIME_RE.search(value or "") if isinstance(value, str) else None
+    if not match:
+        return None
+    return tuple(int(part) for part in match.groups())
+
+
+def star_key(value) -> str:
+    match = re.match(r"\s*(\d+)", value or "") if isinstance(value, str) else None
+    return match.group(1) if match else ""
+
+
+def _posting(cards: list[dict], field: str) -> dict[str, list[int]]:
+    postings: dict[str, list[int]] = {}
+    for index, card in enumerate(cards):
+        value = (card.get(field) or "").strip()
+        if value:
+            postings.setdefault(value, []).append(index)
+    return postings
+
+
+def build_cards_index(cards: list[dict], pool_names: list[str]) -> dict:
+    """pool_names 与 cards 等长，为每张卡的卡池名（空字符串表示无卡池）。"""
+    if len(pool_names) != len(cards):
+        raise ValueError("卡池映射与卡片数量不一致")
+
+    # 与 update_pool_categories_from_cards 相同：只有含 5★ 卡片的卡池才写入 poolCategories.json
+    five_star_pools = {
+        pool_name for card, pool_name in zip(cards, pool_names) if pool_name and star_key(card.get("star")) == "5"
+    }
+    pools: dict[str, dict[str, dict[str, list[int]]]] = {}
+    stars: dict[str, list[int]] = {}
+    for index, (card, pool_name) in enumerate(zip(cards, pool_names)):
+        star = star_key(card.get("star"))
+        if star:
+            stars.setdefault(star, []).append(index)
+        character = (card.get("character") or "").strip()
+        if pool_name in five_star_pools and character and star:
+            pools.setdefault(pool_name, {}).setdefault(character, {}).setdefault(star, []).append(index)
+
+    unknown = (float("inf"),)
+    release_order = sorted(
+        range(len(cards)),
+        key=lambda i: (parse_release_time(cards[i].get("time")) or unknown, i),
+    )
+    return {
+        "version": CARDS_INDEX_VERSION,
+        "count": len(cards),
+        "pools": pools,
+        "characters": _posting(cards, "character"),
+        "talents": _posting(cards, "talent"),
+        "colors": _posting(cards, "card_color_tag"),
+        "stars": dict(sorted(stars.items(), reverse=True)),
+        "releaseOrder": release_order,
+    }
+
+
+def write_cards_index(assets_dir: str, cards: list[dict], pool_names: list[str], cards_raw: bytes | None = None) -> dict:
+    """
+    写入 assets_dir/cards_index.json 并返回索引。
+    cards_raw 为 cards.json 的原始字节，省略时从磁盘读取。
+    """
+    if cards_raw is None:
+        with open(os.path.join(assets_dir, "cards.json"), "rb") as f:
+            cards_raw = f.read()
+    index = build_cards_index(cards, pool_names)
+    index["cardsHash"] = content_hash(cards_raw)
+    write_json_atomic(os.path.join(assets_dir, CARDS_INDEX_FILE), index, separators=(",", ":"))
+    print(
+        f"🗂️ 已写入 {CARDS_INDEX_FILE}：{len(index['pools'])} 个卡池，"
+        f"{len(index['characters'])} 个角色",
+        flush=True,
+    )
+    return index
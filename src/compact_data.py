@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+数据文件的紧凑编码与预压缩
+----------------------------------------------------------------
+cards.compact.json：
+- 按列顺序把每张卡片编码为数组（fields 给出列名）
+- 枚举类字段（角色、位置、星谱、星级、天赋、获取途径、上线时间等）存为 dicts 中的下标
+- WIKI 缩略图 URL 拆成 [存储路径, 宽度] 或 [存储路径, 宽度, 文件名]，
+  文件名默认为 quote("思念长图-{name}.png")；大图与小图只差宽度时只存宽度
+- 无法按规则编码的值原样保存，decode_cards 可以逐字段还原出 cards.json
+.gz：cards.json、poolCategories.json、songs_list.json、cards_index.json 与紧凑格式的 gzip 预压缩版本
+（固定 mtime，内容不变时字节不变）
+
+用法：python src/compact_data.py      # 重新生成并打印体积对比
+"""
+
+import gzip
+import json
+import os
+import re
+from urllib.parse import quote
+
+from atomic_io import write_bytes_atomic
+
+ASSETS_DIR = "src/assets"
+CARDS_FILE = "cards.json"
+COMPACT_CARDS_FILE = "cards.compact.json"
+# 需要生成 .gz 预压缩版本的数据文件
+GZIP_FILES = ("cards.json", "poolCategories.json", "songs_list.json", COMPACT_CARDS_FILE, "cards_index.json")
+COMPACT_FORMAT = "deepspace-cards-compact"
+COMPACT_VERSION = 1
+
+ENUM_FIELDS = (
+    "character", "card_type_tag", "card_color_tag", "star", "talent",
+    "get", "permanent", "time", "video_bvid",
+)
+THUMB_PREFIX = "https://patchwiki.biligame.com/images/lysk/thumb/"
+THUMB_RE = re.compile(r"^" + re.escape(THUMB_PREFIX) + r"(?P<path>.+?)/(?P<width>\d+)px-(?P<file>[^/]+)$")
+# 含这些字符的卡名不推导文件名（各语言 URL 编码函数对它们的处理不一致）
+UNSAFE_NAME_CHARS = set("!'()*/~")
+
+
+# -----------------------------
+# 编码
+# -----------------------------
+def _default_filename(name: str) -> str | None:
+    if not name or UNSAFE_NAME_CHARS & set(name):
+        return None
+    return quote(f"思念长图-{name}.png", safe="")
+
+
+def _encode_thumb(url, name: str):
+    """小图 URL → [路径, 宽度] / [路径, 宽度, 文件名]；不符合缩略图规则时原样返回。"""
+    if not isinstance(url, str):
+        return url
+    match = THUMB_RE.match(url)
+    if not match:
+        return url
+    path, width, filename = match.group("path"), int(match.group("width")), match.group("file")
+    if filename == _default_filename(name):
+        return [path, width]
+    return [path, width, filename]
+
+
+def _decode_thumb(value, name: str):
+    if not isinstance(value, list):
+        return value
+    path, width = value[0], value[1]
+    filename = value[2] if len(value) > 2 else _default_filename(name)
+    return f"{THUMB_PREFIX}{path}/{width}px-{filename}"
+
+
+def _encode_image(url, small_url, name: str):
+    """大图与小图只差宽度时编码为宽度（int），否则与小图同样编码。"""
+    if isinstance(url, str) and isinstance(small_url, str):
+        big, small = THUMB_RE.match(url), THUMB_RE.match(small_url)
+        if big and small and big.group("path") == small.group("path") and big.group("file") == small.group("file"):
+            return int(big.group("width"))
+    return _encode_thumb(url, name)
+
+
+def _decode_image(value, small_url, name: str):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return re.sub(r"/\d+px-(?=[^/]+$)", f"/{value}px-", small_url, count=1)
+    return _decode_thumb(value, name)
+
+
+def encode_cards(cards: list[dict]) -> dict:
+    fields = list(cards[0].keys()) if cards else []
+    dicts: dict[str, list] = {field: [] for field in ENUM_FIELDS if field in fields}
+    lookup: dict[str, dict] = {field: {} for field in dicts}
+    rows = []
+    extra = {}
+
+    for index, card in enumerate(cards):
+        if list(card.keys()) != fields:
+            # 字段集合与首张卡不同的记录原样保存
+            extra[str(index)] = card
+            rows.append(None)
+            continue
+        name = card.get("name") or ""
+        row = []
+        for field in fields:
+            value = card[field]
+            if field in dicts:
+                key = json.dumps(value, ensure_ascii=False)
+                if key not in lookup[field]:
+                    lookup[field][key] = len(dicts[field])
+                    dicts[field].append(value)
+                row.append(lookup[field][key])
+            elif field == "image_small":
+                row.append(_encode_thumb(value, name))
+            elif field == "image":
+                row.append(_encode_image(value, card.get("image_small"), name))
+            else:
+                row.append(value)
+        rows.append(row)
+
+    data = {
+        "format": COMPACT_FORMAT,
+        "version": COMPACT_VERSION,
+        "fields": fields,
+        "dicts": dicts,
+        "thumbPrefix": THUMB_PREFIX,
+        "rows": rows,
+    }
+    if extra:
+        data["extra"] = extra
+    return data
+
+
+def decode_cards(data: dict) -> list[dict]:
+    if data.get("format") != COMPACT_FORMAT or data.get("version") != COMPACT_VERSION:
+        raise ValueError("不支持的紧凑格式")
+    fields, dicts, extra = data["fields"], data["dicts"], data.get("extra", {})
+    cards = []
+    for index, row in enumerate(data["rows"]):
+        if row is None:
+            cards.append(extra[str(index)])
+            continue
+        card = {}
+        for field, value in zip(fields, row):
+            card[field] = dicts[field][value] if field in dicts else value
+        name = card.get("name") or ""
+        if "image_small" in card:
+            card["image_small"] = _decode_thumb(card["image_small"], name)
+        if "image" in card:
+            card["image"] = _decode_image(card["image"], card.get("image_small"), name)
+        cards.append(card)
+    return cards
+
+
+def dumps_minified(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# -----------------------------
+# 输出
+# -----------------------------
+def write_data_variants(assets_dir: str = ASSETS_DIR, cards: list[dict] | None = None) -> list[dict]:
+    """
+    生成 cards.compact.json 与各数据文件的 .gz，返回体积对比。
+    cards 为空时从 assets_dir/cards.json 读取。
+    """
+    if cards is None:
+        with open(os.path.join(assets_dir, CARDS_FILE), "r", encoding="utf-8") as f:
+            cards = json.load(f)
+    compact = encode_cards(cards)
+    if decode_cards(compact) != cards:
+        raise ValueError("紧凑格式无法还原 cards.json，放弃写入")
+    write_bytes_atomic(os.path.join(assets_dir, COMPACT_CARDS_FILE), dumps_minified(compact))
+
+    report = []
+    for name in GZIP_FILES:
+        path = os.path.join(assets_dir, name)
+        if os.path.exists(path):
+            report.append(write_gzip_variant(path))
+    return report
+
+
+def write_gzip_variant(path: str) -> dict:
+    """写入 path + ".gz"，返回 {"file", "bytes", "gzip_bytes"}。"""
+    with open(path, "rb") as f:
+        raw = f.read()
+    packed = gzip.compress(raw, compresslevel=9, mtime=0)
+    write_bytes_atomic(path + ".gz", packed)
+    return {"file": os.path.basename(path), "bytes": len(raw), "gzip_bytes": len(packed)}
+
+
+def print_size_report(report: list[dict]) -> None:
+    by_name = {item["file"]: item for item in report}
+    base = by_name.get(CARDS_FILE)
+    print("📦 数据文件体积：", flush=True)
+    for item in report:
+        line = f"   · {item['file']}: {item['bytes'] / 1024:.1f} KB，gzip {item['gzip_bytes'] / 1024:.1f} KB"
+        if base and item["file"] == COMPACT_CARDS_FILE:
+            line += (
+                f"（原始 {item['bytes'] / base['bytes']:.0%}，"
+                f"gzip 后为 cards.json.gz 的 {item['gzip_bytes'] / base['gzip_bytes']:.0%}）"
+            )
+        print(line, flush=True)
+
+
+if __name__ == "__main__":
+    print_size_report(write_data_variants())
@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+并发抓取引擎
+----------------------------------------------------------------
+- 每个 host 一个独立的自适应请求间隔（AIMD），不同站点之间互不等待
+- 线程池控制全局并发数，同一 host 的礼貌间隔由 AdaptiveThrottle 保证
+- 每个 host 共享一份重试预算，并带熔断：连续失败过多时暂停该 host，其余请求直接失败
+"""
+
+import email.utils
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, TypeVar
+from urllib.parse import urlparse
+
+from atomic_io import write_json_atomic
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# 所有主动等待（限速间隔、退避）的缩放系数；对本地替身服务器做基准测试时设为 0
+THROTTLE_SCALE = float(os.environ.get("DEEPSPACE_THROTTLE_SCALE", "1"))
+
+
+def scaled(seconds: float) -> float:
+    return seconds * THROTTLE_SCALE
+
+
+class _HostPace:
+    def __init__(self, interval: float, latency: float | None):
+        self.interval = interval   # 当前请求间隔（秒，未缩放）
+        self.latency = latency     # 成功响应延迟的指数滑动平均
+        self.next_at = 0.0         # 下一次允许发出请求的时间（monotonic）
+
+
+class AdaptiveThrottle:
+    """
+    按 host 自适应的请求速率（AIMD，速率 = 1 / 间隔）：
+    - 2xx / 3xx 且延迟正常：速率加 increase（次/秒，加性增），间隔不低于 floor
+    - 限流状态码（403 / 429 / 503 / 567）：速率除以 backoff（乘性减），间隔不高于 ceiling
+    - 连接失败、其它服务端错误或延迟超过平滑值的 latency_factor 倍：速率除以 slowdown
+    按速率做加性增时，偶发的限流会让速率稳定在一个平衡点附近，而不会越退越慢。
+    - Retry-After：defer() 把该 host 的下一个请求时机推迟到指定时间之后
+    limits 为 host -> (floor, ceiling, initial)，未登记的 host 使用 default。
+    各 host 的间隔与延迟保存在 state_path，下次运行从上次收敛的位置开始；
+    进程内第一次请求某个 host 时不等待。
+    """
+
+    THROTTLE_STATUS = frozenset({403, 429, 503, 567})
+
+    def __init__(
+        self,
+        limits: dict[str, tuple[float, float, float]],
+        default: tuple[float, float, float],
+        state_path: str | None = None,
+        increase: float = 0.02,
+        backoff: float = 2.0,
+        slowdown: float = 1.5,
+        latency_factor: float = 2.0,
+        slow_latency: float = 1.0,
+        jitter: float = 0.1,
+        scale: float = THROTTLE_SCALE,
+    ):
+        self.limits = dict(limits)
+        self.default = default
+        self.state_path = state_path
+        self.increase = increase
+        self.backoff = backoff
+        self.slowdown = slowdown
+        self.latency_factor = latency_factor
+        self.slow_latency = slow_latency  # 低于该值的延迟波动不视为变慢
+        self.jitter = jitter  # 每次间隔附加的随机比例，避免请求节奏过于规整
+        self.scale = scale
+        self._paces: dict[str, _HostPace] = {}
+        self._saved: dict[str, dict] = self._load_state()
+        self._lock = threading.Lock()
+
+    def _load_state(self) -> dict[str, dict]:
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def save_state(self) -> None:
+        if not self.state_path:
+            return
+        with self._lock:
+            state = dict(self._saved)
+            for host, pace in self._paces.items():
+                state[host] = {"interval": round(pace.interval, 3), "latency": pace.latency and round(pace.latency, 3)}
+        write_json_atomic(self.state_path, dict(sorted(state.items())), indent=2)
+
+    def _bounds(self, host: str) -> tuple[float, float]:
+        floor, ceiling, _ = self.limits.get(host, self.default)
+        return floor, ceiling
+
+    def _pace(self, host: str) -> _HostPace:
+        pace = self._paces.get(host)
+        if pace is None:
+            floor, ceiling, initial = self.limits.get(host, self.default)
+            saved = self._saved.get(host) or {}
+            try:
+                interval = float(saved.get("interval", initial))
+            except (TypeError, ValueError):
+                interval = initial
+            latency = saved.get("latency")
+            latency = float(latency) if isinstance(latency, (int, float)) else None
+            pace = self._paces[host] = _HostPace(min(max(interval, floor), ceiling), latency)
+        return pace
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return (urlparse(url).hostname or "") if "://" in url else url
+
+    def interval(self, url: str) -> float:
+        with self._lock:
+            return self._pace(self.host_of(url)).interval
+
+    def acquire(self, url: str) -> float:
+        """等到该 host 的下一个请求时机，返回实际等待的秒数。"""
+        if self.scale <= 0:
+            return 0.0
+        with self._lock:
+            pace = self._pace(self.host_of(url))
+            now = time.monotonic()
+            slot = max(now, pace.next_at)
+            gap = pace.interval * (1 + random.random() * self.jitter)
+            pace.next_at = slot + gap * self.scale
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return max(delay, 0.0)
+
+    def defer(self, url: str, seconds: float) -> None:
+        with self._lock:
+            pace = self._pace(self.host_of(url))
+            pace.next_at = max(pace.next_at, time.monotonic() + seconds * self.scale)
+
+    def observe(self, url: str, status: int | None, latency: float) -> float:
+        """根据一次响应（status 为 None 表示连接失败）调整间隔，返回调整后的间隔。"""
+        host = self.host_of(url)
+        with self._lock:
+            pace = self._pace(host)
+            floor, ceiling = self._bounds(host)
+            if status in self.THROTTLE_STATUS:
+                pace.interval *= self.backoff
+            elif status is None or status >= 500:
+                pace.interval *= self.slowdown
+            elif (
+                pace.latency is not None
+                and latency > self.slow_latency
+                and latency > pace.latency * self.latency_factor
+            ):
+                pace.interval *= self.slowdown
+                pace.latency = 0.8 * pace.latency + 0.2 * latency
+            else:
+                if status < 400:
+                    pace.interval = 1 / (1 / pace.interval + self.increase)
+                pace.latency = latency if pace.latency is None else 0.8 * pace.latency + 0.2 * latency
+            pace.interval = min(max(pace.interval, floor), ceiling)
+            return pace.interval
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            return {host: round(pace.interval, 3) for host, pace in sorted(self._paces.items())}
+
+
+class CircuitOpenError(RuntimeError):
+    """host 处于熔断状态时快速失败，不发出请求。"""
+
+    def __init__(self, host: str, remaining: float):
+        super().__init__(f"{host} 已熔断，{remaining:.0f}s 内不再请求")
+        self.host = host
+        self.remaining = remaining
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """解析 Retry-After 头：秒数或 HTTP 日期，返回需要等待的秒数。"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class _Circuit:
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.failures = 0          # 连续失败次数
+        self.open_until = 0.0      # 熔断截止时间（monotonic）
+        self.cooldown = 0.0        # 最近一次熔断的时长，半开探测失败后翻倍
+        self.probing = False       # 半开状态下是否已有探测请求在途
+        self.trips = 0
+        self.fast_fails = 0
+        self.retries = 0
+
+
+class HostCircuitBreaker:
+    """
+    按 host 管理本次运行的重试预算与熔断状态，所有重试层共用：
+    - allow_retry() 从 host 的预算中扣除一次重试，预算用完后只做首次请求、不再重试
+    - 连续 threshold 次失败后熔断 cooldown 秒；服务器给出更长的 Retry-After 时以其为准
+    - 熔断期间 before_request() 直接抛 CircuitOpenError；到期后放行一个探测请求（半开），
+      成功则恢复，失败则熔断时长翻倍（不超过 max_cooldown）
+    """
+
+    def __init__(
+        self,
+        budget: int,
+        threshold: int,
+        cooldown: float,
+        max_cooldown: float | None = None,
+    ):
+        self.budget = budget
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown if max_cooldown is not None else cooldown * 8
+        self._circuits: dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._circuits.clear()
+
+    def _circuit(self, url: str) -> tuple[str, _Circuit]:
+        host = (urlparse(url).hostname or "") if "://" in url else url
+        circuit = self._circuits.get(host)
+        if circuit is None:
+            circuit = self._circuits[host] = _Circuit(self.budget)
+        return host, circuit
+
+    def _open(self, circuit: _Circuit, seconds: float) -> None:
+        circuit.open_until = time.monotonic() + seconds
+        circuit.cooldown = seconds
+        circuit.trips += 1
+
+    def before_request(self, url: str) -> None:
+        """熔断中（或半开探测已在途）时抛 CircuitOpenError。"""
+        with self._lock:
+            host, circuit = self._circuit(url)
+            if not circuit.open_until:
+                return
+            remaining = circuit.open_until - time.monotonic()
+            if remaining <= 0 and not circuit.probing:
+                circuit.probing = True
+                return
+            circuit.fast_fails += 1
+            raise CircuitOpenError(host, max(remaining, 0.0))
+
+    def is_open(self, url: str) -> bool:
+        with self._lock:
+            _, circuit = self._circuit(url)
+            return bool(circuit.open_until) and (
+                circuit.probing or circuit.open_until > time.monotonic()
+            )
+
+    def record_success(self, url: str) -> None:
+        with self._lock:
+            _, circuit = self._circuit(url)
+            circuit.failures = 0
+            circuit.open_until = 0.0
+            circuit.cooldown = 0.0
+            circuit.probing = False
+
+    def record_failure(self, url: str, retry_after: float | None = None) -> bool:
+        """记录一次失败，返回是否因此熔断（含半开探测失败后重新熔断）。"""
+        with self._lock:
+            _, circuit = self._circuit(url)
+            circuit.failures += 1
+            if circuit.probing:
+                circuit.probing = False
+                seconds = min(max(circuit.cooldown * 2, self.base_cooldown), self.max_cooldown)
+                self._open(circuit, max(seconds, retry_after or 0.0))
+                return True
+            if circuit.open_until and circuit.open_until > time.monotonic():
+                return False
+            if circuit.failures >= self.threshold:
+                self._open(circuit, max(self.base_cooldown, retry_after or 0.0))
+                return True
+            return False
+
+    def allow_retry(self, url: str) -> bool:
+        """熔断中或预算用完时返回 False；否则扣除一次重试。"""
+        with self._lock:
+            _, circuit = self._circuit(url)
+            if circuit.open_until or circuit.budget <= 0:
+                return False
+            circuit.budget -= 1
+            circuit.retries += 1
+            return True
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                host: {
+                    "retries": c.retries,
+                    "budget_left": c.budget,
+                    "trips": c.trips,
+                    "fast_fails": c.fast_fails,
+                    "open": bool(c.open_until) and (c.probing or c.open_until > now),
+                }
+                for host, c in sorted(self._circuits.items())
+            }
+
+
+def run_concurrently(func: Callable[[T], R], items: Iterable[T], workers: int) -> list[R]:
+    """用线程池执行 func，结果保持输入顺序；workers <= 1 时退化为顺序执行。"""
+    items = list(items)
+    if workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, items))
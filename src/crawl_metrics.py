@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+爬虫运行指标
+----------------------------------------------------------------
+- 按 host 统计请求数、字节数、状态码、重试次数、缓存命中与延迟直方图
+- 按原因统计主动等待（限速、退避、字段重试）的时间
+- 按阶段统计耗时（并发执行时为各线程累计时间）
+- 运行结束输出 JSON 摘要，便于跨次运行对比
+"""
+
+import functools
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from atomic_io import write_json_atomic
+
+# 延迟直方图的桶上界（秒），最后一个桶收集所有更慢的请求
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0)
+
+
+def _host_of(url_or_host: str) -> str:
+    if "://" in url_or_host:
+        return urlparse(url_or_host).hostname or ""
+    return url_or_host
+
+
+class _HostStats:
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.revalidated = 0
+        self.errors = 0
+        self.status_codes: dict[str, int] = defaultdict(int)
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def observe_latency(self, seconds: float) -> None:
+        self.latency_total += seconds
+        self.latency_max = max(self.latency_max, seconds)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.histogram[i] += 1
+                return
+        self.histogram[-1] += 1
+
+    def to_dict(self) -> dict:
+        labels = [f"<={b}s" for b in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}s"]
+        return {
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "errors": self.errors,
+            "cache_hits": self.cache_hits,
+            "revalidated_304": self.revalidated,
+            "status_codes": dict(sorted(self.status_codes.items())),
+            "latency": {
+                "total_s": round(self.latency_total, 3),
+                "mean_s": round(self.latency_total / self.requests, 3) if self.requests else 0.0,
+                "max_s": round(self.latency_max, 3),
+                "histogram": dict(zip(labels, self.histogram)),
+            },
+        }
+
+
+class CrawlMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = time.time()
+            self._started = time.perf_counter()
+            self.hosts: dict[str, _HostStats] = defaultdict(_HostStats)
+            self.sleeps: dict[str, dict] = defaultdict(lambda: {"count": 0, "seconds": 0.0})
+            self.stages: dict[str, dict] = defaultdict(lambda: {"count": 0, "seconds": 0.0, "errors": 0})
+            self.counters: dict[str, int] = defaultdict(int)
+
+    # ---------- 请求 ----------
+    def record_request(self, url: str, status: int | None, nbytes: int, latency: float) -> None:
+        with self._lock:
+            stats = self.hosts[_host_of(url)]
+            stats.requests += 1
+            stats.bytes += nbytes
+            stats.status_codes[str(status) if status is not None else "error"] += 1
+            if status is None:
+                stats.errors += 1
+            elif status == 304:
+                stats.revalidated += 1
+            stats.observe_latency(latency)
+
+    def record_retry(self, url: str) -> None:
+        with self._lock:
+            self.hosts[_host_of(url)].retries += 1
+
+    def record_cache_hit(self, url: str) -> None:
+        with self._lock:
+            self.hosts[_host_of(url)].cache_hits += 1
+
+    # ---------- 等待 ----------
+    def record_sleep(self, reason: str, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        with self._lock:
+            item = self.sleeps[reason]
+            item["count"] += 1
+            item["seconds"] += seconds
+
+    def sleep(self, reason: str, seconds: float) -> None:
+        """time.sleep 并计入等待统计。"""
+        time.sleep(seconds)
+        self.record_sleep(reason, seconds)
+
+    # ---------- 阶段 ----------
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                item = self.stages[name]
+                item["count"] += 1
+                item["seconds"] += elapsed
+                if failed:
+                    item["errors"] += 1
+
+    def timed(self, name: str):
+        """装饰器版本的 stage()。"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def incr(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    # ---------- 输出 ----------
+    def summary(self) -> dict:
+        with self._lock:
+            hosts = {host: stats.to_dict() for host, stats in sorted(self.hosts.items())}
+            total_requests = sum(h["requests"] for h in hosts.values())
+            return {
+                "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+                "wall_time_s": round(time.perf_counter() - self._started, 3),
+                "totals": {
+                    "requests": total_requests,
+                    "bytes": sum(h["bytes"] for h in hosts.values()),
+                    "retries": sum(h["retries"] for h in hosts.values()),
+                    "cache_hits": sum(h["cache_hits"] for h in hosts.values()),
+                    "sleep_s": round(sum(s["seconds"] for s in self.sleeps.values()), 3),
+                },
+                "hosts": hosts,
+                "sleeps": {
+                    reason: {"count": s["count"], "seconds": round(s["seconds"], 3)}
+                    for reason, s in sorted(self.sleeps.items())
+                },
+                "stages": {
+                    name: {"count": s["count"], "seconds": round(s["seconds"], 3), "errors": s["errors"]}
+                    for name, s in sorted(self.stages.items())
+                },
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def write_summary(self, path: str) -> dict:
+        data = self.summary()
+        write_json_atomic(path, data, indent=2)
+        return data
+
+    def print_summary(self) -> None:
+        data = self.summary()
+        totals = data["totals"]
+        print(
+            f"📊 用时 {data['wall_time_s']:.1f}s，请求 {totals['requests']} 次"
+            f"（缓存命中 {totals['cache_hits']}，重试 {totals['retries']}），"
+            f"主动等待 {totals['sleep_s']:.1f}s，下载 {totals['bytes'] / 1024:.0f} KB",
+            flush=True,
+        )
+        for name, stage in data["stages"].items():
+            print(f"   · {name}: {stage['count']} 次，{stage['seconds']:.1f}s", flush=True)
+
+
+METRICS = CrawlMetrics()
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+数据文件语义差异
+----------------------------------------------------------------
+按主键比较爬虫输出的新旧版本（卡片按 name，歌曲按 id，专辑按 songs.json 的顶层 id）：
+- 每条记录按规范化 JSON（键排序）计算哈希，一次遍历得到新增 / 移除 / 修改，O(n)
+- 只调整字段顺序、缩进或记录顺序不算变化（记录顺序变化单独标记为 reordered）
+- 修改的记录列出具体变化的字段
+- 安全闸：新文件没有任何记录、或移除的记录超过旧记录数的 MAX_REMOVED_RATIO 时视为爬取异常，
+  不报告变化（changes_detected=false）并以非零状态退出，避免把残缺的数据提交上去
+输出按主键排序，同样的输入总是得到同样的结果：
+- --summary：机器可读的变更摘要（changed 为 true 时才需要提交 / 部署）
+- --html：邮件用的变更表格
+- --github-output：向 $GITHUB_OUTPUT 写入 changes_detected 与 diff_html，供工作流判断
+
+用法：
+  python src/data_diff.py src/assets/cards.json [--base HEAD] [--summary out.json] [--html out.html]
+  python src/data_diff.py src/assets/cards.json --old old_cards.json
+  python src/data_diff.py src/assets/cards.json --max-removed-ratio 0.5   # 确认需要大量删除时放宽
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import subprocess
+import sys
+
+from atomic_io import write_json_atomic
+
+# 文件名 → 记录主键；None 表示顶层为对象，按对象的键比较
+RECORD_KEYS = {
+    "cards.json": "name",
+    "songs_list.json": "id",
+    "songs.json": None,
+}
+# 移除的记录占旧记录数的比例超过该值时拦截本次更新
+MAX_REMOVED_RATIO = 0.10
+# HTML 中单个字段值的最大显示长度
+VALUE_PREVIEW = 160
+
+
+def record_digest(record) -> str:
+    raw = json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def index_records(data, key: str | None) -> dict[str, object]:
+    """主键 → 记录（保持原顺序）；主键缺失的记录用位置编号代替，重复的主键以最后一条为准。"""
+    if data is None:
+        return {}
+    if key is None:
+        if not isinstance(data, dict):
+            raise ValueError("顶层应为对象")
+        return {str(k): v for k, v in data.items()}
+    if not isinstance(data, list):
+        raise ValueError("顶层应为列表")
+    records = {}
+    for position, item in enumerate(data):
+        record_key = item.get(key) if isinstance(item, dict) else None
+        records[str(record_key) if record_key not in (None, "") else f"#{position}"] = item
+    return records
+
+
+def changed_fields(old, new) -> list[str]:
+    if not (isinstance(old, dict) and isinstance(new, dict)):
+        return []
+    fields = set(old) | set(new)
+    return sorted(f for f in fields if record_digest(old.get(f)) != record_digest(new.get(f)))
+
+
+def diff_records(old_data, new_data, key: str | None) -> dict:
+    """返回 {"added", "removed", "changed": {主键: [字段]}, "unchanged", "reordered"}，列表均按主键排序。"""
+    old = index_records(old_data, key)
+    new = index_records(new_data, key)
+    old_digests = {k: record_digest(v) for k, v in old.items()}
+    added, changed = [], {}
+    unchanged = 0
+    for record_key, record in new.items():
+        digest = old_digests.get(record_key)
+        if digest is None:
+            added.append(record_key)
+        elif digest != record_digest(record):
+            changed[record_key] = changed_fields(old[record_key], record)
+        else:
+            unchanged += 1
+    removed = [k for k in old if k not in new]
+    common_old = [k for k in old if k in new]
+    common_new = [k for k in new if k in old]
+    return {
+        "added": sorted(added),
+        "removed": sorted(removed),
+        "changed": dict(sorted(changed.items())),
+        "unchanged": unchanged,
+        "reordered": common_old != common_new,
+    }
+
+
+def read_git_version(path: str, ref: str) -> bytes | None:
+    """读取 ref 中该文件的内容；文件在 ref 中不存在时返回 None。"""
+    try:
+        repo_root = subprocess.run(
+            ["git", "rev-parse", "--show-toplevel"], capture_output=True, check=True, text=True
+        ).stdout.strip()
+        relative = os.path.relpath(os.path.abspath(path), repo_root).replace(os.sep, "/")
+        result = subprocess.run(["git", "show", f"{ref}:{relative}"], capture_output=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout
+
+
+def check_removals(old_count: int, new_count: int, removed: int, max_ratio: float = MAX_REMOVED_RATIO) -> str | None:
+    """新文件为空、或移除过多时返回拦截原因；旧版本不存在（首次生成）时不检查。"""
+    if old_count == 0:
+        return None
+    if new_count == 0:
+        return f"新文件没有任何记录（旧版本 {old_count} 条）"
+    if removed > old_count * max_ratio:
+        return f"移除 {removed} 条，超过旧记录数 {old_count} 的 {max_ratio:.0%}"
+    return None
+
+
+def diff_file(
+    path: str, old_raw: bytes | None, new_raw: bytes | None, max_removed_ratio: float = MAX_REMOVED_RATIO
+) -> dict:
+    name = os.path.basename(path)
+    if name not in RECORD_KEYS:
+        raise ValueError(f"不支持的数据文件：{name}（可选 {', '.join(RECORD_KEYS)}）")
+    key = RECORD_KEYS[name]
+    old_data = json.loads(old_raw) if old_raw else None
+    new_data = json.loads(new_raw) if new_raw else None
+    result = diff_records(old_data, new_data, key)
+    result["changedRecords"] = bool(result["added"] or result["removed"] or result["changed"])
+    result["_old"] = index_records(old_data, key)
+    result["_new"] = index_records(new_data, key)
+    result["blocked"] = check_removals(
+        len(result["_old"]), len(result["_new"]), len(result["removed"]), max_removed_ratio
+    )
+    return result
+
+
+def build_summary(results: dict[str, dict]) -> dict:
+    files = {
+        path: {k: v for k, v in result.items() if not k.startswith("_")}
+        for path, result in sorted(results.items())
+    }
+    blocked = {path: result["blocked"] for path, result in files.items() if result["blocked"]}
+    return {
+        # 任一文件被拦截时整次更新都不提交（卡片与卡池、歌曲与专辑需要保持一致）
+        "changed": not blocked and any(result["changedRecords"] for result in files.values()),
+        "blocked": blocked,
+        "files": files,
+        "totals": {
+            kind: sum(len(result[kind]) for result in files.values())
+            for kind in ("added", "removed", "changed")
+        },
+    }
+
+
+def _preview(value) -> str:
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, sort_keys=True)
+    if len(text) > VALUE_PREVIEW:
+        text = text[:VALUE_PREVIEW] + "…"
+    return html.escape(text)
+
+
+def render_html(results: dict[str, dict]) -> str:
+    """每个文件一张表：新增（绿）、移除（红）、修改（逐字段的旧值 → 新值）。"""
+    added_style = 'style="background-color:#e6ffed;color:#22863a;"'
+    removed_style = 'style="background-color:#ffeef0;color:#b31d28;"'
+    parts = []
+    for path, result in sorted(results.items()):
+        if not result["changedRecords"]:
+            continue
+        old, new = result["_old"], result["_new"]
+        parts.append(
+            f"<h4>{html.escape(os.path.basename(path))}：新增 {len(result['added'])}，"
+            f"移除 {len(result['removed'])}，修改 {len(result['changed'])}</h4>"
+        )
+        parts.append('<table style="border-collapse:collapse;">')
+        for key in result["added"]:
+            parts.append(f"<tr {added_style}><td>+ {html.escape(key)}</td><td>{_preview(new[key])}</td></tr>")
+        for key in result["removed"]:
+            parts.append(f"<tr {removed_style}><td>- {html.escape(key)}</td><td>{_preview(old[key])}</td></tr>")
+        for key, fields in result["changed"].items():
+            for field in fields or [""]:
+                before = old[key].get(field) if field else old[key]
+                after = new[key].get(field) if field else new[key]
+                parts.append(
+                    f"<tr><td>~ {html.escape(key)}{'.' + html.escape(field) if field else ''}</td>"
+                    f"<td><span {removed_style}>{_preview(before)}</span> → "
+                    f"<span {added_style}>{_preview(after)}</span></td></tr>"
+                )
+        parts.append("</table>")
+    return "\n".join(parts)
+
+
+def write_github_output(path: str, summary: dict, diff_html: str) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(f"changes_detected={'true' if summary['changed'] else 'false'}\n")
+        f.write("diff_html<<DATA_DIFF_EOF\n")
+        f.write(diff_html + "\n")
+        f.write("DATA_DIFF_EOF\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按主键比较数据文件的新旧版本")
+    parser.add_argument("files", nargs="+", help=f"数据文件（{', '.join(RECORD_KEYS)}）")
+    parser.add_argument("--base", default="HEAD", help="旧版本所在的 git 提交（默认 HEAD）")
+    parser.add_argument(
+        "--old", action="append", help="直接指定旧版本文件（可重复，与 files 一一对应），不读取 git"
+    )
+    parser.add_argument("--summary", help="变更摘要 JSON 输出路径")
+    parser.add_argument("--html", help="HTML 变更表格输出路径")
+    parser.add_argument("--github-output", help="追加写入 changes_detected / diff_html 的文件（$GITHUB_OUTPUT）")
+    parser.add_argument(
+        "--max-removed-ratio",
+        type=float,
+        default=MAX_REMOVED_RATIO,
+        help=f"移除记录占旧记录数的比例上限，超过时拦截（默认 {MAX_REMOVED_RATIO}）",
+    )
+    args = parser.parse_args()
+    if args.old is not None and len(args.old) != len(args.files):
+        parser.error("--old 的数量必须与 files 相同")
+
+    results = {}
+    for i, path in enumerate(args.files):
+        if args.old is not None:
+            with open(args.old[i], "rb") as f:
+                old_raw = f.read()
+        else:
+            old_raw = read_git_version(path, args.base)
+        new_raw = None
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                new_raw = f.read()
+        results[path] = diff_file(path, old_raw, new_raw, args.max_removed_ratio)
+
+    summary = build_summary(results)
+    diff_html = render_html(results)
+    for path, result in summary["files"].items():
+        flag = "🔄" if result["changedRecords"] else "✔️"
+        note = "（仅顺序变化）" if result["reordered"] and not result["changedRecords"] else ""
+        print(
+            f"{flag} {path}：新增 {len(result['added'])}，移除 {len(result['removed'])}，"
+            f"修改 {len(result['changed'])}，未变 {result['unchanged']}{note}",
+            flush=True,
+        )
+    if args.summary:
+        write_json_atomic(args.summary, summary, ensure_ascii=False, indent=2)
+    if args.html:
+        with open(args.html, "w", encoding="utf-8") as f:
+            f.write(diff_html)
+    if args.github_output:
+        write_github_output(args.github_output, summary, diff_html)
+    totals = summary["totals"]
+    counts = f"新增 {totals['added']}，移除 {totals['removed']}，修改 {totals['changed']}"
+    if summary["blocked"]:
+        for path, reason in summary["blocked"].items():
+            print(f"❌ {path}：{reason}，疑似爬取异常", flush=True)
+        print(f"🛑 已拦截本次更新（{counts}），不提交", flush=True)
+        sys.exit(1)
+    print(f"{f'📝 记录有变化：{counts}' if summary['changed'] else '✅ 记录无变化'}", flush=True)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+数据版本清单与增量
+----------------------------------------------------------------
+data_manifest.json 记录每个数据文件的内容哈希，以及最近 DELTA_HISTORY 次更新的增量：
+
+    {"files": {"cards.json": {"hash", "bytes", "updatedAt",
+                              "deltas": [{"from", "to", "path", "bytes"}]}}}
+
+- 客户端缓存的哈希与 hash 相同：无需下载
+- 能在 deltas 中从缓存的哈希一路连到当前哈希：依次下载并应用增量
+- 否则下载完整文件
+增量文档（deltas/<文件名>/<from>-<to>.json）：
+- 列表文件按主键（卡片 name、歌曲 id）记录 removed / changed / added（含插入位置）
+- 对象文件（poolCategories.json）按顶层键记录 set / removed
+写入前会用 apply_delta 校验能否从旧数据还原出新数据，不能时本次不生成增量。
+"""
+
+import hashlib
+import json
+import os
+import time
+
+from atomic_io import write_json_atomic
+
+MANIFEST_FILE = "data_manifest.json"
+DELTA_DIR = "deltas"
+DELTA_HISTORY = 10
+# 数据文件 → 列表记录的主键（None 表示按顶层键比较的对象）
+DATA_FILES = {
+    "cards.json": "name",
+    "poolCategories.json": None,
+    "songs_list.json": "id",
+}
+
+
+def content_hash(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def snapshot_data_files(assets_dir: str) -> dict[str, bytes]:
+    """在覆盖写入前读取数据文件的原始字节，供 update_data_manifest 计算增量。"""
+    snapshot = {}
+    for name in DATA_FILES:
+        try:
+            with open(os.path.join(assets_dir, name), "rb") as f:
+                snapshot[name] = f.read()
+        except OSError:
+            continue
+    return snapshot
+
+
+# -----------------------------
+# 增量计算与应用
+# -----------------------------
+def _list_delta(old: list, new: list, key: str) -> dict | None:
+    old_keys = [item.get(key) for item in old]
+    new_keys = [item.get(key) for item in new]
+    if len(set(old_keys)) != len(old_keys) or len(set(new_keys)) != len(new_keys):
+        return None  # 主键不唯一，无法按键比较
+    old_by_key = dict(zip(old_keys, old))
+    new_key_set = set(new_keys)
+    return {
+        "key": key,
+        "removed": [k for k in old_keys if k not in new_key_set],
+        "changed": [item for k, item in zip(new_keys, new) if k in old_by_key and old_by_key[k] != item],
+        "added": [
+            {"index": index, "record": item}
+            for index, (k, item) in enumerate(zip(new_keys, new))
+            if k not in old_by_key
+        ],
+    }
+
+
+def _dict_delta(old: dict, new: dict) -> dict:
+    return {
+        "set": {k: v for k, v in new.items() if k not in old or old[k] != v},
+        "removed": [k for k in old if k not in new],
+    }
+
+
+def apply_delta(old, delta: dict):
+    """把增量应用到旧数据上，返回新数据（客户端需实现相同逻辑）。"""
+    if "key" not in delta:
+        result = {k: v for k, v in old.items() if k not in set(delta["removed"])}
+        result.update(delta["set"])
+        return result
+    key = delta["key"]
+    removed = set(delta["removed"])
+    changed = {item[key]: item for item in delta["changed"]}
+    result = [changed.get(item[key], item) for item in old if item[key] not in removed]
+    for added in delta["added"]:
+        result.insert(added["index"], added["record"])
+    return result
+
+
+def build_delta(name: str, old, new) -> dict | None:
+    key = DATA_FILES[name]
+    if key is None:
+        if not isinstance(old, dict) or not isinstance(new, dict):
+            return None
+        delta = _dict_delta(old, new)
+    else:
+        if not isinstance(old, list) or not isinstance(new, list):
+            return None
+        if not all(isinstance(item, dict) for item in old + new):
+            return None
+        delta = _list_delta(old, new, key)
+    if delta is None or apply_delta(old, delta) != new:
+        return None
+    return delta
+
+
+# -----------------------------
+# 清单
+# -----------------------------
+def load_manifest(assets_dir: str) -> dict:
+    try:
+        with open(os.path.join(assets_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict) and isinstance(data.get("files"), dict):
+            return data
+    except (OSError, ValueError):
+        pass
+    return {"files": {}}
+
+
+def _prune_deltas(assets_dir: str, name: str, deltas: list[dict]) -> None:
+    """删除清单中已不再引用的增量文件。"""
+    folder = os.path.join(assets_dir, DELTA_DIR, name)
+    if not os.path.isdir(folder):
+        return
+    keep = {os.path.basename(d["path"]) for d in deltas}
+    for filename in os.listdir(folder):
+        if filename.endswith(".json") and filename not in keep:
+            os.remove(os.path.join(folder, filename))
+
+
+def update_data_manifest(assets_dir: str, previous: dict[str, bytes] | None = None) -> dict:
+    """
+    重新计算各数据文件的哈希并更新清单。
+    previous 为 snapshot_data_files 的返回值：旧内容的哈希与清单记录一致时，生成一份增量；
+    清单缺失或旧内容对不上时只更新哈希，客户端会回退到完整下载。
+    """
+    previous = previous or {}
+    manifest = load_manifest(assets_dir)
+    files = manifest["files"]
+    now = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    for name in DATA_FILES:
+        path = os.path.join(assets_dir, name)
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except OSError:
+            continue
+        new_hash = content_hash(raw)
+        entry = files.get(name) or {}
+        if entry.get("hash") == new_hash:
+            continue
+
+        deltas = list(entry.get("deltas") or [])
+        old_raw = previous.get(name)
+        old_hash = entry.get("hash")
+        if old_raw is not None and old_hash and content_hash(old_raw) == old_hash:
+            delta = build_delta(name, json.loads(old_raw), json.loads(raw))
+            if delta is not None:
+                rel_path = f"{DELTA_DIR}/{name}/{old_hash}-{new_hash}.json"
+                document = {"file": name, "from": old_hash, "to": new_hash, **delta}
+                write_json_atomic(os.path.join(assets_dir, rel_path), document, separators=(",", ":"))
+                deltas.append({
+                    "from": old_hash,
+                    "to": new_hash,
+                    "path": rel_path,
+                    "bytes": os.path.getsize(os.path.join(assets_dir, rel_path)),
+                })
+        deltas = deltas[-DELTA_HISTORY:]
+        _prune_deltas(assets_dir, name, deltas)
+        files[name] = {"hash": new_hash, "bytes": len(raw), "updatedAt": now, "deltas": deltas}
+        print(f"🧾 {name}: {old_hash or '-'} → {new_hash}（保留 {len(deltas)} 份增量）", flush=True)
+
+    manifest["files"] = dict(sorted(files.items()))
+    write_json_atomic(os.path.join(assets_dir, MANIFEST_FILE), manifest, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    update_data_manifest("src/assets")
@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+抽卡概率精确计算（马尔可夫链）
+----------------------------------------------------------------
+把 gacha_rules 中的规则写成状态 (pity, fourStarCounter, 是否处于大保底) 上的马尔可夫链：
+- 一抽的转移按结果（四星 / 三星 / 歪的五星）拆成三组稀疏转移（目标状态 + 概率），
+  逐抽推进整条分布向量得到首次命中的精确分布
+- 期望值由暂态转移矩阵 Q 解线性方程 (I - Q) x = 1 得到，一次求出所有起始状态的期望抽数
+- 抽到目标五星后状态完全复位，N 个目标的抽数为首个目标分布与 N - 1 个复位后分布的卷积
+
+输出 src/assets/gacha_exact.json：
+- tables：按五星命中概率与开关去重后的精确结果表
+- poolTypes：poolCategories.json 中 single / mixed 卡池 → 开关组合 → 表编号
+- scenarios：gacha_rules.default_scenarios 的配置键 → 表编号
+前端按当前设置取出表即可得到精确答案，不必现场模拟。
+
+用法：python src/gacha_exact.py [--max-targets 6] [--cost-per-draw 1]
+"""
+
+import argparse
+import json
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from atomic_io import write_json_atomic
+from gacha_rules import (
+    FOUR_STAR_GUARANTEE,
+    HARD_PITY,
+    MAX_PITY,
+    FiveStarOdds,
+    Scenario,
+    default_scenarios,
+    five_star_odds,
+    rarity_probabilities,
+)
+
+CARDS_PATH = "src/assets/cards.json"
+POOL_CATEGORIES_PATH = "src/assets/poolCategories.json"
+OUTPUT_PATH = "src/assets/gacha_exact.json"
+DEFAULT_MAX_TARGETS = 6
+# 分布推进到剩余概率低于 EPSILON 或达到 MAX_DRAWS 抽为止
+EPSILON = 1e-12
+MAX_DRAWS = 100 * HARD_PITY
+PMF_LENGTH = 2 * HARD_PITY
+QUANTILES = (50, 90, 99)
+PRECISION = 6
+
+FOUR_STATES = FOUR_STAR_GUARANTEE + 1
+STATE_COUNT = (MAX_PITY + 1) * FOUR_STATES * 2
+
+
+def state_index(pity, four, failed):
+    return (np.asarray(failed, dtype=np.int64) * (MAX_PITY + 1) + pity) * FOUR_STATES + four
+
+
+@dataclass
+class DrawChain:
+    """单抽转移：每个状态的四星 / 三星 / 五星概率、五星命中目标的概率与各结果的下一状态。"""
+    odds: FiveStarOdds
+    include_three_star: bool
+
+    def __post_init__(self):
+        failed, pity, four = np.meshgrid(
+            np.arange(2), np.arange(MAX_PITY + 1), np.arange(FOUR_STATES), indexing="ij"
+        )
+        failed, pity, four = failed.ravel(), pity.ravel(), four.ravel()
+        p5, p4, p3 = rarity_probabilities(pity, four, self.include_three_star)
+        self.p5, self.p4, self.p3 = p5, p4, p3
+        # 不计大小保底时不会进入大保底状态，两层按同样的命中概率处理
+        forced = self.odds.forced_on_target if self.odds.soft_guarantee else self.odds.on_target
+        self.hit = np.where(failed == 1, forced, self.odds.on_target)
+        next_pity = np.minimum(pity + 1, MAX_PITY)
+        self.dest4 = state_index(next_pity, 0, failed)
+        self.dest3 = state_index(next_pity, np.minimum(four + 1, FOUR_STAR_GUARANTEE), failed)
+        # 歪了：开启大小保底时进入大保底，否则保持原状态（不计大保底时始终为 0）
+        self.dest_miss = state_index(0, 0, np.ones_like(failed) if self.odds.soft_guarantee else failed)
+
+    @property
+    def target_reachable(self) -> bool:
+        return self.odds.on_target > 0 or self.odds.forced_on_target > 0
+
+    def regenerates_on_target(self) -> bool:
+        """与 gacha_sim 相同：计大保底且可能命中目标时以目标五星为再生点，否则以任意五星为再生点。"""
+        return self.odds.soft_guarantee and self.target_reachable
+
+    # -----------------------------
+    # 分布
+    # -----------------------------
+    def _step(self, v: np.ndarray, absorb_target: bool) -> tuple[float, np.ndarray]:
+        five = v * self.p5
+        nxt = np.bincount(self.dest4, weights=v * self.p4, minlength=STATE_COUNT)
+        nxt += np.bincount(self.dest3, weights=v * self.p3, minlength=STATE_COUNT)
+        if absorb_target:
+            hit = five * self.hit
+            nxt += np.bincount(self.dest_miss, weights=five - hit, minlength=STATE_COUNT)
+            return float(hit.sum()), nxt
+        return float(five.sum()), nxt
+
+    def first_passage_pmf(self, start: int, absorb_target: bool, max_draws: int = MAX_DRAWS) -> tuple[np.ndarray, float]:
+        """从 start 状态起，首个目标五星（absorb_target）或首个五星在第 n 抽出现的概率；返回 (pmf, 剩余概率)。"""
+        v = np.zeros(STATE_COUNT)
+        v[start] = 1.0
+        pmf = []
+        for _ in range(max_draws):
+            absorbed, v = self._step(v, absorb_target)
+            pmf.append(absorbed)
+            if v.sum() < EPSILON:
+                break
+        return np.array(pmf), float(max(v.sum(), 0.0))
+
+    # -----------------------------
+    # 期望
+    # -----------------------------
+    def transient_matrix(self, absorb_target: bool) -> np.ndarray:
+        """暂态转移矩阵 Q：Q[i, j] 为一抽后从 i 转到 j 且未被吸收的概率。"""
+        q = np.zeros((STATE_COUNT, STATE_COUNT))
+        rows = np.arange(STATE_COUNT)
+        np.add.at(q, (rows, self.dest4), self.p4)
+        np.add.at(q, (rows, self.dest3), self.p3)
+        if absorb_target:
+            np.add.at(q, (rows, self.dest_miss), self.p5 * (1 - self.hit))
+        return q
+
+    def expected_visits(self, start: int, absorb_target: bool) -> np.ndarray | None:
+        """从 start 起被吸收前各状态的期望停留次数；无法被吸收时返回 None。"""
+        if absorb_target and not self.target_reachable:
+            return None
+        q = self.transient_matrix(absorb_target)
+        e = np.zeros(STATE_COUNT)
+        e[start] = 1.0
+        return np.linalg.solve((np.eye(STATE_COUNT) - q).T, e)
+
+    def expected_draws_from_states(self) -> np.ndarray | None:
+        """所有起始状态到下一个目标五星的期望抽数。"""
+        if not self.target_reachable:
+            return None
+        q = self.transient_matrix(True)
+        return np.linalg.solve(np.eye(STATE_COUNT) - q, np.ones(STATE_COUNT))
+
+
+# -----------------------------
+# 结果表
+# -----------------------------
+def _round_list(values, digits: int = PRECISION) -> list:
+    return [round(float(v), digits) for v in values]
+
+
+def _pmf_summary(pmf: np.ndarray, tail: float, mean: float | None) -> dict:
+    head = pmf[:PMF_LENGTH]
+    return {
+        "mean": round(mean, 4) if mean is not None else None,
+        "pmf": _round_list(head),
+        "tail": round(float(tail + pmf[PMF_LENGTH:].sum()), PRECISION),
+    }
+
+
+def _quantile(cdf: np.ndarray, level: float) -> int | None:
+    index = int(np.searchsorted(cdf, level / 100 - 1e-12))
+    return index + 1 if index < len(cdf) else None
+
+
+def build_table(odds: FiveStarOdds, include_three_star: bool, max_targets: int, cost_per_draw: float = 1.0) -> dict:
+    chain = DrawChain(odds, include_three_star)
+    reset = int(state_index(0, 0, 0))
+    failed_start = int(state_index(0, 0, 1))
+
+    five_pmf, five_tail = chain.first_passage_pmf(reset, absorb_target=False)
+    five_mean = float((np.arange(1, len(five_pmf) + 1) * five_pmf).sum())
+
+    # 长期比例：一个再生周期内各结果的期望次数 / 周期期望长度
+    regen_on_target = chain.regenerates_on_target()
+    visits = chain.expected_visits(reset, absorb_target=regen_on_target)
+    cycle = float(visits.sum())
+    fives = float(visits @ chain.p5)
+    targets = float(visits @ (chain.p5 * chain.hit))
+    per_draw = {
+        "fiveStar": fives / cycle,
+        "target": targets / cycle,
+        "offTarget": (fives - targets) / cycle,
+        "fourStar": float(visits @ chain.p4) / cycle,
+        "threeStar": float(visits @ chain.p3) / cycle,
+    }
+
+    table = {
+        "odds": {
+            "onTarget": round(odds.on_target, PRECISION),
+            "forcedOnTarget": round(odds.forced_on_target, PRECISION),
+            "softGuarantee": odds.soft_guarantee,
+            "poolSize": odds.pool_size,
+        },
+        "includeThreeStar": include_three_star,
+        "firstFiveStar": _pmf_summary(five_pmf, five_tail, five_mean),
+        "perDraw": {key: round(value, PRECISION) for key, value in per_draw.items()},
+        "averageDrawsPerFiveStar": round(cycle / fives, 4),
+        "averageDrawsPerTarget": round(cycle / targets, 4) if targets else None,
+        "offTargetRate": round((fives - targets) / fives, PRECISION),
+    }
+
+    expected = chain.expected_draws_from_states()
+    if expected is None:
+        table["firstTarget"] = None
+        table["targets"] = None
+        return table
+
+    target_pmf, target_tail = chain.first_passage_pmf(reset, absorb_target=True)
+    table["firstTarget"] = _pmf_summary(target_pmf, target_tail, float(expected[reset]))
+
+    # N 个目标：复位后每个目标的抽数独立同分布；初始处于大保底时第一个目标单独计算
+    starts = {"normal": reset}
+    if odds.soft_guarantee:
+        starts["failed"] = failed_start
+    targets_table = {"costPerDraw": cost_per_draw}
+    for label, start in starts.items():
+        first = target_pmf if start == reset else chain.first_passage_pmf(start, absorb_target=True)[0]
+        means, quantiles = [], {q: [] for q in QUANTILES}
+        dist = first
+        for n in range(1, max_targets + 1):
+            if n > 1:
+                dist = np.convolve(dist, target_pmf)[:n * MAX_DRAWS]
+            means.append(round(float(expected[start] + (n - 1) * expected[reset]), 4))
+            cdf = np.cumsum(dist)
+            for q in QUANTILES:
+                quantiles[q].append(_quantile(cdf, q))
+        targets_table[label] = {
+            "expectedDraws": means,
+            "expectedCost": [round(m * cost_per_draw, 4) for m in means],
+            "quantiles": {str(q): values for q, values in quantiles.items()},
+        }
+    table["targets"] = targets_table
+
+    # 任意状态到下一个目标五星的期望抽数：fromState[是否大保底][pity]
+    # （抽到三星时 fourStarCounter 只决定四星 / 三星、不影响五星概率；关闭三星时它始终为 0，
+    #   所以取 fourStarCounter = 0 的值）
+    grid = expected.reshape(2, MAX_PITY + 1, FOUR_STATES)[:, :, 0]
+    if not odds.soft_guarantee:
+        grid = grid[:1]
+    table["fromState"] = [_round_list(layer, 2) for layer in grid]
+    return table
+
+
+# -----------------------------
+# 汇总
+# -----------------------------
+FLAG_COMBINATIONS = [(three, soft) for three in (True, False) for soft in (True, False)]
+
+
+def flags_key(include_three_star: bool, use_soft_guarantee: bool) -> str:
+    return f"three={int(include_three_star)}|soft={int(use_soft_guarantee)}"
+
+
+def iter_pools(pool_categories: dict):
+    """遍历 poolCategories.json 中的所有卡池条目。"""
+    for category in pool_categories.values():
+        if not isinstance(category, dict):
+            continue
+        for entry in category.get("pools", []):
+            yield entry
+        for sub in (category.get("subcategories") or {}).values():
+            for entry in sub.get("pools", []):
+                yield entry
+
+
+def build_exact_tables(
+    cards: list[dict],
+    pool_categories: dict,
+    max_targets: int = DEFAULT_MAX_TARGETS,
+    cost_per_draw: float = 1.0,
+) -> dict:
+    tables: dict[str, dict] = {}
+    table_ids: dict[tuple, str] = {}
+
+    def table_for(scenario: Scenario) -> str:
+        odds = five_star_odds(cards, scenario)
+        signature = (odds.on_target, odds.forced_on_target, odds.soft_guarantee, scenario.include_three_star)
+        if signature not in table_ids:
+            table_ids[signature] = f"t{len(table_ids)}"
+            tables[table_ids[signature]] = build_table(odds, scenario.include_three_star, max_targets, cost_per_draw)
+        return table_ids[signature]
+
+    pool_types: dict[str, dict[str, dict[str, str]]] = {}
+    for entry in iter_pools(pool_categories):
+        name = entry.get("name") if isinstance(entry, dict) else entry
+        pool_type = (entry.get("poolType") if isinstance(entry, dict) else None) or "mixed"
+        if not name:
+            continue
+        pool_types.setdefault(pool_type, {})[name] = {
+            flags_key(three, soft): table_for(Scenario(selected_pools=(name,), include_three_star=three, use_soft_guarantee=soft))
+            for three, soft in FLAG_COMBINATIONS
+        }
+
+    scenarios = {scenario.key(): table_for(scenario) for scenario in default_scenarios(cards)}
+    return {
+        "method": "markov-chain",
+        "maxTargets": max_targets,
+        "tables": tables,
+        "poolTypes": pool_types,
+        "scenarios": scenarios,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="抽卡概率精确计算")
+    parser.add_argument("--max-targets", type=int, default=DEFAULT_MAX_TARGETS, help="计算 1..N 个目标五星的期望与分位数")
+    parser.add_argument("--cost-per-draw", type=float, default=1.0, help="每抽消耗的资源数量")
+    parser.add_argument("--cards", default=CARDS_PATH)
+    parser.add_argument("--pool-categories", default=POOL_CATEGORIES_PATH)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    with open(args.cards, "r", encoding="utf-8") as f:
+        cards = json.load(f)
+    with open(args.pool_categories, "r", encoding="utf-8") as f:
+        pool_categories = json.load(f)
+
+    start = time.perf_counter()
+    result = build_exact_tables(cards, pool_categories, args.max_targets, args.cost_per_draw)
+    write_json_atomic(args.output, result, separators=(",", ":"))
+    pools = sum(len(p) for p in result["poolTypes"].values())
+    print(
+        f"✅ 已写入 {args.output}：{len(result['tables'])} 张结果表，{pools} 个卡池，"
+        f"{len(result['scenarios'])} 个预设配置（{time.perf_counter() - start:.1f}s）",
+        flush=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
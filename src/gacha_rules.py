@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+抽卡规则（与 Home.jsx 的 getRandomCard / handleDraw 保持一致）
+----------------------------------------------------------------
+- 五星基础概率 1%，pity ≥ 60 后为 1 + (pity - 59) * 10（第 70 抽必出五星）
+- 四星概率 7%；fourStarCounter ≥ 9 时本抽至少四星（五星按当前五星概率判定，否则四星）
+- includeThreeStar 关闭时抽到三星重抽，相当于在五星 / 四星之间按概率重新归一
+- 抽到五星后 pity 与 fourStarCounter 清零；否则 pity + 1，四星清零 fourStarCounter、三星 + 1
+- 大小保底：有目标（指定角色或筛选了卡池）时，歪了（非目标角色或常驻卡）则下一次五星
+  只从目标限定卡中抽取
+- 只抽当前角色卡（onlySelectedRoleCard 且只指定了一个角色）：五星固定从该角色限定卡中抽，
+  不计大小保底
+
+卡池数据只影响“五星命中目标的概率”，由 five_star_odds 从 cards.json 计算。
+"""
+
+import re
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+FIVE_STAR_BASE_RATE = 1
+SOFT_PITY_START = 60
+SOFT_PITY_STEP = 10
+FOUR_STAR_RATE = 7
+FOUR_STAR_GUARANTEE = 9
+PERMANENT_FLAG = "常驻"
+# pity 的取值范围：五星概率达到 100% 时的 pity 为最大值
+MAX_PITY = SOFT_PITY_START - 1 + -(-(100 - FIVE_STAR_BASE_RATE) // SOFT_PITY_STEP)
+HARD_PITY = MAX_PITY + 1
+
+
+def five_star_rate(pity):
+    """当前 pity 下的五星概率（百分比），支持标量与 numpy 数组。"""
+    pity = np.asarray(pity)
+    rate = np.where(pity >= SOFT_PITY_START, 1 + (pity - (SOFT_PITY_START - 1)) * SOFT_PITY_STEP, FIVE_STAR_BASE_RATE)
+    return np.minimum(rate, 100)
+
+
+def rarity_probabilities(pity, four_star_counter, include_three_star: bool = True):
+    """
+    返回 (p5, p4, p3)，与 getRandomCard 中 roll ∈ [0, 100) 的判定等价；
+    include_three_star=False 时按重抽规则在五星 / 四星之间归一。
+    """
+    rate5 = five_star_rate(pity).astype(float)
+    guaranteed = np.asarray(four_star_counter) >= FOUR_STAR_GUARANTEE
+    p5 = rate5 / 100
+    p4 = np.where(guaranteed, 1 - p5, np.minimum(FOUR_STAR_RATE, 100 - rate5) / 100)
+    p3 = 1 - p5 - p4
+    if not include_three_star:
+        total = p5 + p4
+        p5, p4, p3 = p5 / total, p4 / total, np.zeros_like(p3)
+    return p5, p4, p3
+
+
+# -----------------------------
+# 抽卡配置
+# -----------------------------
+@dataclass(frozen=True)
+class Scenario:
+    """对应前端设置面板：指定角色、卡池筛选与各开关。"""
+    roles: tuple[str, ...] = ()
+    selected_pools: tuple[str, ...] | None = None  # None 表示未筛选卡池
+    include_three_star: bool = True
+    use_soft_guarantee: bool = True
+    only_selected_role: bool = False
+    soft_pity_failed: bool = False  # 初始是否处于大保底
+
+    def __post_init__(self):
+        # 与 Home.jsx 一致：空的卡池选择等同于不筛选，而不是什么卡池都不匹配
+        if not self.selected_pools:
+            object.__setattr__(self, "selected_pools", None)
+
+    @property
+    def has_role_restrictions(self) -> bool:
+        return bool(self.roles)
+
+    @property
+    def has_pool_restrictions(self) -> bool:
+        return self.selected_pools is not None
+
+    @property
+    def has_target(self) -> bool:
+        return self.has_role_restrictions or self.has_pool_restrictions
+
+    @property
+    def only_selected_active(self) -> bool:
+        return len(self.roles) == 1 and self.only_selected_role
+
+    def key(self) -> str:
+        parts = [
+            f"roles={','.join(self.roles) or '随机'}",
+            f"three={int(self.include_three_star)}",
+            f"soft={int(self.use_soft_guarantee)}",
+            f"only={int(self.only_selected_role)}",
+        ]
+        if self.selected_pools is not None:
+            parts.append(f"pools={','.join(self.selected_pools)}")
+        if self.soft_pity_failed:
+            parts.append("failed=1")
+        return "|".join(parts)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["roles"] = list(self.roles)
+        if self.selected_pools is not None:
+            data["selected_pools"] = list(self.selected_pools)
+        return data
+
+
+@dataclass(frozen=True)
+class FiveStarOdds:
+    on_target: float         # 普通情况下五星命中目标的概率
+    forced_on_target: float  # 大保底生效时五星命中目标的概率
+    soft_guarantee: bool     # 是否按歪 / 不歪切换大保底状态
+    pool_size: int
+
+
+def extract_pool_name(get_str: str) -> str:
+    """与 Home.jsx 的 extractPoolName 相同（前端按它筛选卡池）。"""
+    if not get_str:
+        return ""
+    match = re.search(r"[\[【]([^】\]]+)[\]】]", get_str)
+    if match:
+        return re.sub(r"^\[+", "", match.group(1).replace("「", "").replace("」", "")).strip()
+    match = re.search(r"「([^」]+)」", get_str)
+    if match:
+        return re.sub(r"^\[+", "", match.group(1)).strip()
+    return re.sub(r"^\[+", "", get_str).strip()
+
+
+def is_limited(card: dict) -> bool:
+    return (card.get("permanent") or "") != PERMANENT_FLAG
+
+
+def star_of(card: dict) -> int:
+    try:
+        return int(str(card.get("star") or "").strip()[:1])
+    except ValueError:
+        return 0
+
+
+def five_star_odds(cards: list[dict], scenario: Scenario) -> FiveStarOdds:
+    """按 getRandomCard 的筛选顺序得到五星候选池，统计命中目标的比例。"""
+    roles = set(scenario.roles)
+    pool = [card for card in cards if star_of(card) == 5]
+    if scenario.selected_pools:
+        allowed = set(scenario.selected_pools) | {PERMANENT_FLAG}
+        filtered = [card for card in pool if extract_pool_name(card.get("get")) in allowed]
+        pool = filtered or pool
+
+    def on_target(card: dict) -> bool:
+        if scenario.has_role_restrictions:
+            return card.get("character") in roles and is_limited(card)
+        if scenario.has_pool_restrictions:
+            return is_limited(card)
+        return True
+
+    def fraction(candidates: list[dict]) -> float:
+        return sum(on_target(card) for card in candidates) / len(candidates) if candidates else 0.0
+
+    def forced(candidates: list[dict]) -> list[dict]:
+        if scenario.has_role_restrictions:
+            subset = [card for card in candidates if card.get("character") in roles and is_limited(card)]
+        else:
+            subset = [card for card in candidates if is_limited(card)]
+        return subset or candidates
+
+    if scenario.only_selected_active:
+        pool = forced(pool)
+        rate = fraction(pool)
+        return FiveStarOdds(rate, rate, False, len(pool))
+    soft = scenario.use_soft_guarantee and scenario.has_target
+    return FiveStarOdds(fraction(pool), fraction(forced(pool)), soft, len(pool))
+
+
+def default_scenarios(cards: list[dict]) -> list[Scenario]:
+    """预计算的配置：随机 / 单个角色 × 三星开关 × 大小保底开关 × 只抽当前角色。"""
+    roles = sorted({card.get("character") for card in cards if card.get("character")})
+    scenarios = []
+    for include_three in (True, False):
+        for use_soft in (True, False):
+            scenarios.append(Scenario((), None, include_three, use_soft, False))
+            for role in roles:
+                for only_selected in (False, True):
+                    scenarios.append(Scenario((role,), None, include_three, use_soft, only_selected))
+    return scenarios
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+抽卡蒙特卡洛模拟（NumPy 向量化）
+----------------------------------------------------------------
+按 gacha_rules 中的规则，同时推进大量互相独立的抽卡序列：每一抽对所有序列一次性
+生成随机数、查表得到五星 / 四星阈值并更新 pity、fourStarCounter 与大保底状态。
+输出每个配置的分布表：
+- firstFiveStar / firstTarget：首个五星 / 首个目标五星所需抽数的分布
+- perDraw：每抽的五星、目标五星、歪、四星、三星期望数量
+- offTargetRate：五星中歪的比例
+  （这两项是长期比例：按完整的再生周期累计，见 simulate）
+- tenPull：前十抽中四星 / 三星数量的分布
+
+用法：python src/gacha_sim.py [--sequences 200000] [--cycles 8] [--seed 0]
+默认输出 src/assets/gacha_stats.json，供前端直接展示，不必在页面里逐抽模拟。
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from atomic_io import write_json_atomic
+from gacha_rules import (
+    FOUR_STAR_GUARANTEE,
+    HARD_PITY,
+    MAX_PITY,
+    FiveStarOdds,
+    Scenario,
+    default_scenarios,
+    five_star_odds,
+    rarity_probabilities,
+)
+
+CARDS_PATH = "src/assets/cards.json"
+OUTPUT_PATH = "src/assets/gacha_stats.json"
+DEFAULT_SEQUENCES = 200_000
+DEFAULT_CYCLES = 8
+BATCH_SIZE = 250_000
+TEN_PULL = 10
+# 首个目标五星最多追踪的抽数（不计大保底时可能需要很多个五星周期）
+MAX_FIRST_TARGET_DRAWS = 20 * HARD_PITY
+# 分布表输出的长度，更靠后的概率合并为 tail
+PMF_LENGTH = 2 * HARD_PITY
+PRECISION = 6
+
+
+def threshold_tables(include_three_star: bool) -> tuple[np.ndarray, np.ndarray]:
+    """按 pity * (FOUR_STAR_GUARANTEE + 1) + fourStarCounter 编号的五星、五星 + 四星累计阈值。"""
+    pity, four = np.meshgrid(np.arange(MAX_PITY + 1), np.arange(FOUR_STAR_GUARANTEE + 1), indexing="ij")
+    p5, p4, _ = rarity_probabilities(pity, four, include_three_star)
+    return p5.ravel(), (p5 + p4).ravel()
+
+
+def _regenerate_on_target(odds: FiveStarOdds) -> bool:
+    """计大保底且可能抽到目标时，以目标五星为再生点；否则任意五星都会让状态完全复位。"""
+    return odds.soft_guarantee and (odds.on_target > 0 or odds.forced_on_target > 0)
+
+
+def _horizon(odds: FiveStarOdds, cycles: int) -> int:
+    """抽数上限：大保底必中时一个目标周期最多两个五星周期；另外至少追踪到首个目标五星。"""
+    per_cycle = HARD_PITY * (2 if _regenerate_on_target(odds) else 1)
+    return max(cycles * per_cycle, MAX_FIRST_TARGET_DRAWS)
+
+
+def _simulate_batch(
+    odds: FiveStarOdds,
+    tables: tuple[np.ndarray, np.ndarray],
+    size: int,
+    cycles: int,
+    soft_pity_failed: bool,
+    rng: np.random.Generator,
+) -> dict:
+    five_table, four_table = tables
+    regenerate_on_target = _regenerate_on_target(odds)
+    horizon = _horizon(odds, cycles)
+    # 初始处于大保底时第一个周期不是完整的再生周期，不计入长期比例
+    skip = 1 if soft_pity_failed and odds.soft_guarantee else 0
+    pity = np.zeros(size, dtype=np.int64)
+    four = np.zeros(size, dtype=np.int64)
+    regenerations = np.zeros(size, dtype=np.int64)
+    failed = np.full(size, soft_pity_failed and odds.soft_guarantee)
+    first_five = np.zeros(size, dtype=np.int64)
+    first_target = np.zeros(size, dtype=np.int64)
+    ten_four = np.zeros(size, dtype=np.int64)
+    ten_three = np.zeros(size, dtype=np.int64)
+    counts = {"draws": 0, "five": 0, "target": 0, "four": 0, "three": 0}
+
+    for step in range(1, horizon + 1):
+        active = regenerations < cycles + skip
+        running = active | (first_target == 0)
+        if not running.any():
+            break
+        state = pity * (FOUR_STAR_GUARANTEE + 1) + four
+        roll = rng.random(size)
+        is_five = running & (roll < five_table[state])
+        is_four = running & ~is_five & (roll < four_table[state])
+        is_three = running & ~is_five & ~is_four
+
+        target_roll = rng.random(size)
+        chance = np.where(failed, odds.forced_on_target, odds.on_target)
+        is_target = is_five & (target_roll < chance)
+        if odds.soft_guarantee:
+            failed = np.where(is_five, ~is_target, failed)
+
+        first_five[(first_five == 0) & is_five] = step
+        first_target[(first_target == 0) & is_target] = step
+        if step <= TEN_PULL:
+            ten_four += is_four
+            ten_three += is_three
+
+        counted = active & (regenerations >= skip)
+        counts["draws"] += int(counted.sum())
+        counts["five"] += int((counted & is_five).sum())
+        counts["target"] += int((counted & is_target).sum())
+        counts["four"] += int((counted & is_four).sum())
+        counts["three"] += int((counted & is_three).sum())
+
+        pity = np.where(is_five, 0, np.minimum(pity + 1, MAX_PITY))
+        four = np.where(is_five | is_four, 0, np.minimum(four + 1, FOUR_STAR_GUARANTEE))
+        regenerations += is_target if regenerate_on_target else is_five
+
+    return {
+        "counts": counts,
+        "first_five": np.bincount(first_five, minlength=horizon + 1),
+        "first_target": np.bincount(first_target, minlength=horizon + 1),
+        "ten_four": np.bincount(ten_four, minlength=TEN_PULL + 1),
+        "ten_three": np.bincount(ten_three, minlength=TEN_PULL + 1),
+    }
+
+
+def _distribution(histogram: np.ndarray, sequences: int) -> dict:
+    """
+    histogram[0] 为始终未出现的序列数，其余为第 n 抽首次出现的次数。
+    pmf 只输出前 PMF_LENGTH 抽，tail 为更晚出现（含未出现）的概率；有未出现的序列时 mean 为 None。
+    """
+    hits = histogram[1:]
+    censored = int(histogram[0])
+    pmf = hits[:PMF_LENGTH] / sequences
+    last = int(np.flatnonzero(pmf)[-1]) + 1 if pmf.any() else 0
+    mean = None
+    if not censored:
+        mean = round(float((np.arange(1, len(hits) + 1) * hits).sum() / sequences), PRECISION - 2)
+    return {
+        "mean": mean,
+        "pmf": [round(float(p), PRECISION) for p in pmf[:last]],
+        "tail": round(float(1 - pmf.sum()), PRECISION),
+        "censored": round(censored / sequences, PRECISION),
+    }
+
+
+def simulate(
+    odds: FiveStarOdds,
+    include_three_star: bool = True,
+    soft_pity_failed: bool = False,
+    sequences: int = DEFAULT_SEQUENCES,
+    cycles: int = DEFAULT_CYCLES,
+    seed: int | None = 0,
+    batch_size: int = BATCH_SIZE,
+) -> dict:
+    """
+    模拟 sequences 条序列（分批推进以限制内存），返回统计表。
+    抽到目标五星后 pity、fourStarCounter 与大保底状态全部复位（不计大保底时任意五星即复位），
+    序列从复位状态起步，每条抽满 cycles 个这样的再生周期；长期比例为全部完整周期的合计之比，
+    不受起步状态影响，也不需要丢弃预热段。
+    """
+    if cycles < 1:
+        raise ValueError("cycles 必须为正数")
+    rng = np.random.default_rng(seed)
+    tables = threshold_tables(include_three_star)
+    horizon = _horizon(odds, cycles)
+    counts = {"draws": 0, "five": 0, "target": 0, "four": 0, "three": 0}
+    first_five = np.zeros(horizon + 1, dtype=np.int64)
+    first_target = np.zeros(horizon + 1, dtype=np.int64)
+    ten_four = np.zeros(TEN_PULL + 1, dtype=np.int64)
+    ten_three = np.zeros(TEN_PULL + 1, dtype=np.int64)
+
+    remaining = sequences
+    while remaining > 0:
+        size = min(batch_size, remaining)
+        batch = _simulate_batch(odds, tables, size, cycles, soft_pity_failed, rng)
+        for key, value in batch["counts"].items():
+            counts[key] += value
+        first_five += batch["first_five"]
+        first_target += batch["first_target"]
+        ten_four += batch["ten_four"]
+        ten_three += batch["ten_three"]
+        remaining -= size
+
+    total = counts["draws"]
+    off_target = counts["five"] - counts["target"]
+    return {
+        "sequences": sequences,
+        "cycles": cycles,
+        "totalDraws": total,
+        "firstFiveStar": _distribution(first_five, sequences),
+        "firstTarget": _distribution(first_target, sequences),
+        "perDraw": {
+            "fiveStar": round(counts["five"] / total, PRECISION),
+            "target": round(counts["target"] / total, PRECISION),
+            "offTarget": round(off_target / total, PRECISION),
+            "fourStar": round(counts["four"] / total, PRECISION),
+            "threeStar": round(counts["three"] / total, PRECISION),
+        },
+        "averageDrawsPerFiveStar": round(total / counts["five"], 2) if counts["five"] else None,
+        "averageDrawsPerTarget": round(total / counts["target"], 2) if counts["target"] else None,
+        "offTargetRate": round(off_target / counts["five"], PRECISION) if counts["five"] else None,
+        "tenPull": {
+            "fourStar": [round(float(p), PRECISION) for p in ten_four / sequences],
+            "threeStar": [round(float(p), PRECISION) for p in ten_three / sequences],
+        },
+    }
+
+
+def run_scenarios(
+    cards: list[dict],
+    scenarios: list[Scenario],
+    sequences: int = DEFAULT_SEQUENCES,
+    cycles: int = DEFAULT_CYCLES,
+    seed: int | None = 0,
+) -> dict:
+    results = {}
+    for scenario in scenarios:
+        odds = five_star_odds(cards, scenario)
+        start = time.perf_counter()
+        stats = simulate(
+            odds,
+            include_three_star=scenario.include_three_star,
+            soft_pity_failed=scenario.soft_pity_failed,
+            sequences=sequences,
+            cycles=cycles,
+            seed=seed,
+        )
+        results[scenario.key()] = {
+            "scenario": scenario.to_dict(),
+            "odds": {
+                "onTarget": round(odds.on_target, PRECISION),
+                "forcedOnTarget": round(odds.forced_on_target, PRECISION),
+                "softGuarantee": odds.soft_guarantee,
+                "poolSize": odds.pool_size,
+            },
+            **stats,
+        }
+        print(
+            f"🎲 {scenario.key()}：平均 {stats['averageDrawsPerFiveStar']} 抽出五星，"
+            f"{stats['averageDrawsPerTarget']} 抽出目标五星（{time.perf_counter() - start:.1f}s）",
+            flush=True,
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="抽卡蒙特卡洛模拟")
+    parser.add_argument("--sequences", type=int, default=DEFAULT_SEQUENCES, help="每个配置模拟的序列数")
+    parser.add_argument("--cycles", type=int, default=DEFAULT_CYCLES, help="每条序列模拟的再生周期数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子（固定种子时输出可复现）")
+    parser.add_argument("--cards", default=CARDS_PATH)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    with open(args.cards, "r", encoding="utf-8") as f:
+        cards = json.load(f)
+    results = run_scenarios(cards, default_scenarios(cards), args.sequences, args.cycles, args.seed)
+    write_json_atomic(args.output, {"method": "monte-carlo", "scenarios": results}, separators=(",", ":"))
+    print(f"✅ 已写入 {args.output}，共 {len(results)} 个配置", flush=True)
+
+
+if __name__ == "__main__":
+    main()
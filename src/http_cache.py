@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+爬虫共用的磁盘 HTTP 响应缓存
+----------------------------------------------------------------
+- 以完整 URL（含查询参数）为键，正文与元数据分文件存放
+- 记录 ETag / Last-Modified，过期后发送 If-None-Match / If-Modified-Since 条件请求
+- 按接口类别设置 TTL：TTL 内直接命中，不发请求也不做礼貌等待
+- 总大小超过上限时按最近访问时间淘汰
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_CACHE_DIR = os.environ.get("DEEPSPACE_HTTP_CACHE_DIR", ".cache/http")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MB
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# (类别, host, path 前缀, TTL 秒)；按顺序匹配，第一个命中的生效
+TTL_POLICY: list[tuple[str, str, str, int]] = [
+    # revid / wikitext 需要在每晚的增量判断中保持新鲜
+    ("wiki_api", "wiki.biligame.com", "/lysk/api.php", 1 * HOUR),
+    # 思念:筛选 是卡片列表的入口：手动补跑要能看到刚上线的卡片，每次都做条件请求
+    ("wiki_entry", "wiki.biligame.com", "/lysk/%E6%80%9D%E5%BF%B5:%E7%AD%9B%E9%80%89", 0),
+    ("wiki_page", "wiki.biligame.com", "/lysk/", 12 * HOUR),
+    # 视频分 P 列表发布后基本不变
+    ("bilibili_view", "api.bilibili.com", "/x/web-interface/view", 7 * DAY),
+    ("netease_album", "music.163.com", "/api/artist/albums/", 12 * HOUR),
+    ("netease_album", "music.163.com", "/api/album/", 12 * HOUR),
+    ("netease_song", "music.163.com", "/api/song/detail", 30 * DAY),
+]
+
+# 只保留条件请求和还原响应需要的头
+KEPT_HEADERS = ("content-type", "etag", "last-modified", "date")
+
+
+def classify_endpoint(url: str) -> tuple[str, int]:
+    """返回 (接口类别, TTL 秒)；未登记的接口 TTL 为 0，即每次都要重新验证。"""
+    parsed = urlparse(url)
+    for name, host, prefix, ttl in TTL_POLICY:
+        if parsed.hostname == host and parsed.path.startswith(prefix):
+            return name, ttl
+    return "default", 0
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    body_path: Path
+    meta_path: Path
+    headers: dict
+    encoding: str | None
+    stored_at: float
+    size: int
+
+    @property
+    def etag(self) -> str:
+        return self.headers.get("etag", "")
+
+    @property
+    def last_modified(self) -> str:
+        return self.headers.get("last-modified", "")
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        enabled: bool = True,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.enabled = enabled and bool(cache_dir)
+        self._lock = threading.Lock()
+        self._total_bytes: int | None = None
+
+    # ---------- 路径与读取 ----------
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        sub = self.cache_dir / digest[:2]
+        return sub / f"{digest}.body", sub / f"{digest}.json"
+
+    def lookup(self, url: str) -> CacheEntry | None:
+        if not self.enabled:
+            return None
+        body_path, meta_path = self._paths(url)
+        try:
+            with meta_path.open("r", encoding="utf-8") as fh:
+                meta = json.load(fh)
+            size = body_path.stat().st_size
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url:
+            return None  # 哈希碰撞
+        return CacheEntry(
+            url=url,
+            body_path=body_path,
+            meta_path=meta_path,
+            headers=meta.get("headers") or {},
+            encoding=meta.get("encoding"),
+            stored_at=float(meta.get("stored_at") or 0),
+            size=size,
+        )
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        _, ttl = classify_endpoint(entry.url)
+        return ttl > 0 and time.time() - entry.stored_at < ttl
+
+    def get_fresh(self, url: str) -> requests.Response | None:
+        """TTL 内的缓存直接还原为 Response；否则返回 None。"""
+        entry = self.lookup(url)
+        if entry is None or not self.is_fresh(entry):
+            return None
+        return self._to_response(entry)
+
+    def conditional_headers(self, url: str) -> dict:
+        entry = self.lookup(url)
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    # ---------- 写入 ----------
+    def store(self, url: str, resp: requests.Response) -> None:
+        """仅缓存 200 响应。"""
+        if not self.enabled or resp.status_code != 200:
+            return
+        body_path, meta_path = self._paths(url)
+        headers = {k: resp.headers[k] for k in KEPT_HEADERS if k in resp.headers}
+        meta = {
+            "url": url,
+            "headers": headers,
+            "encoding": resp.encoding,
+            "stored_at": time.time(),
+        }
+        body = resp.content
+        with self._lock:
+            previous = body_path.stat().st_size if body_path.exists() else 0
+            body_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_body = body_path.with_suffix(".body.tmp")
+            tmp_body.write_bytes(body)
+            os.replace(tmp_body, body_path)
+            self._write_meta(meta_path, meta)
+            self._account(len(body) - previous)
+
+    def revalidated(self, url: str, resp: requests.Response) -> requests.Response | None:
+        """服务器返回 304 时刷新缓存时间，并用缓存正文构造 Response。"""
+        entry = self.lookup(url)
+        if entry is None:
+            return None
+        for key in ("etag", "last-modified", "date"):
+            if key in resp.headers:
+                entry.headers[key] = resp.headers[key]
+        entry.stored_at = time.time()
+        with self._lock:
+            self._write_meta(entry.meta_path, {
+                "url": url,
+                "headers": entry.headers,
+                "encoding": entry.encoding,
+                "stored_at": entry.stored_at,
+            })
+        return self._to_response(entry)
+
+    def _write_meta(self, meta_path: Path, meta: dict) -> None:
+        tmp_meta = meta_path.with_suffix(".json.tmp")
+        with tmp_meta.open("w", encoding="utf-8") as fh:
+            json.dump(meta, fh, ensure_ascii=False)
+        os.replace(tmp_meta, meta_path)
+
+    def _to_response(self, entry: CacheEntry) -> requests.Response | None:
+        try:
+            body = entry.body_path.read_bytes()
+            os.utime(entry.body_path)  # 记录访问时间，供 LRU 淘汰使用
+        except OSError:
+            return None
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.reason = "OK"
+        resp.url = entry.url
+        resp._content = body
+        resp.headers = CaseInsensitiveDict(entry.headers)
+        resp.encoding = entry.encoding
+        resp.from_cache = True
+        return resp
+
+    # ---------- 容量控制 ----------
+    def _scan(self) -> list[tuple[float, int, Path]]:
+        files = []
+        if not self.cache_dir.exists():
+            return files
+        for sub in os.scandir(self.cache_dir):
+            if not sub.is_dir():
+                continue
+            for item in os.scandir(sub.path):
+                if item.name.endswith(".body"):
+                    st = item.stat()
+                    files.append((st.st_mtime, st.st_size, Path(item.path)))
+        return files
+
+    def _account(self, delta: int) -> None:
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._scan())
+        else:
+            self._total_bytes += delta
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        """淘汰最久未访问的条目，直到总大小降到上限的 90%。"""
+        files = sorted(self._scan())
+        total = sum(size for _, size, _ in files)
+        target = int(self.max_bytes * 0.9)
+        for _, size, body_path in files:
+            if total <= target:
+                break
+            for path in (body_path, body_path.with_suffix(".json")):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            total -= size
+        self._total_bytes = total
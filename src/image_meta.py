@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+图片头信息与低质量占位图
+----------------------------------------------------------------
+- read_image_header：只读取 PNG IHDR / JPEG SOF 段得到宽高（PNG 另含颜色类型），
+  不解码图片数据
+- make_placeholder：平均色 + 最长边 THUMB_SIZE 像素的 PNG 缩略图（data URI），
+  供前端在原图加载前占位
+  - PNG 使用纯 Python 解码（8 / 16 位、非隔行），不依赖第三方库
+  - JPEG 使用 Pillow（见 requirements.txt，利用 draft 模式只解码 DC 系数），未安装时只有宽高、没有占位图
+"""
+
+import base64
+import struct
+import zlib
+
+try:
+    from PIL import Image
+except ImportError:  # 未安装 Pillow 时 JPEG 只读取宽高
+    Image = None
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# 不含宽高的 JPEG SOF 之外的 Cn 标记：DHT、JPG 扩展、DAC
+JPEG_NON_SOF = {0xC4, 0xC8, 0xCC}
+# 每个颜色类型每像素的通道数
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+THUMB_SIZE = 8
+# 每个缩略图格子沿每个方向最多采样的像素数
+SAMPLES_PER_CELL = 8
+
+
+class ImageFormatError(ValueError):
+    pass
+
+
+# -----------------------------
+# 头信息
+# -----------------------------
+def _png_header(fh) -> dict:
+    fh.seek(8)
+    length, chunk_type = struct.unpack(">I4s", fh.read(8))
+    if chunk_type != b"IHDR" or length < 13:
+        raise ImageFormatError("PNG 缺少 IHDR")
+    width, height, bit_depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", fh.read(13))
+    return {
+        "format": "png",
+        "width": width,
+        "height": height,
+        "colorType": color_type,
+        "bitDepth": bit_depth,
+        "interlace": interlace,
+    }
+
+
+def _jpeg_header(fh) -> dict:
+    fh.seek(2)
+    while True:
+        byte = fh.read(1)
+        if not byte:
+            raise ImageFormatError("JPEG 中没有找到 SOF 段")
+        if byte != b"\xff":
+            continue
+        marker = fh.read(1)
+        while marker == b"\xff":  # 填充字节
+            marker = fh.read(1)
+        if not marker:
+            raise ImageFormatError("JPEG 提前结束")
+        code = marker[0]
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue  # 没有长度字段的标记
+        (length,) = struct.unpack(">H", fh.read(2))
+        if 0xC0 <= code <= 0xCF and code not in JPEG_NON_SOF:
+            _, height, width, components = struct.unpack(">BHHB", fh.read(6))
+            return {"format": "jpeg", "width": width, "height": height, "components": components}
+        fh.seek(length - 2, 1)
+
+
+def read_image_header(path: str) -> dict:
+    """读取图片宽高，只访问文件开头的少量字节。"""
+    with open(path, "rb") as fh:
+        head = fh.read(8)
+        if head == PNG_SIGNATURE:
+            return _png_header(fh)
+        if head[:2] == b"\xff\xd8":
+            return _jpeg_header(fh)
+    raise ImageFormatError("不支持的图片格式")
+
+
+# -----------------------------
+# PNG 解码（纯 Python）
+# -----------------------------
+def _paeth(a: int, b: int, c: int) -> int:
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+def _unfilter(filter_type: int, line: bytearray, prev: bytearray, bpp: int) -> None:
+    """原地还原一行扫描线。"""
+    n = len(line)
+    if filter_type == 0:
+        return
+    if filter_type == 1:
+        for i in range(bpp, n):
+            line[i] = (line[i] + line[i - bpp]) & 0xFF
+    elif filter_type == 2:
+        for i in range(n):
+            line[i] = (line[i] + prev[i]) & 0xFF
+    elif filter_type == 3:
+        for i in range(n):
+            left = line[i - bpp] if i >= bpp else 0
+            line[i] = (line[i] + ((left + prev[i]) >> 1)) & 0xFF
+    elif filter_type == 4:
+        for i in range(n):
+            left = line[i - bpp] if i >= bpp else 0
+            up_left = prev[i - bpp] if i >= bpp else 0
+            line[i] = (line[i] + _paeth(left, prev[i], up_left)) & 0xFF
+    else:
+        raise ImageFormatError(f"未知的 PNG 过滤类型：{filter_type}")
+
+
+def _read_png_chunks(path: str) -> tuple[dict, bytes, bytes | None, bytes | None]:
+    with open(path, "rb") as fh:
+        if fh.read(8) != PNG_SIGNATURE:
+            raise ImageFormatError("不是 PNG 文件")
+        header = None
+        idat = []
+        palette = transparency = None
+        while True:
+            raw = fh.read(8)
+            if len(raw) < 8:
+                break
+            length, chunk_type = struct.unpack(">I4s", raw)
+            data = fh.read(length)
+            fh.seek(4, 1)  # CRC
+            if chunk_type == b"IHDR":
+                width, height, bit_depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", data[:13])
+                header = {"width": width, "height": height, "bitDepth": bit_depth,
+                          "colorType": color_type, "interlace": interlace}
+            elif chunk_type == b"PLTE":
+                palette = data
+            elif chunk_type == b"tRNS":
+                transparency = data
+            elif chunk_type == b"IDAT":
+                idat.append(data)
+            elif chunk_type == b"IEND":
+                break
+    if header is None:
+        raise ImageFormatError("PNG 缺少 IHDR")
+    return header, b"".join(idat), palette, transparency
+
+
+def _png_sample_grid(path: str, cols: int, rows: int) -> list[list[tuple[int, int, int, int]]]:
+    """
+    解码 PNG 并按 cols x rows 的格子求平均 RGBA（只对采样到的像素求和）。
+    过滤还原必须逐行进行，但像素转换与累加只在采样位置上做。
+    """
+    header, data, palette, transparency = _read_png_chunks(path)
+    width, height = header["width"], header["height"]
+    bit_depth, color_type = header["bitDepth"], header["colorType"]
+    if header["interlace"] or bit_depth not in (8, 16) or color_type not in PNG_CHANNELS:
+        raise ImageFormatError("只支持 8 / 16 位非隔行 PNG")
+    if color_type == 3 and palette is None:
+        raise ImageFormatError("调色板 PNG 缺少 PLTE")
+
+    channels = PNG_CHANNELS[color_type]
+    sample_bytes = bit_depth // 8
+    bpp = channels * sample_bytes
+    stride = width * bpp
+    raw = zlib.decompress(data)
+    if len(raw) < (stride + 1) * height:
+        raise ImageFormatError("PNG 数据长度不足")
+
+    alpha_table = {}
+    if color_type == 3 and transparency:
+        alpha_table = {i: a for i, a in enumerate(transparency)}
+
+    def pixel(line: bytearray, x: int) -> tuple[int, int, int, int]:
+        base = x * bpp
+        values = [line[base + c * sample_bytes] for c in range(channels)]  # 16 位取高字节
+        if color_type == 0:
+            return values[0], values[0], values[0], 255
+        if color_type == 2:
+            return values[0], values[1], values[2], 255
+        if color_type == 3:
+            index = values[0]
+            r, g, b = palette[index * 3:index * 3 + 3]
+            return r, g, b, alpha_table.get(index, 255)
+        if color_type == 4:
+            return values[0], values[0], values[0], values[1]
+        return values[0], values[1], values[2], values[3]
+
+    step_x = max(1, width // (cols * SAMPLES_PER_CELL))
+    step_y = max(1, height // (rows * SAMPLES_PER_CELL))
+    sample_xs = range(0, width, step_x)
+    sums = [[[0, 0, 0, 0, 0] for _ in range(cols)] for _ in range(rows)]
+
+    prev = bytearray(stride)
+    pos = 0
+    for y in range(height):
+        filter_type = raw[pos]
+        line = bytearray(raw[pos + 1:pos + 1 + stride])
+        pos += stride + 1
+        _unfilter(filter_type, line, prev, bpp)
+        prev = line
+        if y % step_y:
+            continue
+        row_cells = sums[min(rows - 1, y * rows // height)]
+        for x in sample_xs:
+            r, g, b, a = pixel(line, x)
+            cell = row_cells[min(cols - 1, x * cols // width)]
+            # 按 alpha 加权，透明像素不影响颜色
+            cell[0] += r * a
+            cell[1] += g * a
+            cell[2] += b * a
+            cell[3] += a
+            cell[4] += 1
+    return [[_cell_average(cell) for cell in row] for row in sums]
+
+
+def _cell_average(cell: list[int]) -> tuple[int, int, int, int]:
+    r, g, b, a, count = cell
+    if not a:
+        return 0, 0, 0, 0
+    return round(r / a), round(g / a), round(b / a), round(a / count)
+
+
+def _pillow_sample_grid(path: str, cols: int, rows: int) -> list[list[tuple[int, int, int, int]]]:
+    with Image.open(path) as img:
+        img.draft("RGB", (cols * SAMPLES_PER_CELL, rows * SAMPLES_PER_CELL))
+        raw = img.convert("RGBA").resize((cols, rows), Image.BOX).tobytes()
+    pixels = [tuple(raw[i:i + 4]) for i in range(0, len(raw), 4)]
+    return [pixels[y * cols:(y + 1) * cols] for y in range(rows)]
+
+
+# -----------------------------
+# 占位图
+# -----------------------------
+def _thumb_dims(width: int, height: int) -> tuple[int, int]:
+    if width >= height:
+        return THUMB_SIZE, max(1, round(THUMB_SIZE * height / width))
+    return max(1, round(THUMB_SIZE * width / height)), THUMB_SIZE
+
+
+def encode_png_rgba(grid: list[list[tuple[int, int, int, int]]]) -> bytes:
+    width, height = len(grid[0]), len(grid)
+
+    def chunk(chunk_type: bytes, data: bytes) -> bytes:
+        return (struct.pack(">I", len(data)) + chunk_type + data
+                + struct.pack(">I", zlib.crc32(chunk_type + data) & 0xFFFFFFFF))
+
+    raw = b"".join(b"\x00" + bytes(v for px in row for v in px) for row in grid)
+    return (PNG_SIGNATURE
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 9))
+            + chunk(b"IEND", b""))
+
+
+def make_placeholder(path: str, header: dict) -> dict | None:
+    """
+    返回 {"placeholder": "#rrggbb", "thumbnail": "data:image/png;base64,..."}；
+    无法解码时返回 None（JPEG 且未安装 Pillow、或不支持的 PNG 变体）。
+    """
+    cols, rows = _thumb_dims(header["width"], header["height"])
+    if header["format"] == "png":
+        grid = _png_sample_grid(path, cols, rows)
+    elif Image is not None:
+        grid = _pillow_sample_grid(path, cols, rows)
+    else:
+        return None
+
+    total = [0, 0, 0, 0]
+    for row in grid:
+        for r, g, b, a in row:
+            total[0] += r * a
+            total[1] += g * a
+            total[2] += b * a
+            total[3] += a
+    if total[3]:
+        color = tuple(round(total[i] / total[3]) for i in range(3))
+    else:
+        color = (0, 0, 0)
+    thumbnail = base64.b64encode(encode_png_rgba(grid)).decode("ascii")
+    return {
+        "placeholder": "#%02x%02x%02x" % color,
+        "thumbnail": f"data:image/png;base64,{thumbnail}",
+    }
+
+
+def image_metadata(path: str) -> dict:
+    """
+    汇总写入 assets_config 的图片字段：width / height（PNG 另含 colorType）、
+    placeholder / thumbnail（能生成时）。
+    """
+    header = read_image_header(path)
+    meta = {"width": header["width"], "height": header["height"]}
+    if header["format"] == "png":
+        meta["colorType"] = header["colorType"]
+    try:
+        placeholder = make_placeholder(path, header)
+    except (OSError, ImageFormatError, zlib.error, struct.error):
+        placeholder = None
+    if placeholder:
+        meta.update(placeholder)
+    return meta
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+MP4 box 解析与 faststart 重排
+----------------------------------------------------------------
+- 只读取顶层 box 头与 moov，不读取 mdat 内容
+- analyze_mp4：moov 是否位于 mdat 之前（faststart）、时长、视频分辨率
+- faststart：把 moov 移到第一个 mdat 之前，同步改写 stco / co64 中的
+  chunk 偏移，写入新文件（必要时把 stco 升级为 co64）
+- moov 在 mdat 之后时，浏览器必须下载完整个文件才能开始播放
+"""
+
+import os
+import shutil
+import struct
+from dataclasses import dataclass, field
+
+# 需要向下解析子 box 的容器类型（只覆盖定位 chunk 偏移与元数据所需的路径，其余 box 原样保留）
+CONTAINER_TYPES = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class MP4Error(ValueError):
+    pass
+
+
+@dataclass
+class TopBox:
+    type: bytes
+    offset: int
+    size: int
+    header_size: int
+
+
+@dataclass
+class Box:
+    """moov 内的 box：容器保存子 box，叶子保存原始 payload。"""
+
+    type: bytes
+    payload: bytes = b""
+    children: list["Box"] = field(default_factory=list)
+
+    @property
+    def is_container(self) -> bool:
+        return self.type in CONTAINER_TYPES
+
+    def find(self, *path: bytes) -> "Box | None":
+        node = self
+        for box_type in path:
+            node = next((child for child in node.children if child.type == box_type), None)
+            if node is None:
+                return None
+        return node
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def serialize(self) -> bytes:
+        body = b"".join(child.serialize() for child in self.children) if self.is_container else self.payload
+        size = 8 + len(body)
+        if size > 0xFFFFFFFF:
+            return struct.pack(">I4sQ", 1, self.type, size + 8) + body
+        return struct.pack(">I4s", size, self.type) + body
+
+
+# -----------------------------
+# 解析
+# -----------------------------
+def read_top_level_boxes(fh, file_size: int) -> list[TopBox]:
+    boxes = []
+    offset = 0
+    while offset + 8 <= file_size:
+        fh.seek(offset)
+        size, box_type = struct.unpack(">I4s", fh.read(8))
+        header_size = 8
+        if size == 1:
+            (size,) = struct.unpack(">Q", fh.read(8))
+            header_size = 16
+        elif size == 0:
+            size = file_size - offset
+        if size < header_size or offset + size > file_size:
+            raise MP4Error(f"box {box_type!r} 在偏移 {offset} 处大小异常：{size}")
+        boxes.append(TopBox(box_type, offset, size, header_size))
+        offset += size
+    return boxes
+
+
+def parse_boxes(data: bytes, box_type: bytes = b"moov") -> Box:
+    """把 moov 的 payload 解析成 Box 树。"""
+    root = Box(box_type)
+    pos = 0
+    while pos + 8 <= len(data):
+        size, child_type = struct.unpack_from(">I4s", data, pos)
+        header_size = 8
+        if size == 1:
+            (size,) = struct.unpack_from(">Q", data, pos + 8)
+            header_size = 16
+        elif size == 0:
+            size = len(data) - pos
+        if size < header_size or pos + size > len(data):
+            raise MP4Error(f"box {child_type!r} 大小异常：{size}")
+        payload = data[pos + header_size:pos + size]
+        if child_type in CONTAINER_TYPES:
+            child = parse_boxes(payload, child_type)
+        else:
+            child = Box(child_type, payload=payload)
+        root.children.append(child)
+        pos += size
+    return root
+
+
+def read_moov(fh, boxes: list[TopBox]) -> Box:
+    moov = next((box for box in boxes if box.type == b"moov"), None)
+    if moov is None:
+        raise MP4Error("没有找到 moov box")
+    fh.seek(moov.offset + moov.header_size)
+    return parse_boxes(fh.read(moov.size - moov.header_size))
+
+
+def _full_box_version(payload: bytes) -> int:
+    return payload[0] if payload else 0
+
+
+def movie_duration(moov: Box) -> float | None:
+    mvhd = moov.find(b"mvhd")
+    if mvhd is None or len(mvhd.payload) < 20:
+        return None
+    if _full_box_version(mvhd.payload) == 1:
+        timescale, duration = struct.unpack_from(">IQ", mvhd.payload, 20)
+    else:
+        timescale, duration = struct.unpack_from(">II", mvhd.payload, 12)
+    return duration / timescale if timescale else None
+
+
+def _handler_type(trak: Box) -> bytes | None:
+    hdlr = trak.find(b"mdia", b"hdlr")
+    if hdlr is None or len(hdlr.payload) < 12:
+        return None
+    return hdlr.payload[8:12]
+
+
+def video_resolution(moov: Box) -> tuple[int, int] | None:
+    """取第一条视频轨道 tkhd 中的显示宽高（16.16 定点数）。"""
+    for trak in moov.children:
+        if trak.type != b"trak" or _handler_type(trak) != b"vide":
+            continue
+        tkhd = trak.find(b"tkhd")
+        if tkhd is None or len(tkhd.payload) < 8:
+            continue
+        width, height = struct.unpack_from(">II", tkhd.payload, len(tkhd.payload) - 8)
+        return width >> 16, height >> 16
+    return None
+
+
+def analyze_mp4(path: str) -> dict:
+    """
+    返回 {"faststart", "moov_offset", "mdat_offset", "duration", "width", "height", "fragmented"}。
+    faststart 为 True 表示 moov 位于第一个 mdat 之前，可以边下边播。
+    """
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as fh:
+        boxes = read_top_level_boxes(fh, file_size)
+        moov_box = next((box for box in boxes if box.type == b"moov"), None)
+        mdat_box = next((box for box in boxes if box.type == b"mdat"), None)
+        moov = read_moov(fh, boxes)
+    resolution = video_resolution(moov)
+    duration = movie_duration(moov)
+    return {
+        "faststart": mdat_box is None or moov_box.offset < mdat_box.offset,
+        "moov_offset": moov_box.offset,
+        "mdat_offset": mdat_box.offset if mdat_box else None,
+        "duration": round(duration, 3) if duration is not None else None,
+        "width": resolution[0] if resolution else None,
+        "height": resolution[1] if resolution else None,
+        "fragmented": any(box.type == b"moof" for box in boxes),
+    }
+
+
+# -----------------------------
+# faststart 重排
+# -----------------------------
+def _chunk_offset_boxes(moov: Box) -> list[Box]:
+    return [box for box in moov.walk() if box.type in (b"stco", b"co64")]
+
+
+def _read_offsets(box: Box) -> list[int]:
+    (count,) = struct.unpack_from(">I", box.payload, 4)
+    fmt = ">%dI" % count if box.type == b"stco" else ">%dQ" % count
+    return list(struct.unpack_from(fmt, box.payload, 8))
+
+
+def _write_offsets(box: Box, offsets: list[int]) -> None:
+    if box.type == b"stco" and any(value > 0xFFFFFFFF for value in offsets):
+        box.type = b"co64"
+    fmt = ">%dI" % len(offsets) if box.type == b"stco" else ">%dQ" % len(offsets)
+    box.payload = box.payload[:4] + struct.pack(">I", len(offsets)) + struct.pack(fmt, *offsets)
+
+
+def _relocate(offset: int, old_boxes: list[TopBox], new_starts: dict[int, int]) -> int:
+    """把原文件中的偏移映射到新文件：找到所在的顶层 box，加上该 box 的位移。"""
+    for box in old_boxes:
+        if box.offset <= offset < box.offset + box.size:
+            return offset - box.offset + new_starts[box.offset]
+    raise MP4Error(f"chunk 偏移 {offset} 不在任何顶层 box 内")
+
+
+def faststart(src: str, dst: str) -> bool:
+    """
+    把 moov 移到第一个 mdat 之前并写入 dst，返回是否发生了重排。
+    已经是 faststart 的文件直接复制；分片 MP4（moof）不做处理。
+    """
+    file_size = os.path.getsize(src)
+    with open(src, "rb") as fh:
+        boxes = read_top_level_boxes(fh, file_size)
+        moov_box = next((box for box in boxes if box.type == b"moov"), None)
+        mdat_box = next((box for box in boxes if box.type == b"mdat"), None)
+        if moov_box is None:
+            raise MP4Error("没有找到 moov box")
+        if mdat_box is None or moov_box.offset < mdat_box.offset or any(box.type == b"moof" for box in boxes):
+            if os.path.abspath(src) != os.path.abspath(dst):
+                shutil.copyfile(src, dst)
+            return False
+        moov = read_moov(fh, boxes)
+
+    others = [box for box in boxes if box.type != b"moov"]
+    offset_boxes = _chunk_offset_boxes(moov)
+    original = {id(box): _read_offsets(box) for box in offset_boxes}
+
+    # moov 的大小取决于偏移是否需要升级为 co64，最多迭代几次直到稳定
+    moov_bytes = moov.serialize()
+    for _ in range(4):
+        new_starts: dict[int, int] = {}
+        position = 0
+        for box in others:
+            if box is mdat_box:
+                position += len(moov_bytes)
+            new_starts[box.offset] = position
+            position += box.size
+        for box in offset_boxes:
+            _write_offsets(box, [_relocate(value, boxes, new_starts) for value in original[id(box)]])
+        serialized = moov.serialize()
+        if len(serialized) == len(moov_bytes):
+            moov_bytes = serialized
+            break
+        moov_bytes = serialized
+    else:
+        raise MP4Error("moov 大小无法收敛")
+
+    tmp = dst + ".faststart.tmp"
+    try:
+        with open(src, "rb") as fin, open(tmp, "wb") as fout:
+            for box in others:
+                if box is mdat_box:
+                    fout.write(moov_bytes)
+                fin.seek(box.offset)
+                remaining = box.size
+                while remaining:
+                    chunk = fin.read(min(COPY_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise MP4Error("读取 box 内容时文件提前结束")
+                    fout.write(chunk)
+                    remaining -= len(chunk)
+            fout.flush()
+            os.fsync(fout.fileno())
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return True
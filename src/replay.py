@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+HTTP 录制 / 回放
+----------------------------------------------------------------
+- FixtureStore：按规范化 URL 保存响应（状态码、头、正文）
+- 录制：设置 DEEPSPACE_RECORD_DIR 后，爬虫 Session 的真实响应会写入 fixture 目录
+- 回放：设置 DEEPSPACE_REPLAY_URL 后，所有 https 请求改写到本地替身服务器
+- ReplayServer：从 fixture（或合成数据源）回放响应，可配置延迟与错误注入
+  （403 / 429 / 567，对应 polite_get 的重试分支）
+
+用法：
+    DEEPSPACE_RECORD_DIR=fixtures python src/update_cards.py      # 录制
+    python src/replay.py serve --fixtures fixtures --port 8765      # 启动替身
+    DEEPSPACE_REPLAY_URL=http://127.0.0.1:8765 python src/update_cards.py
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RECORD_DIR_ENV = "DEEPSPACE_RECORD_DIR"
+REPLAY_URL_ENV = "DEEPSPACE_REPLAY_URL"
+REPLAY_PREFIX = "/_replay/"
+
+# 回放时不需要保存的逐跳 / 编码相关头
+SKIPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+
+# 合成数据源：输入原始 URL，返回 (status, headers, body) 或 None
+Responder = Callable[[str], "tuple[int, dict, bytes] | None"]
+
+
+def canonical_url(url: str) -> str:
+    """查询参数排序后的 URL，作为 fixture 的键。"""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, query, ""))
+
+
+class FixtureStore:
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = canonical_url(url)
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        host = urlsplit(key).hostname or "_"
+        base = self.root / host / digest
+        return base.with_suffix(".json"), base.with_suffix(".body")
+
+    def save(self, url: str, status: int, headers: dict, body: bytes) -> None:
+        meta_path, body_path = self._paths(url)
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        body_path.write_bytes(body)
+        meta = {
+            "url": canonical_url(url),
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in SKIPPED_HEADERS},
+        }
+        with meta_path.open("w", encoding="utf-8") as fh:
+            json.dump(meta, fh, ensure_ascii=False, indent=2)
+
+    def load(self, url: str) -> tuple[int, dict, bytes] | None:
+        meta_path, body_path = self._paths(url)
+        try:
+            with meta_path.open("r", encoding="utf-8") as fh:
+                meta = json.load(fh)
+            return int(meta["status"]), meta.get("headers") or {}, body_path.read_bytes()
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.root.glob("*/*.json")) if self.root.exists() else 0
+
+
+# -----------------------------
+# 客户端：录制 / 改写到替身服务器
+# -----------------------------
+class RecordingAdapter(HTTPAdapter):
+    def __init__(self, store: FixtureStore, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+
+    def send(self, request, **kwargs):
+        resp = super().send(request, **kwargs)
+        if resp.status_code < 500:
+            self.store.save(request.url, resp.status_code, dict(resp.headers), resp.content)
+        return resp
+
+
+class ReplayRedirectAdapter(HTTPAdapter):
+    """把 https://host/path?q 改写为 {replay_url}/_replay/host/path?q。"""
+
+    def __init__(self, replay_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.replay_url = replay_url.rstrip("/")
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        target = f"{self.replay_url}{REPLAY_PREFIX}{parts.netloc}{parts.path or '/'}"
+        if parts.query:
+            target += "?" + parts.query
+        request.url = target
+        return super().send(request, **kwargs)
+
+
+def replay_active() -> bool:
+    return bool(os.environ.get(REPLAY_URL_ENV))
+
+
+def install_transport_hooks(session: requests.Session) -> None:
+    """
+    根据环境变量为 Session 挂载录制或回放适配器；两者都未设置时不做任何事。
+    原适配器的 Retry 配置会被保留。
+    """
+    current = session.get_adapter("https://")
+    kwargs = {"max_retries": current.max_retries, "pool_maxsize": getattr(current, "_pool_maxsize", 10)}
+    replay_url = os.environ.get(REPLAY_URL_ENV)
+    record_dir = os.environ.get(RECORD_DIR_ENV)
+    if replay_url:
+        session.mount("https://", ReplayRedirectAdapter(replay_url, **kwargs))
+    elif record_dir:
+        session.mount("https://", RecordingAdapter(FixtureStore(record_dir), **kwargs))
+
+
+# -----------------------------
+# 替身服务器
+# -----------------------------
+class ReplayServer:
+    """
+    本地替身：先查 fixture，再查合成数据源，都没有时返回 404。
+    latency 为每个请求的固定延迟（秒），jitter 为额外随机延迟上限，
+    error_rate 为按 error_codes 随机返回错误的概率。
+    """
+
+    def __init__(
+        self,
+        store: FixtureStore | None = None,
+        responder: Responder | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_codes: tuple[int, ...] = (403, 429, 567),
+        error_hosts: tuple[str, ...] = (),
+        seed: int | None = None,
+    ):
+        self.store = store
+        self.responder = responder
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_codes = error_codes
+        self.error_hosts = error_hosts
+        self.stats = {"requests": 0, "hits": 0, "misses": 0, "injected_errors": 0, "not_modified": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 头和正文分两次写出，关闭 Nagle 避免 keep-alive 下的延迟确认等待
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                server._serve(self)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def _original_url(self, path: str) -> str | None:
+        if not path.startswith(REPLAY_PREFIX):
+            return None
+        rest = path[len(REPLAY_PREFIX):]
+        return "https://" + rest
+
+    def _serve(self, handler: BaseHTTPRequestHandler) -> None:
+        with self._lock:
+            self.stats["requests"] += 1
+            delay = self.latency + (self._rng.random() * self.jitter if self.jitter else 0.0)
+            inject = self.error_rate > 0 and self._rng.random() < self.error_rate
+            code = self._rng.choice(self.error_codes) if inject else None
+        if delay:
+            time.sleep(delay)
+
+        url = self._original_url(handler.path)
+        host = urlsplit(url).hostname if url else ""
+        if code is not None and (not self.error_hosts or host in self.error_hosts):
+            with self._lock:
+                self.stats["injected_errors"] += 1
+            self._send(handler, code, {"Content-Type": "text/plain"}, b"injected error")
+            return
+
+        found = None
+        if url and self.store is not None:
+            found = self.store.load(url)
+        if found is None and url and self.responder is not None:
+            found = self.responder(url)
+        with self._lock:
+            self.stats["hits" if found else "misses"] += 1
+        if found is None:
+            self._send(handler, 404, {"Content-Type": "text/plain"}, b"no fixture")
+            return
+
+        status, headers, body = found
+        etag = next((v for k, v in headers.items() if k.lower() == "etag"), None)
+        if etag and handler.headers.get("If-None-Match") == etag:
+            with self._lock:
+                self.stats["not_modified"] += 1
+            self._send(handler, 304, {"ETag": etag}, b"")
+            return
+        self._send(handler, status, headers, body)
+
+    @staticmethod
+    def _send(handler: BaseHTTPRequestHandler, status: int, headers: dict, body: bytes) -> None:
+        handler.send_response(status)
+        for key, value in headers.items():
+            if key.lower() not in SKIPPED_HEADERS:
+                handler.send_header(key, value)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        if body:
+            handler.wfile.write(body)
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "ReplayServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地替身服务器：回放录制的 HTTP 响应")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="启动替身服务器")
+    serve.add_argument("--fixtures", required=True, help="fixture 目录（DEEPSPACE_RECORD_DIR 录制得到）")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--latency", type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    serve.add_argument("--jitter", type=float, default=0.0, help="额外随机延迟上限（秒）")
+    serve.add_argument("--error-rate", type=float, default=0.0, help="随机返回 403/429/567 的概率")
+    serve.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    store = FixtureStore(args.fixtures)
+    server = ReplayServer(
+        store=store,
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    print(f"🎬 回放 {len(store)} 条 fixture：{server.url}", flush=True)
+    print(f"   export {REPLAY_URL_ENV}={server.url}", flush=True)
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
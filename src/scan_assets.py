@@ -3,13 +3,48 @@
 """
 素材文件扫描器
 自动扫描public目录下的文件，生成需要缓存的素材列表
+同时计算每个文件的内容哈希，生成 public/asset_manifest.json，
+并据此更新 public/service_worker.js 中的预缓存列表
 """
 
 import os
+import argparse
+import hashlib
+import fnmatch
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import json
 from pathlib import Path
-from typing import Dict, List, Any
+from struct import error as struct_error
+from typing import Dict, List, Any, Optional, Tuple
+
+from atomic_io import write_json_atomic, write_text_atomic
+from image_meta import ImageFormatError, image_metadata
+from mp4_faststart import MP4Error, analyze_mp4, faststart
+
+# 内容哈希：sha256 取前 HASH_LENGTH 位十六进制
+HASH_LENGTH = 16
+HASH_CHUNK_SIZE = 1024 * 1024
+# 哈希缓存：按 (path, size, mtime) 判断文件是否变化，未变化的文件不重新计算
+HASH_CACHE_PATH = ".cache/asset_hashes.json"
+ASSET_MANIFEST_PATH = "public/asset_manifest.json"
+SERVICE_WORKER_PATH = "public/service_worker.js"
+# 需要由 Service Worker 预缓存的素材（相对 public 的路径，fnmatch 规则）
+PRECACHE_PATTERNS = ["videos/*", "audios/*", "images/结算背景.jpg"]
+# 并行扫描顶层子目录的线程数
+SCAN_WORKERS = min(8, os.cpu_count() or 1)
+
+ASSET_CATEGORIES = ("video", "audio", "image", "sign")
+# 支持的视频格式
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm'}
+# 支持的音频格式
+AUDIO_EXTENSIONS = {'.mp3', '.wav', '.ogg', '.aac', '.flac', '.m4a'}
+# 支持的图片格式
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.svg'}
+
+SW_BLOCK_BEGIN = "// <precache-manifest>"
+SW_BLOCK_END = "// </precache-manifest>"
 
 def get_file_size(file_path: Path) -> int:
     """
@@ -26,29 +61,170 @@ def get_file_size(file_path: Path) -> int:
     except Exception:
         return 0
 
-def scan_assets(public_dir: str = "public") -> Dict[str, Any]:
+def compute_file_hash(file_path: Path) -> str:
+    """
+    流式计算文件内容哈希
+    
+    Args:
+        file_path: 文件路径
+        
+    Returns:
+        sha256 十六进制摘要的前 HASH_LENGTH 位
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+class HashCache:
+    """
+    文件哈希的旁路缓存，键为相对路径，值记录 size / mtime_ns / hash。
+    size 与 mtime 都未变化时直接复用上次的哈希，避免重复读取大体积视频。
+    """
+
+    def __init__(self, path: Optional[str] = HASH_CACHE_PATH):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    self.entries = data
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def get_hash(self, relative_path: str, file_path, stat: os.stat_result) -> str:
+        entry = self.entries.get(relative_path)
+        if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            with self._lock:
+                self.hits += 1
+            return entry["hash"]
+        # 哈希计算放在锁外，多个扫描线程可以同时读文件
+        file_hash = compute_file_hash(file_path)
+        with self._lock:
+            self.misses += 1
+            self.entries[relative_path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": file_hash}
+        return file_hash
+
+    def get_image_meta(self, relative_path: str, file_path, stat: os.stat_result) -> Dict[str, Any]:
+        """
+        图片宽高与占位图，与哈希一起缓存；需先调用 get_hash 确认缓存条目有效。
+        没有生成占位图的结果（如未安装 Pillow 时的 JPEG）不缓存，安装后会自动补齐。
+        """
+        entry = self.entries.get(relative_path) or {}
+        if "image" in entry:
+            return entry["image"]
+        try:
+            meta = image_metadata(file_path)
+        except (OSError, ImageFormatError, struct_error):
+            return {}
+        if "placeholder" in meta:
+            with self._lock:
+                if relative_path in self.entries:
+                    self.entries[relative_path]["image"] = meta
+        return meta
+
+    def save(self, seen: Optional[set] = None):
+        if not self.path:
+            return
+        if seen is not None:
+            # 已删除的文件不再保留在缓存里
+            self.entries = {k: v for k, v in self.entries.items() if k in seen}
+        write_json_atomic(self.path, self.entries, indent=2, sort_keys=True)
+
+def _classify(file_ext: str, dir_name: str) -> Optional[str]:
+    """根据文件扩展名和顶层目录名返回分类，不是素材时返回 None"""
+    if file_ext in VIDEO_EXTENSIONS:
+        return "video"
+    if file_ext in AUDIO_EXTENSIONS:
+        return "audio"
+    if file_ext in IMAGE_EXTENSIONS:
+        return "sign" if dir_name == "signs" else "image"
+    return None
+
+def _walk_top_dir(top_path: str, dir_name: str, prefix_len: int, hash_cache: HashCache):
+    """
+    用 os.scandir 遍历一个顶层子目录，复用 DirEntry 的 stat 结果
+    
+    遍历顺序与 Path.rglob("*") 相同：目录先序遍历，
+    每个目录内按 scandir 返回顺序输出文件，再依次进入子目录（不跟随符号链接目录）
+    
+    Args:
+        top_path: 顶层子目录的绝对路径
+        dir_name: 顶层子目录名（signs 下的图片归为头像）
+        prefix_len: public 目录绝对路径的长度（含末尾分隔符），用于截取相对路径
+        hash_cache: 哈希缓存
+        
+    Returns:
+        (按分类的文件信息, 文件总大小)
+    """
+    found = {key: [] for key in ASSET_CATEGORIES}
+    total_size = 0
+    stack = [top_path]
+    while stack:
+        current = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_file():
+                    category = _classify(os.path.splitext(entry.name)[1].lower(), dir_name)
+                    if category is None:
+                        continue
+                    stat = entry.stat()
+                    relative_path = entry.path[prefix_len:]
+                    if os.sep != "/":
+                        relative_path = relative_path.replace(os.sep, "/")
+                    file_size = stat.st_size
+                    
+                    # 创建文件信息对象
+                    file_info = {
+                        "path": relative_path,
+                        "size": file_size,
+                        "sizeFormatted": format_file_size(file_size),
+                        "hash": hash_cache.get_hash(relative_path, entry.path, stat)
+                    }
+                    # 图片：宽高（只读文件头）与占位图，前端据此预留布局并先显示占位
+                    if category in ("image", "sign"):
+                        file_info.update(hash_cache.get_image_meta(relative_path, entry.path, stat))
+                    found[category].append(file_info)
+                    total_size += file_size
+                elif entry.is_dir() and not entry.is_symlink():
+                    subdirs.append(entry.path)
+            except OSError:
+                continue
+        # 逆序入栈，保证子目录按 scandir 顺序依次展开
+        stack.extend(reversed(subdirs))
+    return found, total_size
+
+def scan_assets(public_dir: str = "public", hash_cache: Optional[HashCache] = None,
+                workers: int = SCAN_WORKERS) -> Tuple[Dict[str, Any], int]:
     """
     扫描public目录下的素材文件
     
+    每个顶层子目录交给线程池并行遍历，结果按目录顺序合并，
+    输出与逐个目录串行扫描完全一致
+    
     Args:
         public_dir: public目录的路径
+        hash_cache: 哈希缓存，不传时使用默认的 .cache/asset_hashes.json
+        workers: 并行扫描的线程数
         
     Returns:
-        包含素材信息的字典
+        (包含素材信息的字典, 总字节数)；总字节数在遍历时累计，生成配置文件时直接使用
     """
-    assets = {
-        "video": [],
-        "audio": [], 
-        "image": [],
-        "sign": []
-    }
-    
-    # 支持的视频格式
-    video_extensions = {'.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm'}
-    # 支持的音频格式
-    audio_extensions = {'.mp3', '.wav', '.ogg', '.aac', '.flac', '.m4a'}
-    # 支持的图片格式
-    image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.svg'}
+    if hash_cache is None:
+        hash_cache = HashCache()
+    assets = {key: [] for key in ASSET_CATEGORIES}
     
     try:
         public_path = Path(public_dir).resolve()
@@ -56,44 +232,29 @@ def scan_assets(public_dir: str = "public") -> Dict[str, Any]:
         
         if not public_path.exists():
             print(f"错误: 目录 {public_path} 不存在")
-            return assets
+            return assets, 0
             
+        public_str = str(public_path)
+        prefix_len = len(os.path.join(public_str, ""))
+        with os.scandir(public_str) as it:
+            top_dirs = [(entry.path, entry.name) for entry in it if entry.is_dir()]
+        for _, dir_name in top_dirs:
+            print(f"扫描子目录: {dir_name}")
+        
         # 扫描各个子目录
-        for item in public_path.iterdir():
-            if item.is_dir():
-                dir_name = item.name
-                print(f"扫描子目录: {dir_name}")
-                
-                for file_path in item.rglob("*"):
-                    if file_path.is_file():
-                        file_ext = file_path.suffix.lower()
-                        relative_path = file_path.relative_to(public_path)
-                        file_size = get_file_size(file_path)
-                        
-                        # 创建文件信息对象
-                        file_info = {
-                            "path": str(relative_path),
-                            "size": file_size,
-                            "sizeFormatted": format_file_size(file_size)
-                        }
-                        
-                        # 根据文件扩展名和目录名分类
-                        if file_ext in video_extensions:
-                            assets["video"].append(file_info)
-                        elif file_ext in audio_extensions:
-                            assets["audio"].append(file_info)
-                        elif file_ext in image_extensions:
-                            if dir_name == "signs":
-                                assets["sign"].append(file_info)
-                            else:
-                                assets["image"].append(file_info)
+        total_size = 0
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            results = pool.map(
+                lambda item: _walk_top_dir(item[0], item[1], prefix_len, hash_cache),
+                top_dirs,
+            )
+            for found, dir_size in results:
+                for key, file_list in found.items():
+                    assets[key].extend(file_list)
+                total_size += dir_size
                                 
         # 统计信息
         total_files = sum(len(file_list) for file_list in assets.values())
-        total_size = sum(
-            sum(file_info["size"] for file_info in file_list) 
-            for file_list in assets.values()
-        )
         
         print(f"\n扫描完成! 总共找到 {total_files} 个文件:")
         print(f"  视频: {len(assets['video'])} 个")
@@ -101,12 +262,14 @@ def scan_assets(public_dir: str = "public") -> Dict[str, Any]:
         print(f"  图片: {len(assets['image'])} 个")
         print(f"  头像: {len(assets['sign'])} 个")
         print(f"  总大小: {format_file_size(total_size)}")
+        print(f"  哈希: 复用 {hash_cache.hits} 个，重新计算 {hash_cache.misses} 个")
         
-        return assets
+        hash_cache.save({info["path"] for file_list in assets.values() for info in file_list})
+        return assets, total_size
         
     except Exception as e:
         print(f"扫描过程中出现错误: {e}")
-        return assets
+        return assets, sum(info["size"] for file_list in assets.values() for info in file_list)
 
 def format_file_size(size_bytes: int) -> str:
     """
@@ -129,20 +292,19 @@ def format_file_size(size_bytes: int) -> str:
     
     return f"{size_bytes:.2f} {size_names[i]}"
 
-def generate_assets_config(assets: Dict[str, List[Dict]], output_file: str = "assets_config.json"):
+def generate_assets_config(assets: Dict[str, List[Dict]], output_file: str = "assets_config.json",
+                           total_size: Optional[int] = None):
     """
     生成素材配置文件
     
     Args:
         assets: 素材信息字典
         output_file: 输出文件名
+        total_size: scan_assets 遍历时累计的总字节数，不传时才重新求和
     """
-    # 计算总文件数和总大小
     total_files = sum(len(file_list) for file_list in assets.values())
-    total_size = sum(
-        sum(file_info["size"] for file_info in file_list) 
-        for file_list in assets.values()
-    )
+    if total_size is None:
+        total_size = sum(file_info["size"] for file_list in assets.values() for file_info in file_list)
     
     config = {
         "version": "1.0.0",
@@ -169,20 +331,19 @@ def generate_assets_config(assets: Dict[str, List[Dict]], output_file: str = "as
         print(f"生成配置文件时出现错误: {e}")
         return False
 
-def generate_js_config(assets: Dict[str, List[Dict]], output_file: str = "assets_config.js"):
+def generate_js_config(assets: Dict[str, List[Dict]], output_file: str = "assets_config.js",
+                       total_size: Optional[int] = None):
     """
     生成JavaScript配置文件，可以直接在React组件中使用
     
     Args:
         assets: 素材信息字典
         output_file: 输出文件名
+        total_size: scan_assets 遍历时累计的总字节数，不传时才重新求和
     """
-    # 计算总文件数和总大小
     total_files = sum(len(file_list) for file_list in assets.values())
-    total_size = sum(
-        sum(file_info["size"] for file_info in file_list) 
-        for file_list in assets.values()
-    )
+    if total_size is None:
+        total_size = sum(file_info["size"] for file_list in assets.values() for file_info in file_list)
     
     js_content = f"""// 自动生成的素材配置文件
 // 生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
@@ -250,23 +411,216 @@ export default assetsConfig;
         print(f"生成JavaScript配置文件时出现错误: {e}")
         return False
 
+def analyze_videos(assets: Dict[str, List[Dict]], public_dir: str = "public") -> Dict[str, Dict[str, Any]]:
+    """
+    解析每个 MP4 视频的 box 结构，报告 moov 位置、时长与分辨率
+    
+    Args:
+        assets: 素材信息字典
+        public_dir: public目录的路径
+        
+    Returns:
+        {相对路径: {"moov", "duration", "width", "height"}}，moov 为 "front" 或 "end"
+    """
+    videos: Dict[str, Dict[str, Any]] = {}
+    slow = 0
+    for info in assets.get("video", []):
+        if not info["path"].lower().endswith((".mp4", ".mov")):
+            continue
+        try:
+            result = analyze_mp4(os.path.join(public_dir, info["path"]))
+        except (OSError, MP4Error, struct_error) as e:
+            print(f"  ⚠️ 无法解析视频 {info['path']}: {e}")
+            continue
+        videos[info["path"]] = {
+            "moov": "front" if result["faststart"] else "end",
+            "duration": result["duration"],
+            "width": result["width"],
+            "height": result["height"],
+        }
+        if not result["faststart"]:
+            slow += 1
+    
+    print(f"\n视频分析: {len(videos)} 个")
+    for path, video in videos.items():
+        flag = "✅" if video["moov"] == "front" else "⚠️ moov 在 mdat 之后"
+        print(f"  {path}: {video['duration']}s, {video['width']}x{video['height']} {flag}")
+    if slow:
+        print(f"  有 {slow} 个视频需要下载完整文件才能播放，可用 --faststart-out 生成优化版本")
+    return videos
+
+def faststart_videos(videos: Dict[str, Dict[str, Any]], output_dir: str, public_dir: str = "public") -> List[str]:
+    """
+    把 moov 在后的视频重排为 faststart，按原相对路径写入 output_dir
+    
+    Args:
+        videos: analyze_videos 的返回值
+        output_dir: 输出目录（与 public_dir 相同时原地替换）
+        public_dir: public目录的路径
+        
+    Returns:
+        重排过的文件的相对路径
+    """
+    rewritten = []
+    for path, video in videos.items():
+        if video["moov"] != "end":
+            continue
+        src = os.path.join(public_dir, path)
+        dst = os.path.join(output_dir, path)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        try:
+            if faststart(src, dst):
+                rewritten.append(path)
+                print(f"  ✅ faststart: {path} -> {dst}")
+        except (OSError, MP4Error, struct_error) as e:
+            print(f"  ❌ faststart 失败 {path}: {e}")
+    return rewritten
+
+def refresh_assets(assets: Dict[str, List[Dict]], paths: List[str], hash_cache: HashCache,
+                   public_dir: str = "public") -> int:
+    """
+    原地重排后重新读取这些文件的大小与哈希，返回总字节数的变化量。
+    重排通常不改变文件大小，mtime 精度较粗时缓存可能误判为未变，所以先丢弃旧的缓存项
+    """
+    targets = set(paths)
+    delta = 0
+    for file_list in assets.values():
+        for info in file_list:
+            if info["path"] not in targets:
+                continue
+            file_path = os.path.join(public_dir, info["path"])
+            stat = os.stat(file_path)
+            hash_cache.entries.pop(info["path"], None)
+            delta += stat.st_size - info["size"]
+            info["size"] = stat.st_size
+            info["sizeFormatted"] = format_file_size(stat.st_size)
+            info["hash"] = hash_cache.get_hash(info["path"], file_path, stat)
+    return delta
+
+def build_asset_manifest(assets: Dict[str, List[Dict]], videos: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    生成内容哈希清单，只包含路径、大小、哈希与视频元数据，文件不变时输出也不变
+    
+    Args:
+        assets: 素材信息字典
+        videos: analyze_videos 的返回值，写入对应条目的 "video" 字段
+        
+    Returns:
+        {"version": 清单整体哈希, "files": {相对路径: {"hash", "size", ["video"]}}}
+    """
+    videos = videos or {}
+    files = {}
+    for file_list in assets.values():
+        for info in file_list:
+            entry = {"hash": info["hash"], "size": info["size"]}
+            if info["path"] in videos:
+                entry["video"] = videos[info["path"]]
+            files[info["path"]] = entry
+    files = dict(sorted(files.items()))
+    version = hashlib.sha256(
+        json.dumps(files, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    ).hexdigest()[:HASH_LENGTH]
+    return {"version": version, "files": files}
+
+def write_asset_manifest(manifest: Dict[str, Any], output_file: str = ASSET_MANIFEST_PATH) -> bool:
+    try:
+        write_json_atomic(output_file, manifest, indent=2)
+        print(f"素材哈希清单已生成: {output_file}（版本 {manifest['version']}）")
+        return True
+    except Exception as e:
+        print(f"生成素材哈希清单时出现错误: {e}")
+        return False
+
+def precache_entries(manifest: Dict[str, Any], patterns: List[str] = PRECACHE_PATTERNS) -> Dict[str, str]:
+    """从哈希清单中挑出需要预缓存的文件，返回 {相对路径: 哈希}"""
+    return {
+        path: info["hash"]
+        for path, info in manifest["files"].items()
+        if any(fnmatch.fnmatch(path, pattern) for pattern in patterns)
+    }
+
+def update_service_worker(manifest: Dict[str, Any], sw_file: str = SERVICE_WORKER_PATH) -> bool:
+    """
+    用哈希清单重写 Service Worker 中标记块内的 PRECACHE_MANIFEST，
+    浏览器据此只重新下载哈希变化的文件
+    
+    Args:
+        manifest: build_asset_manifest 的返回值
+        sw_file: Service Worker 文件路径
+    """
+    try:
+        with open(sw_file, "r", encoding="utf-8") as f:
+            content = f.read()
+    except OSError as e:
+        print(f"读取 Service Worker 时出现错误: {e}")
+        return False
+
+    begin = content.find(SW_BLOCK_BEGIN)
+    end = content.find(SW_BLOCK_END)
+    if begin < 0 or end < begin:
+        print(f"Service Worker 中没有找到 {SW_BLOCK_BEGIN} 标记块，跳过更新")
+        return False
+
+    entries = precache_entries(manifest)
+    block = (
+        f"{SW_BLOCK_BEGIN} 由 src/scan_assets.py 根据 asset_manifest.json 生成，请勿手动修改\n"
+        f"const PRECACHE_VERSION = '{manifest['version']}';\n"
+        f"const PRECACHE_MANIFEST = {json.dumps(entries, ensure_ascii=False, indent=2)};\n"
+    )
+    new_content = content[:begin] + block + content[end:]
+    if new_content == content:
+        print("Service Worker 预缓存列表无变化")
+        return True
+    try:
+        write_text_atomic(sw_file, new_content)
+        print(f"Service Worker 预缓存列表已更新: {sw_file}（{len(entries)} 个文件）")
+        return True
+    except Exception as e:
+        print(f"更新 Service Worker 时出现错误: {e}")
+        return False
+
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="素材文件扫描器")
+    parser.add_argument(
+        "--faststart-out",
+        default=None,
+        help="把 moov 在 mdat 之后的视频重排为 faststart，写入该目录（传 public 则原地替换）",
+    )
+    args = parser.parse_args()
+
     print("=== 素材文件扫描器 ===")
     print("正在扫描public目录...")
     
     # 扫描素材文件
-    assets = scan_assets()
+    hash_cache = HashCache()
+    assets, total_size = scan_assets(hash_cache=hash_cache)
     
     if not any(assets.values()):
         print("未找到任何素材文件，请检查目录路径")
         return
     
+    # 分析视频 moov 位置、时长与分辨率，按需生成 faststart 版本
+    videos = analyze_videos(assets)
+    if args.faststart_out:
+        rewritten = faststart_videos(videos, args.faststart_out)
+        print(f"faststart 重排完成: {len(rewritten)} 个文件")
+        if rewritten and os.path.abspath(args.faststart_out) == os.path.abspath("public"):
+            # 原地替换后文件内容已变：重新计算哈希并重新分析，配置与清单才不会引用旧哈希
+            total_size += refresh_assets(assets, rewritten, hash_cache)
+            hash_cache.save({info["path"] for file_list in assets.values() for info in file_list})
+            videos = analyze_videos(assets)
+    
     # 生成JSON配置文件
-    generate_assets_config(assets, "./src/assets/assets_config.json")
+    generate_assets_config(assets, "./src/assets/assets_config.json", total_size)
     
     # 生成JavaScript配置文件
-    generate_js_config(assets, "./src/assets/assets_config.js")
+    generate_js_config(assets, "./src/assets/assets_config.js", total_size)
+    
+    # 生成内容哈希清单，并更新 Service Worker 预缓存列表
+    manifest = build_asset_manifest(assets, videos)
+    write_asset_manifest(manifest)
+    update_service_worker(manifest)
     
     print("\n=== 扫描完成 ===")
     print("现在你可以在React组件中使用这些配置文件了!")
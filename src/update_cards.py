@@ -10,24 +10,49 @@ from pathlib import Path
 - 解析脚本内的 B 站视频信息
 """
 
+import argparse
 import json
+import os
 import time
 import random
 import re
 import html
+from bisect import bisect_right
+import threading
 from copy import deepcopy
 import requests
 import mwclient
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlencode
+from urllib.parse import urljoin, urlencode, urlparse
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from atomic_io import write_json_atomic
+from card_catalog import CATALOG_PATH, CardCatalog
+from cards_index import write_cards_index
+from compact_data import print_size_report, write_data_variants
+from data_manifest import snapshot_data_files, update_data_manifest
+from crawl_engine import (
+    CircuitOpenError,
+    AdaptiveThrottle,
+    HostCircuitBreaker,
+    parse_retry_after,
+    run_concurrently,
+)
+from crawl_metrics import METRICS
+from http_cache import ResponseCache
+from replay import install_transport_hooks, replay_active
+from wiki_html import extract_detail_page, extract_entry_boxes
+
 # -----------------------------
 # 配置
 # -----------------------------
 CARDS_PATH = "src/assets/cards.json"
 POOL_CATEGORIES_PATH = "src/assets/poolCategories.json"
+CARD_REVISIONS_PATH = "src/assets/card_revisions.json"  # 卡名 -> 页面最新 revid（增量模式使用）
+BILIBILI_PAGES_PATH = ".cache/bilibili_pages.json"  # BVID -> 分 P 列表，跨次运行复用
+CHECKPOINT_PATH = ".cache/cards_checkpoint.jsonl"  # 每完成一张卡追加一行，--resume 时读取
+METRICS_PATH = ".cache/crawl_metrics.json"  # 本次运行的请求 / 等待 / 阶段耗时摘要
 WIKI_BASE = "https://wiki.biligame.com/lysk/"
 ENTRY_URL = WIKI_BASE + "%E6%80%9D%E5%BF%B5:%E7%AD%9B%E9%80%89"
 
@@ -48,6 +73,23 @@ HEADERS = {
     "Referer": WIKI_BASE,
 }
 
+# 每个 host 的自适应请求间隔：(下限秒, 上限秒, 初始秒)
+# 初始值与原先每次请求前 sleep 1.5~2.5s 的平均间隔一致，之后按响应情况在上下限之间调整
+HOST_THROTTLE_LIMITS = {
+    "wiki.biligame.com": (0.75, 60.0, 2.0),
+    "api.bilibili.com": (0.5, 60.0, 2.0),
+}
+DEFAULT_HOST_THROTTLE = (1.0, 60.0, 2.0)
+THROTTLE_STATE_PATH = ".cache/throttle_state.json"  # 各 host 收敛后的间隔，跨次运行复用
+DEFAULT_WORKERS = 4  # 全局并发数（不同 host 的请求可以重叠）
+
+# 重试预算与熔断：所有重试层（polite_get、详情页、mwclient、字段完整性）共用
+HOST_RETRY_BUDGET = 60     # 每个 host 每次运行最多重试的次数
+BREAKER_THRESHOLD = 5      # 连续失败多少次后熔断
+BREAKER_COOLDOWN = 120     # 熔断时长（秒），半开探测失败后翻倍
+RETRY_AFTER_MAX_WAIT = 30  # Retry-After 不超过该值时原地等待，否则直接熔断
+RETRY_STATUS = {403, 429, 500, 502, 503, 504, 567}
+
 CATEGORY_PRIORITY = {
     ("wishSeries", "limited"): 1,
     ("wishSeries", "permanent"): 0,
@@ -78,43 +120,136 @@ DEFAULT_POOL_CATEGORIES = {
 # 会话与礼貌访问
 # -----------------------------
 session = requests.Session()
+# 适配器只重试连接失败；状态码重试统一由 polite_get 按重试预算处理，避免多层重试相乘
 retries = Retry(
-    total=5,
+    total=2,
+    connect=2,
+    read=0,
+    status=0,
     backoff_factor=1.4,
-    status_forcelist=[429, 500, 502, 503, 504],
     allowed_methods=["GET"],
     raise_on_status=False,
 )
-session.mount("https://", HTTPAdapter(max_retries=retries))
+session.mount("https://", HTTPAdapter(max_retries=retries, pool_maxsize=16))
 session.headers.update(HEADERS)
+install_transport_hooks(session)  # DEEPSPACE_RECORD_DIR / DEEPSPACE_REPLAY_URL
+
+# 磁盘响应缓存（--no-cache 可关闭）
+RESPONSE_CACHE = ResponseCache()
+
+# 按 host 独立的自适应限速，取代全局的固定 sleep
+HOST_THROTTLE = AdaptiveThrottle(HOST_THROTTLE_LIMITS, DEFAULT_HOST_THROTTLE, THROTTLE_STATE_PATH)
+
+# 按 host 共享的重试预算与熔断器，每次运行开始时复位
+HOST_BREAKER = HostCircuitBreaker(HOST_RETRY_BUDGET, BREAKER_THRESHOLD, BREAKER_COOLDOWN)
+
+
+def record_host_failure(url: str, retry_after: float | None = None) -> None:
+    """记录一次失败；因此熔断时打印提示并计入指标。"""
+    if HOST_BREAKER.record_failure(url, retry_after):
+        METRICS.incr("circuit_trips")
+        print(f"⛔ {urlparse(url).hostname or url} 连续失败，暂停请求该站点", flush=True)
+
+
+def should_retry(url: str, retry_after: float | None = None) -> bool:
+    """
+    是否重试：预算用完、已熔断或 Retry-After 过长时返回 False。
+    退避由 HOST_THROTTLE 完成（失败时已放大该 host 的间隔），Retry-After 推迟该 host 的下一次请求。
+    """
+    if retry_after is not None and retry_after > RETRY_AFTER_MAX_WAIT:
+        return False
+    if not HOST_BREAKER.allow_retry(url):
+        METRICS.incr("retries_denied")
+        return False
+    if retry_after:
+        HOST_THROTTLE.defer(url, retry_after)
+    return True
+
+
+def throttled_call(url: str, func):
+    """不经过 polite_get 的请求（mwclient）同样按 host 限速，并把结果反馈给 HOST_THROTTLE。"""
+    METRICS.record_sleep("throttle", HOST_THROTTLE.acquire(url))
+    started = time.perf_counter()
+    try:
+        result = func()
+    except Exception:
+        HOST_THROTTLE.observe(url, None, time.perf_counter() - started)
+        raise
+    HOST_THROTTLE.observe(url, 200, time.perf_counter() - started)
+    return result
+
+
+def polite_get(url: str, timeout: int = 15, max_retry: int = 3, use_cache: bool = True) -> requests.Response:
+    """
+    按 host 限速的 GET，避免给站点造成压力。遇到拦截 / 服务端错误状态码会重试。
+    TTL 内的磁盘缓存直接返回（不等待）；过期缓存用 ETag / Last-Modified 做条件请求。
+    重试次数受 host 的重试预算限制并遵守 Retry-After；host 熔断时直接抛 CircuitOpenError。
+    """
+    if use_cache:
+        cached = RESPONSE_CACHE.get_fresh(url)
+        if cached is not None:
+            METRICS.record_cache_hit(url)
+            return cached
 
-def polite_get(url: str, timeout: int = 15, max_retry: int = 3) -> requests.Response:
-    """带随机延迟的 GET，避免给站点造成压力。遇到拦截状态码会重试。"""
     last_exc = None
     for attempt in range(1, max_retry + 1):
-        time.sleep(1.5 + random.random())  # 1.5~2.5s
+        try:
+            HOST_BREAKER.before_request(url)
+        except CircuitOpenError:
+            METRICS.incr("circuit_fast_fails")
+            raise
+        METRICS.record_sleep("throttle", HOST_THROTTLE.acquire(url))  # 同一 host 的自适应间隔
         headers = dict(HEADERS)
         headers["User-Agent"] = random.choice(UA_POOL)
+        if use_cache:
+            headers.update(RESPONSE_CACHE.conditional_headers(url))
+        retry_after = None
         try:
-            resp = session.get(url, timeout=timeout, headers=headers)
-            if resp.status_code in {403, 429, 567} and attempt < max_retry:
-                wait = 2 * attempt
-                print(f"⚠️ HTTP {resp.status_code}，{wait}s 后重试 ({attempt}/{max_retry})", flush=True)
-                time.sleep(wait)
+            started = time.perf_counter()
+            try:
+                resp = session.get(url, timeout=timeout, headers=headers)
+            except Exception:
+                METRICS.record_request(url, None, 0, time.perf_counter() - started)
+                HOST_THROTTLE.observe(url, None, time.perf_counter() - started)
+                raise
+            elapsed = time.perf_counter() - started
+            METRICS.record_request(url, resp.status_code, len(resp.content), elapsed)
+            HOST_THROTTLE.observe(url, resp.status_code, elapsed)
+            # HTTPAdapter 内部 Retry 的重试次数
+            adapter_retries = getattr(resp.raw, "retries", None)
+            for _ in getattr(adapter_retries, "history", None) or ():
+                METRICS.record_retry(url)
+            if resp.status_code == 304:
+                HOST_BREAKER.record_success(url)
+                cached = RESPONSE_CACHE.revalidated(url, resp)
+                if cached is not None:
+                    return cached
+                # 缓存文件已被淘汰：下一轮不带条件头重新请求
+                METRICS.record_retry(url)
                 continue
+            if resp.status_code in RETRY_STATUS:
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
             resp.raise_for_status()
+            HOST_BREAKER.record_success(url)
             if not resp.encoding:
                 resp.encoding = resp.apparent_encoding or "utf-8"
+            if use_cache:
+                RESPONSE_CACHE.store(url, resp)
             return resp
         except Exception as exc:
             last_exc = exc
-            if attempt < max_retry:
-                wait = 2 * attempt
-                print(f"⚠️ 请求失败 {attempt}/{max_retry}：{exc}，{wait}s 后重试", flush=True)
-                time.sleep(wait)
-                continue
-            raise
-    raise last_exc
+            status = getattr(getattr(exc, "response", None), "status_code", None)
+            if status is not None and status not in RETRY_STATUS:
+                # 404 等错误说明站点正常响应，重试也无济于事
+                HOST_BREAKER.record_success(url)
+                raise
+            record_host_failure(url, retry_after)
+            if attempt >= max_retry or not should_retry(url, retry_after):
+                raise
+            wait = max(retry_after or 0.0, HOST_THROTTLE.interval(url))
+            print(f"⚠️ 请求失败 {attempt}/{max_retry}：{exc}，约 {wait:.1f}s 后重试", flush=True)
+            METRICS.record_retry(url)
+    raise last_exc or requests.HTTPError(f"304 后缓存缺失，放弃请求：{url}")
 
 # -----------------------------
 # 工具函数
@@ -138,6 +273,8 @@ WIKI_LINK_RE = re.compile(r"\[\[([^\]]+)\]\]")
 FULL_WIDTH_BRACKET_RE = re.compile(r"【([^】]+)】")
 QUOTE_NAME_RE = re.compile(r"「([^」]+)」")
 EVENT_GAIN_RE = re.compile(r"^在?(.+?)活动中获取$")
+PART_SPACE_RE = re.compile(r"\s+")
+PART_PUNCT_RE = re.compile(r"[【】「」\[\]（）()《》〈〉·•、，。？！!?:;\"'“”\-_.]")
 
 def extract_bili_script_info(html_bytes_or_text) -> tuple[str, str]:
     """
@@ -175,38 +312,152 @@ def normalize_event_pool_name(name: str) -> str:
 def normalize_part_name(value: str) -> str:
     if not value:
         return ""
-    text = str(value).lower()
-    text = re.sub(r"\s+", "", text)
-    return re.sub(r"[【】「」\[\]（）()《》〈〉·•、，。？！!?:;\"'“”\-_.]", "", text)
+    text = PART_SPACE_RE.sub("", str(value).lower())
+    return PART_PUNCT_RE.sub("", text)
 
 
-def fetch_bilibili_page(bvid: str, pname: str) -> int | None:
-    if not bvid:
-        return None
-    api = f"https://api.bilibili.com/x/web-interface/view?bvid={bvid}"
-    try:
-        resp = polite_get(api)
-        data = resp.json() or {}
-        pages = (data.get("data") or {}).get("pages") or []
-        if not pages:
+class PartNameIndex:
+    """
+    单个视频的分 P 名称索引，构建一次后可反复查询，匹配优先级与逐页扫描一致：
+    1. 原始标题完全相同
+    2. 规范化后相等（字典查找）
+    3. 规范化后的分 P 标题包含目标（在拼接串上 str.find）
+    4. 规范化后的分 P 标题被目标包含（枚举目标子串做字典查找）
+    同一优先级内取页面顺序最靠前的一项。
+    """
+
+    SEPARATOR = "\x00"
+
+    def __init__(self, pages: list[dict]):
+        self.pages = pages
+        self.first_page = int(pages[0].get("page") or 1) if pages else None
+        self._raw: dict[str, int] = {}
+        self._norm: dict[str, int] = {}  # 规范化标题 -> 最靠前的下标
+        norms = []
+        for order, p in enumerate(pages):
+            part = p.get("part")
+            if part is not None:
+                self._raw.setdefault(part, order)
+            norm = normalize_part_name(part)
+            self._norm.setdefault(norm, order)
+            norms.append(norm)
+        self._joined = self.SEPARATOR.join(norms)
+        # 每个分 P 在拼接串中的起始偏移，用于把 find 的位置映射回下标
+        self._offsets = []
+        offset = 0
+        for norm in norms:
+            self._offsets.append(offset)
+            offset += len(norm) + 1
+
+    def _page_at(self, order: int) -> int:
+        return int(self.pages[order].get("page") or 1)
+
+    def lookup(self, pname: str) -> int | None:
+        if not self.pages:
             return None
         if not pname:
-            return int(pages[0].get("page") or 1)
+            return self.first_page
         target = pname.strip()
-        hit = next((p for p in pages if p.get("part") == target), None)
-        if not hit:
-            norm_target = normalize_part_name(target)
-            hit = next((p for p in pages if normalize_part_name(p.get("part")) == norm_target), None)
-        if not hit:
-            norm_target = normalize_part_name(target)
-            hit = next((p for p in pages if norm_target in normalize_part_name(p.get("part"))), None)
-        if not hit:
-            norm_target = normalize_part_name(target)
-            hit = next((p for p in pages if normalize_part_name(p.get("part")) in norm_target), None)
-        return int(hit.get("page") or 1) if hit else None
-    except Exception as e:
-        print(f"⚠️ Bilibili API 失败: {e}", flush=True)
+        order = self._raw.get(target)
+        if order is not None:
+            return self._page_at(order)
+
+        norm_target = normalize_part_name(target)
+        order = self._norm.get(norm_target)
+        if order is not None:
+            return self._page_at(order)
+
+        pos = self._joined.find(norm_target)
+        if pos >= 0:
+            return self._page_at(bisect_right(self._offsets, pos) - 1)
+
+        best = self._norm.get("")
+        length = len(norm_target)
+        for i in range(length):
+            for j in range(i + 1, length + 1):
+                order = self._norm.get(norm_target[i:j])
+                if order is not None and (best is None or order < best):
+                    best = order
+        return self._page_at(best) if best is not None else None
+
+
+# —— B 站分 P 列表缓存：同一个 BVID 每次运行最多请求一次，并持久化到磁盘
+_bili_pages: dict[str, list[dict] | None] = {}
+_bili_refreshed: set[str] = set()  # 本次运行中已从接口拉取过的 BVID
+_bili_loaded = False
+_bili_lock = threading.Lock()
+_bili_bvid_locks: dict[str, threading.Lock] = {}
+
+
+def load_bilibili_pages_cache() -> None:
+    global _bili_loaded
+    with _bili_lock:
+        if _bili_loaded:
+            return
+        _bili_loaded = True
+        for bvid, pages in load_json_file(BILIBILI_PAGES_PATH, {}).items():
+            _bili_pages.setdefault(bvid, pages)
+
+
+def save_bilibili_pages_cache() -> None:
+    with _bili_lock:
+        data = {bvid: pages for bvid, pages in sorted(_bili_pages.items()) if pages}
+    write_json_atomic(BILIBILI_PAGES_PATH, data)
+
+
+def get_bilibili_pages(bvid: str, refresh: bool = False) -> list[dict] | None:
+    """
+    返回视频的分 P 列表 [{"page", "part"}]。
+    默认优先使用内存 / 磁盘缓存；refresh=True 时绕过缓存重新请求（每次运行每个 BVID 至多一次）。
+    """
+    load_bilibili_pages_cache()
+    with _bili_lock:
+        bvid_lock = _bili_bvid_locks.setdefault(bvid, threading.Lock())
+    # 按 BVID 加锁：并发处理同一视频的多张卡片时只发一次请求
+    with bvid_lock:
+        if bvid in _bili_pages and not (refresh and bvid not in _bili_refreshed):
+            return _bili_pages[bvid]
+        api = f"https://api.bilibili.com/x/web-interface/view?bvid={bvid}"
+        pages = None
+        try:
+            resp = polite_get(api, use_cache=not refresh)
+            data = resp.json() or {}
+            pages = [
+                {"page": int(p.get("page") or 1), "part": p.get("part") or ""}
+                for p in (data.get("data") or {}).get("pages") or []
+            ]
+        except Exception as e:
+            print(f"⚠️ Bilibili API 失败: {e}", flush=True)
+        with _bili_lock:
+            _bili_pages[bvid] = pages
+            _bili_refreshed.add(bvid)
+        return pages
+
+
+_bili_indexes: dict[str, PartNameIndex] = {}
+
+
+def get_part_index(bvid: str, pages: list[dict]) -> PartNameIndex:
+    """每个视频的分 P 索引只构建一次；分 P 列表刷新后自动重建。"""
+    with _bili_lock:
+        index = _bili_indexes.get(bvid)
+        if index is None or index.pages is not pages:
+            index = PartNameIndex(pages)
+            _bili_indexes[bvid] = index
+        return index
+
+
+@METRICS.timed("fetch_bilibili_page")
+def fetch_bilibili_page(bvid: str, pname: str) -> int | None:
+    if not bvid:
         return None
+    pages = get_bilibili_pages(bvid)
+    page = get_part_index(bvid, pages).lookup(pname) if pages else None
+    if page is None and bvid not in _bili_refreshed:
+        # 磁盘缓存里的分 P 列表可能已过时（合集新增了分 P），重新拉取一次
+        pages = get_bilibili_pages(bvid, refresh=True)
+        page = get_part_index(bvid, pages).lookup(pname) if pages else None
+    return page
 
 
 def clean_pool_name(text: str) -> str:
@@ -295,28 +546,43 @@ def classify_pool_category(card: dict) -> tuple[str, str | None]:
     return "specialRewards", None
 
 
-def update_pool_categories_from_cards(cards: list[dict]) -> dict:
+def assign_card_pool(card: dict) -> tuple[str, tuple[str, str | None]]:
+    """返回卡片所属卡池名与分类；无法确定卡池时卡池名为空字符串。"""
+    raw_get_value = card.get("get", "")
+    category_info = classify_pool_category(card)
+    pool_name = extract_pool_name(raw_get_value)
+    if category_info == ("wishSeries", "limited"):
+        quoted_name = extract_first_quote_name(raw_get_value)
+        if quoted_name:
+            pool_name = quoted_name
+    elif category_info[0] == "specialRewards":
+        pool_name = (card.get("name") or "").strip() or pool_name
+    return pool_name, category_info
+
+
+def map_cards_to_pools(cards: list[dict]) -> list[tuple[str, tuple[str, str | None]]]:
+    """按 cards 顺序给出每张卡的 (卡池名, 分类)，供卡池分类与卡片索引共用。"""
+    return [assign_card_pool(card) for card in cards]
+
+
+@METRICS.timed("update_pool_categories_from_cards")
+def update_pool_categories_from_cards(
+    cards: list[dict],
+    card_pools: list[tuple[str, tuple[str, str | None]]] | None = None,
+) -> dict:
     def is_five_star(card_obj: dict) -> bool:
         star_value = (card_obj.get("star") or "").strip()
         return star_value.startswith("5")
 
+    if card_pools is None:
+        card_pools = map_cards_to_pools(cards)
     categories = ensure_pool_category_structure()
     pool_assignments: dict[str, tuple[str, str | None, int]] = {}
     pool_metadata: dict[str, dict] = {}
 
-    for card in cards:
+    for card, (pool_name, category_info) in zip(cards, card_pools):
         if not is_five_star(card):
             continue
-        raw_get_value = card.get("get", "")
-        base_pool_name = extract_pool_name(raw_get_value)
-        category_info = classify_pool_category(card)
-        pool_name = base_pool_name
-        if category_info == ("wishSeries", "limited"):
-            quoted_name = extract_first_quote_name(raw_get_value)
-            if quoted_name:
-                pool_name = quoted_name
-        elif category_info[0] == "specialRewards":
-            pool_name = (card.get("name") or "").strip() or pool_name
         if not pool_name:
             continue
 
@@ -364,8 +630,7 @@ def update_pool_categories_from_cards(cards: list[dict]) -> dict:
             categories[cat_key].setdefault("pools", [])
             categories[cat_key]["pools"].append(entry)
 
-    with open(POOL_CATEGORIES_PATH, "w", encoding="utf-8") as fh:
-        json.dump(categories, fh, ensure_ascii=False, indent=2)
+    write_json_atomic(POOL_CATEGORIES_PATH, categories, indent=2)
     print(f"🎯 已更新 {POOL_CATEGORIES_PATH}，共写入 {len(pool_assignments)} 个卡池。", flush=True)
 
     return categories
@@ -375,12 +640,16 @@ def update_pool_categories_from_cards(cards: list[dict]) -> dict:
 # -----------------------------
 _mw_site: mwclient.Site | None = None
 _mw_site_unavailable = False
+_mw_lock = threading.RLock()  # mwclient 连接不保证线程安全，逐页读取串行执行
 
 def _get_mw_site(max_tries: int = 3) -> mwclient.Site | None:
     """
     初始化 mwclient.Site，带有限次数重试，避免瞬时网络抖动导致脚本崩溃。
     """
     global _mw_site, _mw_site_unavailable
+    if replay_active():
+        # 回放模式下 mwclient 会绕过替身服务器直连 wiki，统一改走 api.php
+        _mw_site_unavailable = True
     if _mw_site_unavailable:
         return None
     if _mw_site is not None:
@@ -388,20 +657,30 @@ def _get_mw_site(max_tries: int = 3) -> mwclient.Site | None:
 
     for attempt in range(1, max_tries + 1):
         try:
-            site = mwclient.Site(
+            HOST_BREAKER.before_request(WIKI_BASE)
+        except CircuitOpenError:
+            # 熔断只是暂时的，不标记为不可用；调用方回退到 api.php（同样会快速失败）
+            METRICS.incr("circuit_fast_fails")
+            return None
+        try:
+            site = throttled_call(WIKI_BASE, lambda: mwclient.Site(
                 host="wiki.biligame.com",
                 path="/lysk/",
                 clients_useragent=random.choice(UA_POOL),
-            )
+            ))
+            HOST_BREAKER.record_success(WIKI_BASE)
             _mw_site = site
             return site
         except Exception as exc:
-            wait = 2 * attempt
+            record_host_failure(WIKI_BASE)
+            if attempt >= max_tries or not should_retry(WIKI_BASE):
+                print(f"⚠️ mwclient 初始化失败 {attempt}/{max_tries}：{exc}", flush=True)
+                break
             print(
-                f"⚠️ mwclient 初始化失败 {attempt}/{max_tries}：{exc}，{wait}s 后重试",
+                f"⚠️ mwclient 初始化失败 {attempt}/{max_tries}：{exc}，"
+                f"约 {HOST_THROTTLE.interval(WIKI_BASE):.1f}s 后重试",
                 flush=True,
             )
-            time.sleep(wait)
     _mw_site_unavailable = True
     return None
 
@@ -433,11 +712,101 @@ def fetch_wiki_text_via_api(card_name: str) -> str:
         print(f"⚠️ api.php 获取失败 {card_name}: {exc}", flush=True)
     return ""
 
+WIKI_BATCH_SIZE = 50  # api.php 对普通用户每次最多接受 50 个标题
+
+
+def _revision_text(rev: dict) -> str:
+    slots = rev.get("slots") or {}
+    main = slots.get("main") or {}
+    return main.get("*") or rev.get("*") or ""
+
+
+def fetch_wiki_texts_batch(titles: list[str], batch_size: int = WIKI_BATCH_SIZE) -> dict[str, dict]:
+    """
+    批量读取页面最新版本的 wikitext（action=query&prop=revisions），每批最多 50 个标题。
+    返回 {卡名: {"text", "revid", "timestamp"}}；
+    - 处理 continue 续查（内容过大时 api 会把后续页面放到下一次响应里）
+    - 标题规范化 / 重定向会映射回原始卡名
+    - 不存在或读取失败的标题不出现在结果中，由调用方回退到逐页读取
+    """
+    results: dict[str, dict] = {}
+    for start in range(0, len(titles), batch_size):
+        chunk = titles[start:start + batch_size]
+        params = {
+            "action": "query",
+            "prop": "revisions",
+            "rvprop": "content|ids|timestamp",
+            "rvslots": "main",
+            "redirects": "1",
+            "format": "json",
+            "titles": "|".join(chunk),
+        }
+        # 规范化 / 重定向后的标题 -> 原始卡名
+        aliases: dict[str, str] = {}
+        continue_params: dict = {}
+        while True:
+            api_url = f"{WIKI_BASE}api.php?{urlencode({**params, **continue_params})}"
+            try:
+                resp = polite_get(api_url)
+                data = resp.json() or {}
+            except Exception as exc:
+                print(f"⚠️ 批量获取 wikitext 失败（{start + 1}-{start + len(chunk)}）：{exc}", flush=True)
+                break
+
+            query = data.get("query") or {}
+            for key in ("normalized", "redirects"):
+                for item in query.get(key) or []:
+                    source, target = item.get("from"), item.get("to")
+                    if source and target:
+                        aliases[target] = aliases.get(source, source)
+            for page in (query.get("pages") or {}).values():
+                if "missing" in page or "invalid" in page:
+                    continue
+                revisions = page.get("revisions") or []
+                if not revisions:
+                    continue  # 内容在续查响应中
+                rev = revisions[0]
+                title = page.get("title") or ""
+                results[aliases.get(title, title)] = {
+                    "text": _revision_text(rev),
+                    "revid": rev.get("revid"),
+                    "timestamp": rev.get("timestamp") or "",
+                }
+
+            if "continue" not in data:
+                break
+            continue_params = data["continue"]
+
+        missing = [name for name in chunk if name not in results]
+        if missing:
+            print(f"⚠️ 批量结果缺少 {len(missing)} 个页面：{'、'.join(missing)}", flush=True)
+    return results
+
+
+@METRICS.timed("wiki_detailed_info_batch")
+def wiki_detailed_info_batch(titles: list[str]) -> tuple[dict[str, dict], dict[str, dict]]:
+    """
+    批量版的 wiki_detailed_info：返回 (卡名 -> 解析后的字段, 卡名 -> revid/timestamp)。
+    """
+    pages = fetch_wiki_texts_batch(titles)
+    infos = {name: parse_wiki_text(page["text"]) for name, page in pages.items() if page["text"]}
+    revisions = {
+        name: {"revid": page["revid"], "timestamp": page["timestamp"]}
+        for name, page in pages.items()
+    }
+    return infos, revisions
+
+@METRICS.timed("wiki_detailed_info")
 def wiki_detailed_info(card_name: str) -> dict:
     """
     使用 mwclient 读取页面文本并解析字段。
     兼容模板行前导 '|'；失败返回 {}。
     """
+    with _mw_lock:
+        return _wiki_detailed_info_locked(card_name)
+
+
+def _wiki_detailed_info_locked(card_name: str) -> dict:
     global _mw_site, _mw_site_unavailable
     site = _get_mw_site()
     if site is None:
@@ -459,12 +828,20 @@ def wiki_detailed_info(card_name: str) -> dict:
     max_tries = 5
     for i in range(1, max_tries + 1):
         try:
-            page = site.pages[card_name]
-            text = page.text() or ""
+            HOST_BREAKER.before_request(WIKI_BASE)
+        except CircuitOpenError as e:
+            METRICS.incr("circuit_fast_fails")
+            print(f"⏭️ 跳过 {card_name}：{e}", flush=True)
+            return {}
+        try:
+            text = throttled_call(WIKI_BASE, lambda: site.pages[card_name].text()) or ""
+            HOST_BREAKER.record_success(WIKI_BASE)
             return parse_wiki_text(text)
         except Exception as e:
             print(f"⚠️ mwclient 获取失败 {card_name} ({i}/{max_tries}): {e}", flush=True)
-            time.sleep(2 * i)
+            record_host_failure(WIKI_BASE)
+            if i >= max_tries or not should_retry(WIKI_BASE):
+                break
             _mw_site = None  # 强制下一轮重新初始化连接
             site = _get_mw_site()
             if site is None:
@@ -507,6 +884,7 @@ def is_card_data_complete(card: dict) -> bool:
 # -----------------------------
 # 详情页解析
 # -----------------------------
+@METRICS.timed("fetch_detail_image")
 def fetch_detail_image(detail_url: str, card_name: str, max_retry: int = 3):
     """
     返回：small_img, big_img, video_bvid, video_page
@@ -520,106 +898,434 @@ def fetch_detail_image(detail_url: str, card_name: str, max_retry: int = 3):
     for attempt in range(1, max_retry + 1):
         try:
             res = polite_get(detail_url)
-            soup = BeautifulSoup(res.content, "html.parser")
+
+            # 单次流式扫描取图片与 Bvid / Pname；结构异常时回退到 BeautifulSoup
+            with METRICS.stage("html_parse"):
+                extracted = extract_detail_page(res.content, BILI_BVID_RE, BILI_PNAME_RE)
+                if extracted is not None:
+                    img = extracted["img"]
+                    video_bvid, video_pname = extracted["bvid"], extracted["pname"]
+                else:
+                    METRICS.incr("html_soup_fallbacks")
+                    soup = BeautifulSoup(res.content, "html.parser")
+                    img = soup.select_one(".center img") or soup.select_one("img")
+                    video_bvid, video_pname = extract_bili_script_info(res.content)
 
             # 图片：只引用链接，不拼直链
-            img = soup.select_one(".center img") or soup.select_one("img")
             if img:
                 src = img.get("src", "") or ""
                 srcset = img.get("srcset", "") or ""
                 big_img = parse_best_from_srcset(srcset) or src
                 small_img = src
 
-            # 视频：从脚本中解析 Bvid / Pname
-            video_bvid, video_pname = extract_bili_script_info(res.content)
+            # 视频：按脚本中的 Bvid / Pname 定位分 P
             if video_bvid:
                 video_page = fetch_bilibili_page(video_bvid, video_pname) or 1
 
             # 成功则直接返回
             return small_img, big_img, video_bvid, video_page
 
+        except CircuitOpenError as e:
+            print(f"⏭️ 跳过详情页 {card_name}：{e}", flush=True)
+            break
         except Exception as e:
             print(f"❌ 第 {attempt} 次获取详情页失败：{detail_url}，错误：{e}", flush=True)
-            if attempt < max_retry:
-                print(f"🔁 {1 if max_retry - attempt == 1 else max_retry - attempt} 次重试剩余，等待 1 秒后重试...", flush=True)
-                time.sleep(1)
+            # 请求层已按预算重试过，这里的重试同样从预算中扣除
+            if attempt < max_retry and HOST_BREAKER.allow_retry(detail_url):
+                # 不再单独等待：下一次请求的间隔由 HOST_THROTTLE 决定
+                print(f"🔁 {1 if max_retry - attempt == 1 else max_retry - attempt} 次重试剩余，稍后重试...", flush=True)
             else:
-                print("🚫 已达到最大重试次数，放弃重试。", flush=True)
+                print("🚫 已达到最大重试次数或重试预算已用完，放弃重试。", flush=True)
+                break
 
     # 全部失败则返回空结果
     return small_img, big_img, video_bvid, video_page
 
+# -----------------------------
+# 断点续爬
+# -----------------------------
+class CrawlJournal:
+    """
+    追加写的 JSON Lines 断点日志：每张卡爬完立即写入一行 {"name", "card", "revid"}。
+    进程被中断后用 --resume 重跑，已完成的卡片直接从日志恢复。
+    """
+
+    def __init__(self, path: str = CHECKPOINT_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._fh = None
+
+    def load(self) -> dict[str, dict]:
+        """读取日志，返回 {卡名: 记录}；最后一行写到一半时忽略该行。"""
+        records: dict[str, dict] = {}
+        if not self.path.exists():
+            return records
+        with self.path.open("r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("type") == "header":
+                    age = (time.time() - float(record.get("started_at") or 0)) / 3600
+                    print(f"♻️ 断点日志创建于 {age:.1f} 小时前", flush=True)
+                    continue
+                if record.get("name") and isinstance(record.get("card"), dict):
+                    records[record["name"]] = record
+        return records
+
+    def open(self, resume: bool) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and self.path.exists():
+            torn = False
+            with self.path.open("rb") as fh:
+                if fh.seek(0, os.SEEK_END) > 0:
+                    fh.seek(-1, os.SEEK_END)
+                    torn = fh.read(1) != b"\n"
+            self._fh = self.path.open("a", encoding="utf-8")
+            if torn:
+                self._fh.write("\n")  # 上次写到一半的行单独成行，读取时会被忽略
+            return
+        self._fh = self.path.open("w", encoding="utf-8")
+        self._write({"type": "header", "started_at": time.time()})
+
+    def _write(self, record: dict) -> None:
+        self._fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+
+    def append(self, name: str, card: dict, revid: int | None) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._write({"name": name, "card": card, "revid": revid})
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    def discard(self) -> None:
+        """结果已完整写出，删除日志。"""
+        self.close()
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+
 # -----------------------------
 # 主流程
 # -----------------------------
-def main():
-    print("🚀 开始爬取：", ENTRY_URL, flush=True)
-    all_cards = []
+def load_json_file(path: str, default):
+    file_path = Path(path)
+    if not file_path.exists():
+        return default
+    try:
+        with file_path.open("r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except Exception as exc:
+        print(f"⚠️ 读取 {path} 失败：{exc}", flush=True)
+        return default
 
-    # 入口页
-    entry = polite_get(ENTRY_URL)
-    soup = BeautifulSoup(entry.text, "html.parser")
-    boxes = soup.select("div.divsort") or []
-    print(f"共发现卡片：{len(boxes)}", flush=True)
 
-    for idx, box in enumerate(boxes, 1):
-        name_el = box.select_one(".card-name")
-        if not name_el:
-            continue
-        card_name = name_el.text.strip()
-        print(f"{idx}. {card_name}", flush=True)
+@METRICS.timed("entry_parse")
+def parse_entry_boxes(entry_html: str | bytes) -> list[dict]:
+    """解析入口页的 div.divsort，返回卡名、详情链接与列表小图。"""
+    boxes = extract_entry_boxes(entry_html)
+    if boxes is None:
+        print("⚠️ 入口页流式解析失败，回退到 BeautifulSoup", flush=True)
+        boxes = _entry_boxes_via_soup(entry_html)
 
-        # 基础信息（mwclient）
-        info = wiki_detailed_info(card_name)
+    entries = []
+    for box in boxes:
+        if not box["name"]:
+            continue
 
         # 详情链接
-        detail_a = box.select_one(".card-img a")
-        detail_url = urljoin(WIKI_BASE, detail_a.get("href")) if (detail_a and detail_a.get("href")) else ""
+        detail_url = urljoin(WIKI_BASE, box["href"]) if box["href"] else ""
 
         # 列表中的小图（兜底）
         list_small = ""
-        img_in_list = box.select_one("a.image img")
+        img_in_list = box["img"]
         if img_in_list:
             list_small = parse_best_from_srcset(img_in_list.get("srcset", "") or "") or img_in_list.get("src", "") or ""
 
-        # 详情页图片/视频
-        small_img = big_img = video_bvid = ""
-        video_page = None
-        if detail_url:
-            small_img, big_img, video_bvid, video_page = fetch_detail_image(detail_url, card_name)
-
-        # 字段完整性重试（最多 3 次）
-        tries = 0
-        while not is_card_data_complete(info) and tries < 3:
-            print(f"  ↺ 字段不全，重试 {tries+1}/3：{card_name}", flush=True)
-            time.sleep(2)
+        entries.append({
+            "name": box["name"],
+            "detail_url": detail_url,
+            "list_small": list_small,
+        })
+    return entries
+
+
+def _entry_boxes_via_soup(entry_html: str | bytes) -> list[dict]:
+    soup = BeautifulSoup(entry_html, "html.parser")
+    boxes = []
+    for box in soup.select("div.divsort") or []:
+        name_el = box.select_one(".card-name")
+        detail_a = box.select_one(".card-img a")
+        img_in_list = box.select_one("a.image img")
+        boxes.append({
+            "name": name_el.text.strip() if name_el else "",
+            "href": detail_a.get("href") if detail_a else None,
+            "img": img_in_list.attrs if img_in_list else None,
+        })
+    return boxes
+
+
+def crawl_card(card_name: str, detail_url: str, list_small: str, info: dict | None = None) -> dict:
+    """
+    单张卡片的完整流程：wiki 字段 + 详情页图片/视频 + 字段完整性重试。
+    info 为批量读取得到的字段，缺失时回退到逐页读取。
+    """
+    # 基础信息（批量结果优先，否则 mwclient）
+    info = dict(info) if info else wiki_detailed_info(card_name)
+
+    # 详情页图片/视频
+    small_img = big_img = video_bvid = ""
+    video_page = None
+    if detail_url:
+        small_img, big_img, video_bvid, video_page = fetch_detail_image(detail_url, card_name)
+
+    # 字段完整性重试（最多 3 次）
+    tries = 0
+    while not is_card_data_complete(info) and tries < 3:
+        # 字段重试同样从 wiki 的重试预算中扣除；熔断时直接放弃
+        if not HOST_BREAKER.allow_retry(WIKI_BASE):
+            break
+        print(f"  ↺ 字段不全，重试 {tries+1}/3：{card_name}", flush=True)
+        with METRICS.stage("completeness_retry"):
             info = wiki_detailed_info(card_name)
-            tries += 1
+        tries += 1
 
-        # 最终图链接
-        final_small = small_img or list_small or ""
-        final_big = big_img or final_small
+    # 最终图链接
+    final_small = small_img or list_small or ""
+    final_big = big_img or final_small
+
+    # 汇总
+    info["image_small"] = final_small
+    info["image"] = final_big
+    info["video_bvid"] = video_bvid
+    info["video_page"] = video_page
+    return info
 
-        # 汇总
-        info["image_small"] = final_small
-        info["image"] = final_big
-        info["video_bvid"] = video_bvid
-        info["video_page"] = video_page
 
-        all_cards.append(info)
+def main(incremental: bool = False, workers: int = DEFAULT_WORKERS, resume: bool = False):
+    """
+    incremental=True 时读取现有 cards.json，只对新增、字段不全或 wiki 页面
+    revid 变化的卡片走完整流程，其余直接沿用旧数据。
+    workers 为同时处理的卡片数，各 host 的请求间隔由 HOST_THROTTLE 保证。
+    resume=True 时从断点日志恢复上次中断前已完成的卡片。
+    """
+    METRICS.reset()
+    HOST_BREAKER.reset()
+    journal = CrawlJournal()
+    checkpoint = journal.load() if resume else {}
+    if resume:
+        print(f"♻️ 断点续爬：日志中已有 {len(checkpoint)} 张卡片", flush=True)
+
+    print("🚀 开始爬取：", ENTRY_URL, flush=True)
 
+    # 入口页
+    entry = polite_get(ENTRY_URL)
+    entries = parse_entry_boxes(entry.content)
+    print(f"共发现卡片：{len(entries)}", flush=True)
+    if not entries:
+        # 入口页结构变化或返回了错误页：继续下去会把目录中的卡片全部标记为移除并导出空列表
+        raise RuntimeError(f"{ENTRY_URL} 中没有解析到任何卡片，放弃本次更新")
+
+    # 上次保存的卡片（来自卡片目录）：增量模式下直接沿用，站点熔断时作为爬取失败卡片的回退
+    with CardCatalog(CATALOG_PATH) as catalog:
+        imported = catalog.sync_from_json(CARDS_PATH, CARD_REVISIONS_PATH, map_cards_to_pools)
+        if imported:
+            print(
+                f"🗃️ 卡片目录按 {CARDS_PATH} 同步：新增 {imported['added']}，"
+                f"修改 {imported['changed']}，移除 {imported['removed']}，跳过 {imported['skipped']}",
+                flush=True,
+            )
+        previous_cards: dict[str, dict] = catalog.cards_by_name()
+        old_revisions: dict[str, int] = catalog.revisions()
+    existing: dict[str, dict] = previous_cards if incremental else {}
+    # 一次性批量读取所有卡片的 wikitext 与 revid（约 400 页 -> 8 次请求）
+    wiki_infos, wiki_revisions = wiki_detailed_info_batch([e["name"] for e in entries])
+    latest_revisions = {
+        name: rev["revid"] for name, rev in wiki_revisions.items() if rev.get("revid") is not None
+    }
+    if incremental and not latest_revisions:
+        print("⚠️ 未获取到任何 revid，仅按新增/字段不全判断是否重新爬取", flush=True)
+
+    revisions: dict[str, int] = {}
+    resumed = 0
+    slots: list[dict | None] = []
+    pending: list[tuple[int, dict]] = []
+    for idx, entry_info in enumerate(entries, 1):
+        card_name = entry_info["name"]
+        old_card = existing.get(card_name)
+        latest_rev = latest_revisions.get(card_name)
+        # 没有旧 revid 记录时无法判断是否修订过，直接以本次 revid 作为基线
+        revision_changed = (
+            latest_rev is not None
+            and card_name in old_revisions
+            and old_revisions[card_name] != latest_rev
+        )
+        if old_card and is_card_data_complete(old_card) and not revision_changed:
+            slots.append(old_card)
+            baseline = latest_rev if latest_rev is not None else old_revisions.get(card_name)
+            if baseline is not None:
+                revisions[card_name] = baseline
+            continue
 
-    # with Path(CARDS_PATH).open("r", encoding="utf-8") as fh:
-    #     all_cards = json.load(fh)
+        if latest_rev is not None:
+            revisions[card_name] = latest_rev
+        done = checkpoint.get(card_name)
+        if done and is_card_data_complete(done["card"]) and (
+            latest_rev is None or done.get("revid") in (None, latest_rev)
+        ):
+            slots.append(done["card"])
+            resumed += 1
+            continue
 
-    # 卡池分类
-    update_pool_categories_from_cards(all_cards)
+        slots.append(None)
+        pending.append((idx, entry_info))
+
+    circuit_fallbacks: set[str] = set()
+
+    def crawl_entry(item: tuple[int, dict]) -> dict:
+        idx, entry_info = item
+        print(f"{idx}. {entry_info['name']}", flush=True)
+        card = crawl_card(
+            entry_info["name"],
+            entry_info["detail_url"],
+            entry_info["list_small"],
+            info=wiki_infos.get(entry_info["name"]),
+        )
+        if not is_card_data_complete(card) and any(
+            HOST_BREAKER.is_open(url) for url in (WIKI_BASE, entry_info["detail_url"]) if url
+        ):
+            # 站点熔断导致的残缺结果不写入断点日志，下次运行重新爬取
+            previous = previous_cards.get(entry_info["name"])
+            if previous:
+                METRICS.incr("cards_circuit_fallback")
+                circuit_fallbacks.add(entry_info["name"])
+                return previous
+            return card
+        journal.append(entry_info["name"], card, latest_revisions.get(entry_info["name"]))
+        return card
+
+    # 不同卡片的详情页 / B 站接口并发执行，结果按入口页顺序写回
+    journal.open(resume)
+    try:
+        crawled = run_concurrently(crawl_entry, pending, workers)
+    finally:
+        journal.close()
+    for (idx, _), card in zip(pending, crawled):
+        slots[idx - 1] = card
+    # 沿用旧数据的卡片保留旧 revid，下次增量运行时仍会判定为已修订
+    for name in circuit_fallbacks:
+        if name in old_revisions:
+            revisions[name] = old_revisions[name]
+        else:
+            revisions.pop(name, None)
+    all_cards = [card for card in slots if card is not None]
+    reused = len(entries) - len(pending) - resumed
+    if resume:
+        print(f"♻️ 从断点日志恢复 {resumed} 张卡片", flush=True)
+    METRICS.incr("cards_total", len(entries))
+    METRICS.incr("cards_crawled", len(pending))
+    METRICS.incr("cards_reused", reused)
+    METRICS.incr("cards_resumed", resumed)
+    for host, state in HOST_BREAKER.snapshot().items():
+        if state["trips"] or state["fast_fails"]:
+            print(
+                f"⛔ {host}：熔断 {state['trips']} 次，快速失败 {state['fast_fails']} 次，"
+                f"重试 {state['retries']} 次（剩余预算 {state['budget_left']}）",
+                flush=True,
+            )
 
-    # 保存
-    with open(CARDS_PATH, "w", encoding="utf-8") as f:
-        json.dump(all_cards, f, ensure_ascii=False, indent=2)
+    if incremental:
+        removed = len(set(existing) - {e["name"] for e in entries})
+        print(
+            f"📦 增量模式：沿用 {reused} 张，重新爬取 {len(pending)} 张，移除 {removed} 张",
+            flush=True,
+        )
+
+    save_bilibili_pages_cache()
+
+    # 覆盖前的旧数据，用于生成增量
+    previous_data = snapshot_data_files(os.path.dirname(CARDS_PATH))
+
+    # 写入卡片目录（记录逐字段变更），JSON 文件都从目录导出
+    card_pools = map_cards_to_pools(all_cards)
+    with CardCatalog(CATALOG_PATH) as catalog:
+        changes = catalog.upsert_cards(
+            all_cards, card_pools, revisions, mode="incremental" if incremental else "full"
+        )
+        catalog.sync_bilibili_pages(dict(_bili_pages))
+        print(
+            f"🗃️ 卡片目录：新增 {changes['added']}，修改 {changes['changed']}，"
+            f"移除 {changes['removed']}，未变 {changes['unchanged']}，跳过 {changes['skipped']}",
+            flush=True,
+        )
+        all_cards = catalog.export_cards()
+        revisions = catalog.revisions()
+
+        # 卡池分类（目录按卡名去重，重新映射保证与导出的列表一一对应）
+        card_pools = map_cards_to_pools(all_cards)
+        update_pool_categories_from_cards(all_cards, card_pools)
+
+        # 保存
+        write_json_atomic(CARDS_PATH, all_cards, indent=2)
+        write_json_atomic(CARD_REVISIONS_PATH, revisions, indent=2, sort_keys=True)
+        with open(CARDS_PATH, "rb") as f:
+            catalog.mark_exported(f.read())
+    # 抽卡 / 筛选索引
+    write_cards_index(os.path.dirname(CARDS_PATH), all_cards, [pool for pool, _ in card_pools])
+    # 紧凑编码与 .gz 预压缩版本
+    print_size_report(write_data_variants(os.path.dirname(CARDS_PATH), cards=all_cards))
+    # 数据版本清单与增量
+    update_data_manifest(os.path.dirname(CARDS_PATH), previous_data)
+    journal.discard()
 
     print(f"✅ 完成，共保存 {len(all_cards)} 条，输出：{CARDS_PATH}", flush=True)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="恋与深空 WIKI 思念卡片爬虫")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="只爬取新增、字段不全或 wiki 页面有修订的卡片，其余沿用现有 cards.json",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="不读写磁盘 HTTP 响应缓存",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"同时处理的卡片数（默认 {DEFAULT_WORKERS}）",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=f"从断点日志 {CHECKPOINT_PATH} 恢复，跳过上次中断前已完成的卡片",
+    )
+    parser.add_argument(
+        "--metrics-out",
+        default=METRICS_PATH,
+        help=f"运行指标 JSON 输出路径（默认 {METRICS_PATH}）",
+    )
+    args = parser.parse_args()
+    if args.no_cache:
+        RESPONSE_CACHE.enabled = False
+    try:
+        main(incremental=args.incremental, workers=args.workers, resume=args.resume)
+    finally:
+        # 失败的运行同样输出指标，便于定位耗时 / 出错环节
+        METRICS.print_summary()
+        METRICS.write_summary(args.metrics_out)
+        # 失败的运行同样保存限速状态：被限流后放大的间隔下次运行继续生效
+        HOST_THROTTLE.save_state()
+        for host, interval in HOST_THROTTLE.snapshot().items():
+            print(f"   · {host} 请求间隔 {interval:.2f}s", flush=True)
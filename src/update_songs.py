@@ -1,14 +1,27 @@
+import argparse
 import json
+import os
 import time
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import requests
 
+from atomic_io import write_json_atomic
+from compact_data import write_gzip_variant
+from crawl_engine import scaled
+from data_manifest import snapshot_data_files, update_data_manifest
+from http_cache import ResponseCache
+from replay import install_transport_hooks
 
 
 songs_json_path = "src/assets/songs.json"
 songs_list_path = "src/assets/songs_list.json"
 
+ARTIST_ID = "59642824"
+
+# song/detail 接口单次请求的 id 数量
+SONG_DETAIL_BATCH = 200
+
 SESSION = requests.Session()
 SESSION.headers.update({
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
@@ -16,12 +29,36 @@ SESSION.headers.update({
                   "Chrome/143.0.0.0 Safari/537.36",
     "Referer": "https://music.163.com/",
 })
+install_transport_hooks(SESSION)  # DEEPSPACE_RECORD_DIR / DEEPSPACE_REPLAY_URL
+
+# 磁盘响应缓存：TTL 内直接命中，过期后用 ETag / Last-Modified 条件请求
+RESPONSE_CACHE = ResponseCache()
+_last_from_cache = False
 
 def _get_json(url, params=None):
-    response = SESSION.get(url, params=params, timeout=15)
+    global _last_from_cache
+    full_url = requests.Request("GET", url, params=params).prepare().url
+    cached = RESPONSE_CACHE.get_fresh(full_url)
+    if cached is not None:
+        _last_from_cache = True
+        return cached.json()
+
+    _last_from_cache = False
+    response = SESSION.get(full_url, timeout=15, headers=RESPONSE_CACHE.conditional_headers(full_url))
+    if response.status_code == 304:
+        cached = RESPONSE_CACHE.revalidated(full_url, response)
+        if cached is not None:
+            return cached.json()
+        response = SESSION.get(full_url, timeout=15)
     response.raise_for_status()
+    RESPONSE_CACHE.store(full_url, response)
     return response.json()
 
+def _pause(seconds):
+    # 上一次请求命中缓存时不需要礼貌等待
+    if not _last_from_cache:
+        time.sleep(scaled(seconds))
+
 def ensure_id_exists(data_list, target_id, default_obj):
     # 判断是否已有目标 id
     if not any(item.get("id") == target_id for item in data_list):
@@ -29,6 +66,7 @@ def ensure_id_exists(data_list, target_id, default_obj):
     return data_list
 
 def get_albums(artist_id: str) -> List[Tuple[int, str]]:
+    """返回 [(album_id, 专辑名)]。"""
     limit = 50
     offset = 0
     albums: List[Tuple[int, str]] = []
@@ -51,7 +89,7 @@ def get_albums(artist_id: str) -> List[Tuple[int, str]]:
             if album_id:
                 albums.append((album_id, album_title))
         offset += limit
-        time.sleep(0.3)
+        _pause(0.3)
 
     return albums
 
@@ -71,7 +109,44 @@ def get_song_detail(song_id: int):
     songs = data.get("songs") or []
     return songs[0] if songs else None
 
-def get_songs(album_id, album_title):
+def get_song_details(song_ids) -> Dict[int, dict]:
+    """
+    批量获取歌曲详情：song/detail 接口的 ids 接受 JSON 数组，
+    按 SONG_DETAIL_BATCH 分块请求；批量响应里缺失的 id 再逐个补查。
+    """
+    url = "https://music.163.com/api/song/detail/"
+    unique_ids = list(dict.fromkeys(int(i) for i in song_ids))
+    details: Dict[int, dict] = {}
+
+    for start in range(0, len(unique_ids), SONG_DETAIL_BATCH):
+        chunk = unique_ids[start:start + SONG_DETAIL_BATCH]
+        params = {"ids": json.dumps(chunk, separators=(",", ":"))}
+        try:
+            data = _get_json(url, params=params)
+        except (requests.RequestException, ValueError) as e:
+            print(f"⚠️ 批量获取歌曲详情失败（{len(chunk)} 首），改为逐个获取：{e}")
+            continue
+        for song in data.get("songs") or []:
+            if song.get("id") is not None:
+                details[int(song["id"])] = song
+        _pause(0.3)
+
+    missing = [song_id for song_id in unique_ids if song_id not in details]
+    if missing:
+        print(f"批量响应缺少 {len(missing)} 首歌曲，逐个补查")
+    for song_id in missing:
+        try:
+            detail = get_song_detail(song_id)
+        except (requests.RequestException, ValueError) as e:
+            print(f"⚠️ 获取歌曲详情失败，song_id={song_id}：{e}")
+            detail = None
+        if detail:
+            details[song_id] = detail
+        _pause(0.2)
+
+    return details
+
+def get_album_tracks(album_id, album_title):
     url = f"https://music.163.com/api/album/{album_id}"
     params = {
         "ext": "true",
@@ -86,13 +161,14 @@ def get_songs(album_id, album_title):
         print(f"专辑接口返回异常，album_id={album_id}, code={data.get('code')}")
 
     print(f"共找到{len(song_items)}行歌曲数据，专辑：{album_title}")
-    songs = []
+    return [song for song in song_items if song.get("id")]
 
+def build_songs(song_items, details: Dict[int, dict]):
+    """按专辑内顺序合并曲目与详情；没有详情时退回专辑接口里的字段。"""
+    songs = []
     for song in song_items:
         song_id = song.get("id")
-        if not song_id:
-            continue
-        detail = get_song_detail(song_id)
+        detail = details.get(int(song_id))
         if detail:
             title = detail.get("name")
             duration = _format_duration(detail.get("duration"))
@@ -110,38 +186,115 @@ def get_songs(album_id, album_title):
             "duration": duration,
             "singers": singers
         })
-        time.sleep(0.2)
-
     return songs
 
+def get_songs(album_id, album_title):
+    song_items = get_album_tracks(album_id, album_title)
+    details = get_song_details(song.get("id") for song in song_items)
+    return build_songs(song_items, details)
 
 
-final_results = {}
-albums = get_albums("59642824")
-print(f"共找到 {len(albums)} 张专辑：")
-for album_id, album_title in albums:
-    print(f"\n{album_id} : {album_title}")
-    songs = get_songs(album_id, album_title)
-    final_results[album_id] = {
-        "name": album_title,
-        "songs": songs
-    }
 
-with open(songs_json_path, "w", encoding="utf-8") as f:
-    json.dump(final_results, f, ensure_ascii=False, indent=4)
+def load_existing_songs(path: str = songs_json_path) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ 读取 {path} 失败，按全量处理：{e}")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def flatten_songs(final_results: dict) -> list:
+    """songs.json（按专辑分组）→ songs_list.json（按专辑顺序平铺）。"""
+    return [song for value in final_results.values() for song in value["songs"]]
+
+def collect_songs(artist_id: str = ARTIST_ID, existing: Optional[dict] = None) -> Tuple[dict, dict]:
+    """
+    拉取歌手的全部专辑并组装 songs.json 结构，返回 (final_results, 统计)。
+    传入 existing（现有 songs.json）时为增量模式：
+    - 每张专辑都拉取曲目列表（曲目数相同也可能换了曲目或调整了顺序）
+    - 曲目 id 及顺序与现有记录一致时复用现有记录
+    - 只有新增或曲目变化的专辑才批量获取歌曲详情
+    """
+    existing = existing or {}
+    albums = get_albums(artist_id)
+    if not albums:
+        raise RuntimeError(f"歌手 {artist_id} 的专辑列表为空，放弃本次更新")
+    print(f"共找到 {len(albums)} 张专辑：")
+
+    stats = {"albums": len(albums), "reused": 0, "refreshed": 0, "new": 0, "removed": 0}
+    reused: Dict[str, dict] = {}
+    album_tracks = []
+    for album_id, album_title in albums:
+        key = str(album_id)
+        old = existing.get(key)
+        print(f"\n{album_id} : {album_title}")
+        song_items = get_album_tracks(album_id, album_title)
+        _pause(0.3)
+        if old is not None and [str(song["id"]) for song in song_items] == [song["id"] for song in old["songs"]]:
+            reused[key] = {"name": album_title, "songs": old["songs"]}
+            continue
+        stats["new" if old is None else "refreshed"] += 1
+        album_tracks.append((key, album_title, song_items))
+    stats["reused"] = len(reused)
+
+    # 先收集所有待更新专辑的曲目，再统一批量获取详情
+    all_ids = [song.get("id") for _, _, song_items in album_tracks for song in song_items]
+    details = get_song_details(all_ids) if all_ids else {}
+    if all_ids:
+        print(f"\n共获取 {len(details)}/{len(set(all_ids))} 首歌曲详情")
+    fetched = {key: {"name": album_title, "songs": build_songs(song_items, details)}
+               for key, album_title, song_items in album_tracks}
+
+    # 保持专辑接口返回的顺序
+    final_results = {}
+    for album_id, _ in albums:
+        key = str(album_id)
+        final_results[key] = reused.get(key) or fetched[key]
+    stats["removed"] = len(set(existing) - set(final_results))
+    return final_results, stats
 
+def main(incremental: bool = False, artist_id: str = ARTIST_ID) -> dict:
+    """
+    更新 songs.json 与 songs_list.json，返回本次统计。
+    incremental=True 时以现有 songs.json 为基准，只抓取新增或曲目变化的专辑。
+    """
+    existing = load_existing_songs() if incremental else {}
+    final_results, stats = collect_songs(artist_id, existing if incremental else None)
+    songs_list = flatten_songs(final_results)
 
-songs_list = []
-with open(songs_json_path, "r", encoding="utf-8") as f:
-    final_results = json.load(f)
-    for key, value in final_results.items():
-        for song in value["songs"]:
-            songs_list.append(song)
+    print(f"共 {len(songs_list)} 首歌曲")
 
+    if incremental and final_results == existing and os.path.exists(songs_list_path):
+        print("✅ 歌曲数据无变化，跳过写入")
+    else:
+        previous_data = snapshot_data_files(os.path.dirname(songs_list_path))
+        write_json_atomic(songs_json_path, final_results, indent=4)
+        write_json_atomic(songs_list_path, songs_list, indent=4)
+        write_gzip_variant(songs_list_path)
+        update_data_manifest(os.path.dirname(songs_list_path), previous_data)
+    print(
+        f"📊 专辑 {stats['albums']} 张：复用 {stats['reused']}，新增 {stats['new']}，"
+        f"更新 {stats['refreshed']}，移除 {stats['removed']}"
+    )
+    return stats
 
-print(len(songs_list))
-for i in songs_list:
-    print(i)
 
-with open(songs_list_path, "w", encoding="utf-8") as f:
-    json.dump(songs_list, f, ensure_ascii=False, indent=4)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="恋与深空 网易云歌曲爬虫")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="增量更新：只抓取新增或曲目变化的专辑",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="不读写磁盘 HTTP 响应缓存",
+    )
+    args = parser.parse_args()
+    if args.no_cache:
+        RESPONSE_CACHE.enabled = False
+    main(incremental=args.incremental)
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+"""
+WIKI 页面的轻量 HTML 提取
+----------------------------------------------------------------
+- 基于 html.parser.HTMLParser 单次流式扫描，不构建完整 DOM 树
+- 详情页：.center img 的 src / srcset，以及脚本中的 Bvid / Pname
+- 入口页：div.divsort 中的卡名、详情链接、列表小图
+- 解析结果不完整时返回 None，由调用方回退到 BeautifulSoup
+"""
+
+import codecs
+import re
+from html.parser import HTMLParser
+
+CHUNK_SIZE = 64 * 1024
+
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+
+
+class _StackParser(HTMLParser):
+    """维护打开标签栈 (tag, class 集合)，供子类判断祖先元素。"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack: list[tuple[str, set[str]]] = []
+
+    @staticmethod
+    def classes_of(attrs: list[tuple[str, str | None]]) -> set[str]:
+        for key, value in attrs:
+            if key == "class" and value:
+                return set(value.split())
+        return set()
+
+    def push(self, tag: str, attrs) -> set[str]:
+        classes = self.classes_of(attrs)
+        if tag not in VOID_TAGS:
+            self.stack.append((tag, classes))
+        return classes
+
+    def pop(self, tag: str) -> int | None:
+        """弹出到最近的同名标签，返回弹出后的栈深度；没有匹配时忽略（容错畸形 HTML）。"""
+        for pos in range(len(self.stack) - 1, -1, -1):
+            if self.stack[pos][0] == tag:
+                del self.stack[pos:]
+                return pos
+        return None
+
+    def inside(self, cls: str, start: int = 0) -> bool:
+        return any(cls in classes for _, classes in self.stack[start:])
+
+
+class DetailPageParser(_StackParser):
+    """详情页：首个 .center img（兜底为首个 img）与 Bvid / Pname。"""
+
+    def __init__(self, bvid_re: re.Pattern, pname_re: re.Pattern):
+        super().__init__()
+        self.bvid_re = bvid_re
+        self.pname_re = pname_re
+        self.center_img: dict | None = None
+        self.first_img: dict | None = None
+        self.bvid = ""
+        self.pname = ""
+        self._text: list[str] = []
+
+    @property
+    def done(self) -> bool:
+        return self.center_img is not None and bool(self.bvid) and bool(self.pname)
+
+    def _scan(self, text: str) -> None:
+        if not self.bvid:
+            match = self.bvid_re.search(text)
+            if match:
+                self.bvid = match.group("bvid")
+        if not self.pname:
+            match = self.pname_re.search(text)
+            if match:
+                self.pname = match.group("pname").strip()
+
+    def _flush_text(self) -> None:
+        if self._text:
+            self._scan("".join(self._text))
+            self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        for _, value in attrs:
+            if value and ("=" in value):
+                self._scan(value)
+        if tag == "img":
+            img = {k: v or "" for k, v in attrs}
+            if self.first_img is None:
+                self.first_img = img
+            if self.center_img is None and self.inside("center"):
+                self.center_img = img
+        self.push(tag, attrs)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        self.pop(tag)
+
+    def handle_data(self, data):
+        self._text.append(data)
+
+    def close(self):
+        super().close()
+        self._flush_text()
+
+
+class EntryPageParser(_StackParser):
+    """入口页：逐个 div.divsort 收集 .card-name、.card-img a[href]、a.image img。"""
+
+    def __init__(self):
+        super().__init__()
+        self.boxes: list[dict] = []
+        self._box: dict | None = None
+        self._box_depth = 0
+        self._name_depth: int | None = None
+
+    def handle_starttag(self, tag, attrs):
+        classes = self.push(tag, attrs)
+        if self._box is None:
+            if tag == "div" and "divsort" in classes:
+                self._box = {"name_parts": [], "href": None, "img": None}
+                self._box_depth = len(self.stack)
+            return
+
+        if self._name_depth is None and "card-name" in classes and tag not in VOID_TAGS:
+            self._name_depth = len(self.stack)
+        if tag == "a" and self._box["href"] is None and self.inside("card-img", self._box_depth):
+            href = dict(attrs).get("href")
+            if href:
+                self._box["href"] = href
+        if tag == "img" and self._box["img"] is None:
+            # a.image img：最近的 a 祖先需要带 image class
+            for anc_tag, anc_classes in reversed(self.stack[self._box_depth:]):
+                if anc_tag == "a":
+                    if "image" in anc_classes:
+                        self._box["img"] = {k: v or "" for k, v in attrs}
+                    break
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        depth = self.pop(tag)
+        if depth is None or self._box is None:
+            return
+        if self._name_depth is not None and depth < self._name_depth:
+            self._name_depth = None
+            self._box["name_done"] = True
+        if depth < self._box_depth:
+            if self._name_depth is not None:
+                self._box["name_done"] = True
+            self.boxes.append(self._box)
+            self._box = None
+            self._name_depth = None
+
+    def handle_data(self, data):
+        if self._box is not None and self._name_depth is not None and not self._box.get("name_done"):
+            self._box["name_parts"].append(data)
+
+
+def _feed_bytes(parser: HTMLParser, raw: bytes, stop=None) -> None:
+    """按块解码并喂给解析器；stop() 为真时提前结束，不再处理剩余字节。"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    view = memoryview(raw)
+    for start in range(0, len(view), CHUNK_SIZE):
+        parser.feed(decoder.decode(view[start:start + CHUNK_SIZE]))
+        if stop is not None and stop():
+            return
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+
+
+def extract_detail_page(raw: bytes | str, bvid_re: re.Pattern, pname_re: re.Pattern) -> dict | None:
+    """
+    单次扫描详情页，返回 {"img": {...} | None, "bvid", "pname"}。
+    页面里一张图片都没找到时返回 None（可能是结构变化，交给 BeautifulSoup 兜底）。
+    """
+    parser = DetailPageParser(bvid_re, pname_re)
+    try:
+        if isinstance(raw, str):
+            parser.feed(raw)
+            parser.close()
+        else:
+            _feed_bytes(parser, raw, stop=lambda: parser.done)
+    except Exception:
+        return None
+    img = parser.center_img or parser.first_img
+    if img is None:
+        return None
+    return {"img": img, "bvid": parser.bvid, "pname": parser.pname}
+
+
+def extract_entry_boxes(raw: bytes | str) -> list[dict] | None:
+    """
+    单次扫描入口页，返回 [{"name", "href", "img"}]（img 为属性字典或 None）。
+    一个 div.divsort 都没找到时返回 None，交给 BeautifulSoup 兜底。
+    """
+    parser = EntryPageParser()
+    try:
+        if isinstance(raw, str):
+            parser.feed(raw)
+            parser.close()
+        else:
+            _feed_bytes(parser, raw)
+    except Exception:
+        return None
+    if not parser.boxes:
+        return None
+    return [
+        {
+            "name": "".join(box["name_parts"]).strip() if box.get("name_done") else "",
+            "href": box["href"],
+            "img": box["img"],
+        }
+        for box in parser.boxes
+    ]